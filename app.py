@@ -1,7 +1,10 @@
 import os
 import streamlit as st
 import sqlite3
-from sentence_transformers import SentenceTransformer, util
+
+from filters import faculty_types
+from search_engine import FacultySearchEngine
+from store import schema_outdated
 
 # 🎨 UI STYLE
 st.markdown("""
@@ -77,32 +80,29 @@ os.environ["STREAMLIT_SERVER_ADDRESS"] = "0.0.0.0"
 
 st.set_page_config(page_title="Faculty Finder AI", page_icon="🎓", layout="wide")
 
-# 🤖 MODEL
+# 🤖 MODEL + SEARCH ENGINE
+# Loaded once per process and shared by every session
 @st.cache_resource
-def load_model():
-    return SentenceTransformer("all-MiniLM-L6-v2")
-
-model = load_model()
-
-# 📂 DATABASE
-def get_clean_data():
+def load_engine():
     if not os.path.exists("faculty_data.db"):
-        return []
-
-    conn = sqlite3.connect("faculty_data.db")
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+        return None
 
-    cursor.execute("SELECT * FROM faculty")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    try:
+        return FacultySearchEngine()
+    except sqlite3.OperationalError:
+        return None
 
 # 🎯 UI HEADER
+# Drawn before the engine loads, so the page shell shows up immediately
 st.title("🎓 Faculty Recommender System ✨")
 st.markdown("🔍 Search by research topic, name, or specialization.")
 
-data = get_clean_data()
+# Memory-mapped from the warm-start snapshot when the data is unchanged;
+# the AI model keeps loading in the background until the first query
+with st.spinner("📦 Loading search index..."):
+    engine = load_engine()
+
+data = engine.rows if engine else []
 
 # 📊 SIDEBAR
 with st.sidebar:
@@ -112,6 +112,21 @@ with st.sidebar:
     else:
         st.error("No data found")
 
+    # Filters are applied before scoring, so they make searches faster
+    st.header("🧭 Filters")
+    types, outdated = [], False
+    if engine:
+        with engine.pool.connection() as conn:
+            # The app never migrates the database it serves
+            outdated = schema_outdated(conn)
+            if not outdated:
+                types = [name for name, _ in faculty_types(conn)]
+    if outdated:
+        st.warning("⚠️ Run `python store.py --migrate` to enable filters.")
+    faculty_type = st.multiselect("Faculty type", types, disabled=outdated)
+    education = st.text_input("Education keywords (e.g., 'PhD USA')", disabled=outdated)
+    has_email = st.checkbox("Only profiles with an email", disabled=outdated)
+
 # 🔍 SEARCH
 query = st.text_input("Search (e.g., 'Arpit Rana')")
 query = query.lower()
@@ -119,55 +134,46 @@ query = query.lower()
 # 🚀 SEARCH LOGIC
 if query and data:
 
-    search_corpus = []
-    for r in data:
-        text = f"{r['name'] or ''} {r['name'] or ''} {r['research'] or ''} {r['specialization'] or ''}"
-        search_corpus.append(text.lower())
-
     with st.spinner("🔎 Searching..."):
-        corpus_embeddings = model.encode(search_corpus, convert_to_tensor=True)
-        query_embedding = model.encode(query, convert_to_tensor=True)
-        hits = util.semantic_search(query_embedding, corpus_embeddings, top_k=5)[0]
+        hits = engine.search(query, filters={
+            "faculty_type": faculty_type,
+            "education": education,
+            "has_email": True if has_email else None,
+        })
 
     st.subheader(f"🎯 Top Matches for '{query}'")
 
     for hit in hits:
-        idx = hit['corpus_id']
         score = hit['score'] * 100
-        row = data[idx]
-
-        # ⭐ EXACT MATCH = 100%
-        if query.strip() == (row['name'] or "").lower():
-            score = 100
-
-        if score > 10:
-
-            # ✅ CARD START
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-
-            col1, col2 = st.columns([1, 4])
-
-            # 🏆 SCORE
-            with col1:
-                st.markdown(f"""
-                <div class="score-label">🏆 Match Score</div>
-                <div class="score-text">{score:.1f}%</div>
-                """, unsafe_allow_html=True)
-
-            # 👤 DETAILS
-            with col2:
-                st.markdown(f"### 👤 {row['name'] or 'Unknown'}")
-                st.markdown(f"📧 **Email:** {row['email'] or 'Not Defined'}")
-                st.markdown(f"📞 **Phone:** {row['phone'] or 'Not Defined'}")
-                st.markdown(f"📍 **Address:** {row['address'] or 'Not Defined'}")
-                st.markdown(f"🎓 **Education:** {row['education'] or 'Not Defined'}")
-                st.markdown(f"🌟 **Specialization:** {row['specialization'] or 'Not Defined'}")
-
-                if row['profile_url']:
-                    st.link_button("🔗 View Full Profile", row['profile_url'])
-
-            # ✅ CARD END
-            st.markdown('</div>', unsafe_allow_html=True)
+        row = hit['faculty']
+
+        # ✅ CARD START
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+
+        col1, col2 = st.columns([1, 4])
+
+        # 🏆 SCORE
+        with col1:
+            st.markdown(f"""
+            <div class="score-label">🏆 Match Score</div>
+            <div class="score-text">{score:.1f}%</div>
+            """, unsafe_allow_html=True)
+
+        # 👤 DETAILS
+        with col2:
+            st.markdown(f"### 👤 {row['name'] or 'Unknown'}")
+            st.markdown(f"🏷️ **Type:** {row.get('faculty_type') or 'Not Defined'}")
+            st.markdown(f"📧 **Email:** {row['email'] or 'Not Defined'}")
+            st.markdown(f"📞 **Phone:** {row['phone'] or 'Not Defined'}")
+            st.markdown(f"📍 **Address:** {row['address'] or 'Not Defined'}")
+            st.markdown(f"🎓 **Education:** {row['education'] or 'Not Defined'}")
+            st.markdown(f"🌟 **Specialization:** {row['specialization'] or 'Not Defined'}")
+
+            if row['profile_url']:
+                st.link_button("🔗 View Full Profile", row['profile_url'])
+
+        # ✅ CARD END
+        st.markdown('</div>', unsafe_allow_html=True)
 
 elif query:
     st.warning("⚠️ No database data found.")
\ No newline at end of file
@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from snapshot import snapshot_path
+from store import save_to_db
+from transform import transform_data
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# The full /all body is only requested up to this many rows; bigger tables
+# are benchmarked through keyset pages
+FULL_ALL_MAX_ROWS = 100_000
+
+TOPICS = [
+    "machine learning", "computer vision", "wireless networks", "VLSI design",
+    "information retrieval", "cryptography", "signal processing", "robotics",
+    "natural language processing", "distributed systems", "quantum computing",
+    "embedded systems", "data mining", "control theory", "optimization",
+    "computational linguistics", "graph algorithms", "cyber security",
+    "human computer interaction", "bioinformatics", "remote sensing",
+]
+WORDS = (
+    "analysis model system data network learning design efficient adaptive "
+    "framework method algorithm performance scalable robust secure novel "
+    "approach study evaluation architecture hardware software theory"
+).split()
+FIRST_NAMES = ["Amit", "Priya", "Rahul", "Sneha", "Vikram", "Anjali", "Arjun", "Neha", "Karan", "Pooja"]
+LAST_NAMES = ["Shah", "Patel", "Mehta", "Rana", "Gupta", "Singh", "Das", "Roy", "Jain", "Kumar"]
+# Regular faculty outnumber the other listings
+FACULTY_TYPES = ["Faculty", "Faculty", "Faculty", "Adjunct Faculty", "Distinguished Professor", "Professor Practice"]
+
+
+# --------------------------------------------------
+# Synthetic data
+# --------------------------------------------------
+def _sentence(rng, topic, words=12):
+    return f"{topic.capitalize()} {' '.join(rng.choice(WORDS) for _ in range(words))}."
+
+
+def synthetic_records(n, seed=0):
+    """
+    Yields n raw records shaped like FacultyItem, with the gaps and stray
+    whitespace the transform rules have to handle.
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        topics = rng.sample(TOPICS, 3)
+        slug = f"{first}-{last}-{i}".lower()
+        yield {
+            "name": f" {first} {last.lower()} ",
+            "profile_url": f"https://faculty.example.edu/faculty/{slug}",
+            "education": f"PhD ({topics[0].title()}), Example University" if rng.random() > 0.1 else None,
+            "email": f"{first.lower()}_{last.lower()}{i}@example.edu" if rng.random() > 0.2 else None,
+            "phone": f"079-6826{i % 10000:04d}" if rng.random() > 0.5 else None,
+            "address": f"# {1000 + i % 500}, FB-{i % 4 + 1}, Example Campus",
+            "faculty_web": None,
+            "biography": " ".join(_sentence(rng, t, 20) for t in topics) if rng.random() > 0.3 else "",
+            "specialization": ", ".join(t.title() for t in topics),
+            "teaching": ", ".join(rng.sample(TOPICS, 2)),
+            "publications": "\n".join(
+                f"{last}, {first[0]}., \"{_sentence(rng, t, 8)}\" IEEE Transactions, {rng.randint(2000, 2025)}"
+                for t in rng.sample(TOPICS, rng.randint(0, 5))
+            ),
+            "research": " ".join(_sentence(rng, t) for t in topics[:2]),
+            "faculty_type": rng.choice(FACULTY_TYPES),
+        }
+
+
+def write_feed(path, records):
+    """
+    Writes records like Scrapy's JSON feed: one item per line inside [ ].
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, record in enumerate(records):
+            f.write((",\n" if i else "\n") + json.dumps(record))
+        f.write("\n]")
+
+
+# --------------------------------------------------
+# Measurements
+# --------------------------------------------------
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def latency_summary(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        "count": int(len(samples)),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+    }
+
+
+def benchmark_search(db_path, n_queries, batch_size, seed=0):
+    from search_engine import FacultySearchEngine
+
+    engine, build_seconds = timed(FacultySearchEngine, db_path=db_path)
+    # Second start memory-maps the snapshot the first one wrote
+    warm_engine, warm_seconds = timed(FacultySearchEngine, db_path=db_path, preload_model=False)
+    del warm_engine
+
+    # Distinct queries, so the query embedding cache does not hide encodes
+    rng = random.Random(seed)
+    queries = [f"{rng.choice(TOPICS)} {rng.choice(WORDS)} {i}" for i in range(n_queries)]
+
+    single = []
+    for query in queries:
+        _, seconds = timed(engine.search, query)
+        single.append(seconds)
+
+    batched = []
+    batch_queries = [f"{q} batch" for q in queries]
+    for start in range(0, len(batch_queries), batch_size):
+        _, seconds = timed(engine.search_batch, batch_queries[start:start + batch_size])
+        batched.append(seconds)
+
+    # The same queries again, answered by the result cache
+    repeated = []
+    for query in queries:
+        _, seconds = timed(engine.search, query)
+        repeated.append(seconds)
+
+    return {
+        "index_build_s": round(build_seconds, 3),
+        "warm_start_s": round(warm_seconds, 3),
+        "rows": len(engine),
+        "backend": engine.backend.build_stats,
+        "chunks": engine.metrics()["chunks"],
+        "single_query": latency_summary(single),
+        "batched_query": {"batch_size": batch_size, **latency_summary(batched)},
+        "repeated_query": latency_summary(repeated),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _load(url, paths, concurrency):
+    import httpx
+
+    latencies = []
+    errors = 0
+    queue = list(paths)
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            while queue:
+                path = queue.pop()
+                start = time.perf_counter()
+                response = await client.get(url + path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        **latency_summary(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+    }
+
+
+def benchmark_all_endpoint(db_path, n_rows, requests, concurrency, seed=0):
+    """
+    Starts `uvicorn main:app` on the benchmark database and drives /all
+    with concurrent clients.
+    """
+    port = _free_port()
+    # No background search warm-up competing with the measured requests
+    env = dict(os.environ, FACULTY_DB=os.path.abspath(db_path), FACULTY_SEARCH_WARMUP="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for_server(port, server)
+        rng = random.Random(seed)
+        results = {}
+        pages = [f"/all?after_id={rng.randint(0, n_rows)}&limit=100" for _ in range(requests)]
+        results["keyset_page_100"] = asyncio.run(_load(url, pages, concurrency))
+        if n_rows <= FULL_ALL_MAX_ROWS:
+            results["full"] = asyncio.run(_load(url, ["/all"] * requests, concurrency))
+        else:
+            results["full"] = f"skipped: more than {FULL_ALL_MAX_ROWS} rows"
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _wait_for_server(port, server, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+def _git_version():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+def run(scale, workdir, queries=200, batch_size=32, requests=200, concurrency=16,
+        skip_search=False, skip_api=False, seed=0):
+    n = SCALES[scale]
+    feed = os.path.join(workdir, f"bench_{scale}.json")
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(snapshot_path("auto", db_path), ignore_errors=True)
+
+    print(f"🧪 Generating {n} synthetic records...")
+    _, generate_seconds = timed(write_feed, feed, synthetic_records(n, seed))
+
+    print("🧹 transform_data...")
+    cleaned, transform_seconds = timed(lambda path: list(transform_data(path)), feed)
+    print("💾 save_to_db...")
+    _, store_seconds = timed(save_to_db, cleaned, db_path=db_path)
+    # A second run with unchanged data measures the skip-unchanged path
+    _, restore_seconds = timed(save_to_db, cleaned, db_path=db_path)
+    del cleaned
+
+    results = {
+        "scale": scale,
+        "records": n,
+        "version": _git_version(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "generate_s": round(generate_seconds, 3),
+        "transform_data_s": round(transform_seconds, 3),
+        "save_to_db_s": round(store_seconds, 3),
+        "save_to_db_unchanged_s": round(restore_seconds, 3),
+    }
+
+    if not skip_search:
+        print("🔎 Index build and query latency...")
+        results["search"] = benchmark_search(db_path, queries, batch_size, seed)
+    if not skip_api:
+        print("🌐 /all under concurrent load...")
+        results["all_endpoint"] = benchmark_all_endpoint(db_path, n, requests, concurrency, seed)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transform, storage, search and the API.")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--output", help="JSON results file (default: benchmark_<scale>.json)")
+    parser.add_argument("--workdir", help="Where the feed and database are written (default: a temp dir)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-search", action="store_true", help="Skip the embedding index and queries")
+    parser.add_argument("--skip-api", action="store_true", help="Skip the uvicorn load test")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="faculty_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results = run(
+        args.scale, workdir, args.queries, args.batch_size, args.requests, args.concurrency,
+        args.skip_search, args.skip_api
+    )
+
+    output = args.output or f"benchmark_{args.scale}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
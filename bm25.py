@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from embeddings import MISSING
+
+# Fields indexed for keyword search and how much a hit in each one counts
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "specialization": 2.0,
+    "research": 1.5,
+    "publications": 1.0,
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "the", "to", "who", "with", "works", "working",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Sparse inverted index (term -> postings) scored with Okapi BM25.
+
+    Term frequencies are summed over the indexed fields using FIELD_WEIGHTS,
+    so a query word found in a name outweighs the same word in a paper title.
+    """
+
+    def __init__(self, rows, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(rows)
+
+        postings = defaultdict(list)
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for doc_id, row in enumerate(rows):
+            tf = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                value = row[field]
+                if not value or value == MISSING:
+                    continue
+                for token in tokenize(value):
+                    tf[token] += weight
+            lengths[doc_id] = sum(tf.values())
+            for token, freq in tf.items():
+                postings[token].append((doc_id, freq))
+
+        avg_length = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+        self._norm = k1 * (1 - b + b * lengths / avg_length)
+
+        # Postings stored as parallel arrays for vectorized scoring
+        self._postings = {}
+        for token, docs in postings.items():
+            ids = np.fromiter((d for d, _ in docs), dtype=np.int32, count=len(docs))
+            tfs = np.fromiter((f for _, f in docs), dtype=np.float32, count=len(docs))
+            idf = math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._postings[token] = (ids, tfs, idf)
+
+    def to_arrays(self):
+        """
+        (vocabulary, arrays): the postings of every term concatenated in
+        vocabulary order, for saving in the warm-start snapshot.
+        """
+        vocabulary = list(self._postings)
+        entries = [self._postings[token] for token in vocabulary]
+        counts = [len(ids) for ids, _, _ in entries]
+        return vocabulary, {
+            "bm25_ids": np.concatenate([ids for ids, _, _ in entries] or [np.zeros(0, dtype=np.int32)]),
+            "bm25_tfs": np.concatenate([tfs for _, tfs, _ in entries] or [np.zeros(0, dtype=np.float32)]),
+            "bm25_offsets": np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64),
+            "bm25_idf": np.array([idf for _, _, idf in entries], dtype=np.float64),
+            "bm25_norm": self._norm,
+        }
+
+    @classmethod
+    def from_arrays(cls, vocabulary, arrays, k1=1.2, b=0.75):
+        """
+        Rebuilds an index saved with to_arrays() without re-tokenizing.
+        """
+        index = cls.__new__(cls)
+        index.k1 = k1
+        index.b = b
+        index._norm = arrays["bm25_norm"]
+        index.size = len(index._norm)
+        ids, tfs, offsets, idf = (arrays[name] for name in ("bm25_ids", "bm25_tfs", "bm25_offsets", "bm25_idf"))
+        index._postings = {
+            token: (ids[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]], float(idf[i]))
+            for i, token in enumerate(vocabulary)
+        }
+        return index
+
+    def scores(self, query):
+        """
+        BM25 score of every document for `query` (zero where no term matches).
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            entry = self._postings.get(token)
+            if entry is None:
+                continue
+            ids, tfs, idf = entry
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[ids])
+        return scores
+
+    def search(self, query, k, mask=None):
+        """
+        Returns up to k (doc_id, score) pairs with a positive score, best first.
+        `mask` (booleans over the documents) keeps only the documents where
+        it is True.
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(int(i), float(scores[i])) for i in matched]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several ranked lists of doc ids: score(d) = sum 1 / (k + rank).
+    Returns {doc_id: fused_score}.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return fused
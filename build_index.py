@@ -0,0 +1,246 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from bm25 import BM25Index
+from chunk_index import FIELDS, faculty_chunks, quantize, report_dropped
+from config import CHUNK_INDEX, ENCODER_BACKEND
+from db import DB_PATH
+from embeddings import MODEL_NAME, profile_text, read_faculty
+from encoders import BACKENDS, LazyModel
+from snapshot import (
+    begin_snapshot, commit_array, corpus_fingerprint, finish_snapshot, load_batch_size, open_array,
+    save_batch_size, snapshot_path
+)
+
+# Rows per shard by id: shard k covers ids k*SHARD_SIZE+1 .. (k+1)*SHARD_SIZE,
+# so boundaries stay put when rows are added or removed elsewhere
+SHARD_SIZE = 10000
+
+CHUNK_DTYPES = {"float16": np.float16, "int8": np.int8}
+
+# Encoder of the current worker process, loaded once by _init_worker
+_worker_model = None
+
+
+def plan_shards(rows, shard_size=SHARD_SIZE):
+    """
+    {(first_id, last_id): [rows]} for every id range that holds rows.
+    """
+    shards = {}
+    for row in rows:
+        k = (row["id"] - 1) // shard_size
+        shards.setdefault((k * shard_size + 1, (k + 1) * shard_size), []).append(row)
+    return shards
+
+
+def shard_file(shard_dir, first_id, last_id):
+    return os.path.join(shard_dir, f"shard_{first_id:010d}_{last_id:010d}.npz")
+
+
+def read_shard_fingerprint(path):
+    try:
+        with np.load(path) as shard:
+            return str(shard["fingerprint"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _init_worker(model_name, backend, threads, batch_size):
+    global _worker_model
+    _worker_model = LazyModel(model_name, backend, threads, batch_size)
+
+
+def encode_shard(db_path, first_id, last_id, path, model_id, chunk_dtype):
+    """
+    Encodes the rows with ids in [first_id, last_id] and writes them to
+    `path` (profile vectors, quantized chunks and the shard fingerprint).
+    Runs in a worker process.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = [dict(row) for row in conn.execute(
+            "SELECT * FROM faculty WHERE id BETWEEN ? AND ? ORDER BY id", (first_id, last_id)
+        )]
+    finally:
+        conn.close()
+
+    texts = [profile_text(row["name"], row["research"], row["specialization"]) for row in rows]
+    embeddings = np.asarray(_worker_model.encode(
+        texts, convert_to_numpy=True, normalize_embeddings=True
+    ), dtype=np.float32)
+
+    if chunk_dtype == "off":
+        counts = np.zeros(len(rows), dtype=np.int64)
+        chunk_vectors = np.zeros((0, embeddings.shape[1]), dtype=np.float16)
+        scales, fields = np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int8)
+    else:
+        field_codes = {name: code for code, name in enumerate(FIELDS)}
+        dropped = []
+        pending = [faculty_chunks(row, dropped) for row in rows]
+        report_dropped(dropped)
+        counts = np.array([len(chunks) for chunks in pending], dtype=np.int64)
+        flat = [chunk for chunks in pending for chunk in chunks]
+        encoded = _worker_model.encode(
+            [text for _, text in flat], convert_to_numpy=True, normalize_embeddings=True
+        ) if flat else np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+        chunk_vectors, scales = quantize(encoded, chunk_dtype)
+        fields = np.array([field_codes[field] for field, _ in flat], dtype=np.int8)
+
+    # Written under a temporary name: a shard file only exists once complete
+    tmp = f"{path}.tmp.npz"
+    np.savez(
+        tmp,
+        ids=np.array([row["id"] for row in rows], dtype=np.int64),
+        embeddings=embeddings,
+        chunk_counts=counts,
+        chunk_vectors=chunk_vectors,
+        chunk_scales=scales,
+        chunk_fields=fields,
+        fingerprint=np.array(corpus_fingerprint(rows, model_id, chunk_dtype)),
+    )
+    os.replace(tmp, path)
+    return first_id, last_id, len(rows), int(counts.sum()), time.perf_counter() - started, _worker_model.batch_size
+
+
+def merge_shards(output, shard_paths, rows, model_id, chunk_dtype):
+    """
+    Streams the shards, in id order, into the snapshot's memory-mapped
+    arrays and writes BM25 postings and meta.json, so FacultySearchEngine
+    warm-starts from the result.
+    """
+    sizes = []
+    for path in shard_paths:
+        with np.load(path) as shard:
+            sizes.append((len(shard["ids"]), len(shard["chunk_vectors"]), shard["embeddings"].shape[1]))
+    n_rows = sum(n for n, _, _ in sizes)
+    n_chunks = sum(c for _, c, _ in sizes)
+    dim = sizes[0][2] if sizes else 0
+
+    begin_snapshot(output)
+    embeddings = open_array(output, "embeddings", np.float32, (n_rows, dim))
+    if chunk_dtype != "off":
+        vectors = open_array(output, "chunk_vectors", CHUNK_DTYPES[chunk_dtype], (n_chunks, dim))
+        scales = open_array(output, "chunk_scales", np.float32, (n_chunks,))
+        fields = open_array(output, "chunk_fields", np.int8, (n_chunks,))
+        offsets = open_array(output, "chunk_offsets", np.int64, (n_rows + 1,))
+        offsets[0] = 0
+
+    row_at = chunk_at = 0
+    for path in shard_paths:
+        with np.load(path) as shard:
+            n, c = len(shard["ids"]), len(shard["chunk_vectors"])
+            embeddings[row_at:row_at + n] = shard["embeddings"]
+            if chunk_dtype != "off":
+                vectors[chunk_at:chunk_at + c] = shard["chunk_vectors"]
+                scales[chunk_at:chunk_at + c] = shard["chunk_scales"]
+                fields[chunk_at:chunk_at + c] = shard["chunk_fields"]
+                offsets[row_at + 1:row_at + n + 1] = chunk_at + np.cumsum(shard["chunk_counts"])
+        row_at += n
+        chunk_at += c
+
+    commit_array(output, "embeddings", embeddings)
+    if chunk_dtype != "off":
+        for name, array in (("chunk_vectors", vectors), ("chunk_scales", scales),
+                            ("chunk_fields", fields), ("chunk_offsets", offsets)):
+            commit_array(output, name, array)
+
+    print("🔤 Building BM25 postings...")
+    finish_snapshot(output, rows, BM25Index(rows), model_id, chunk_dtype, dim, n_chunks)
+
+
+def build_index(db_path=DB_PATH, output="auto", shard_dir=None, shard_size=SHARD_SIZE, workers=None,
+                backend=ENCODER_BACKEND, chunk_dtype=CHUNK_INDEX, threads=None, restart=False,
+                model_name=MODEL_NAME):
+    """
+    Encodes the faculty table shard by shard over a process pool and merges
+    the shards into the warm-start snapshot. Shards whose rows are unchanged
+    since an earlier (possibly interrupted) run are reused as they are.
+    """
+    output = snapshot_path(output, db_path)
+    shard_dir = shard_dir or f"{output}_shards"
+    workers = workers or os.cpu_count() or 1
+    # Split the cores between workers instead of letting each one use all
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    encoder = LazyModel(model_name, backend, threads)
+    model_id = encoder.id
+    # Workers reuse the batch size autotuned by an earlier build
+    batch_size = encoder.batch_size or load_batch_size(output, encoder.tuning_key)
+
+    os.makedirs(shard_dir, exist_ok=True)
+    if restart:
+        for path in glob.glob(os.path.join(shard_dir, "shard_*.npz")):
+            os.remove(path)
+
+    rows = read_faculty(db_path)
+    shards = plan_shards(rows, shard_size)
+    expected = {key: corpus_fingerprint(shard_rows, model_id, chunk_dtype) for key, shard_rows in shards.items()}
+    todo = [
+        key for key in sorted(shards)
+        if read_shard_fingerprint(shard_file(shard_dir, *key)) != expected[key]
+    ]
+    print(f"🧩 {len(shards)} shards of {shard_size} ids: {len(shards) - len(todo)} up to date, {len(todo)} to encode")
+
+    if todo:
+        args = [(os.path.abspath(db_path), first, last, shard_file(shard_dir, first, last), model_id, chunk_dtype)
+                for first, last in todo]
+        done = 0
+        # spawn: workers start clean instead of forking the parent's state
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(model_name, backend, threads, batch_size)) as pool:
+            futures = [pool.submit(encode_shard, *arg) for arg in args]
+            for future in as_completed(futures):
+                first, last, n_rows, n_chunks, seconds, tuned = future.result()
+                if tuned and not batch_size:
+                    batch_size = tuned
+                    save_batch_size(output, encoder.tuning_key, tuned)
+                done += 1
+                print(f"   ✅ [{done}/{len(todo)}] ids {first}-{last}: {n_rows} rows, {n_chunks} chunks in {seconds:.1f}s")
+
+    # A row edited while the build ran leaves its shard stale; the next
+    # run re-encodes just that shard
+    stale = [key for key in sorted(shards) if read_shard_fingerprint(shard_file(shard_dir, *key)) != expected[key]]
+    if stale:
+        raise RuntimeError(f"{len(stale)} shards changed during the build; run it again to re-encode them")
+
+    # Shards of id ranges that no longer hold rows
+    live = {shard_file(shard_dir, *key) for key in shards}
+    for path in glob.glob(os.path.join(shard_dir, "shard_*.npz")):
+        if path not in live:
+            os.remove(path)
+
+    print(f"🧷 Merging {len(shards)} shards into {output}...")
+    merge_shards(output, [shard_file(shard_dir, *key) for key in sorted(shards)], rows, model_id, chunk_dtype)
+    print(f"✅ Index of {len(rows)} profiles written to {output}")
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the search snapshot with a pool of encoder processes.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--output", default="auto", help="Snapshot directory (default: next to the database)")
+    parser.add_argument("--shard-dir", help="Where shard files are kept (default: <output>_shards)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Ids per shard")
+    parser.add_argument("--workers", type=int, help="Encoder processes (default: one per core)")
+    parser.add_argument("--threads", type=int, help="Threads per worker (default: cores / workers)")
+    parser.add_argument("--encoder", default=ENCODER_BACKEND, choices=BACKENDS)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--chunks", default=CHUNK_INDEX, choices=["float16", "int8", "off"])
+    parser.add_argument("--restart", action="store_true", help="Discard existing shards and encode everything")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Error: '{args.db}' not found!")
+    else:
+        build_index(args.db, args.output, args.shard_dir, args.shard_size, args.workers,
+                    args.encoder, args.chunks, args.threads, args.restart, args.model)
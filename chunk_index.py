@@ -0,0 +1,299 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+
+from db import DB_PATH
+from embeddings import MISSING, MODEL_NAME, profile_text
+from metrics import timed_encode
+from publications import split_publications
+
+# Long fields are split into overlapping word windows that fit the model's
+# input length (MiniLM truncates at 256 word pieces)
+CHUNK_WORDS = 96
+CHUNK_OVERLAP = 16
+MAX_CHUNKS_PER_FACULTY = 64
+
+# Field codes stored with every chunk
+FIELDS = ["profile", "biography", "research", "teaching", "publication"]
+
+# Rows scored per block when de-quantizing to float32
+SCORE_BLOCK = 16384
+
+
+def chunk_words(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    step = size - overlap
+    return [" ".join(words[i:i + size]) for i in range(0, len(words) - overlap, step)]
+
+
+def faculty_chunks(row, dropped=None):
+    """
+    (field, text) pairs embedded for one faculty member: the profile text
+    used by the profile index, windows of the long fields and one chunk per
+    publication. Only the first MAX_CHUNKS_PER_FACULTY are kept (the last
+    publications go first); `dropped`, a list, receives
+    (profile_url, chunks cut) for every profile that was cut.
+    """
+    chunks = [("profile", profile_text(row["name"], row["research"], row["specialization"]))]
+    for field in ("biography", "research", "teaching"):
+        value = row[field]
+        if value and value != MISSING:
+            chunks.extend((field, text) for text in chunk_words(value))
+    for citation in split_publications(row["publications"]):
+        chunks.extend(("publication", text) for text in chunk_words(citation)[:1])
+    if dropped is not None and len(chunks) > MAX_CHUNKS_PER_FACULTY:
+        dropped.append((row["profile_url"], len(chunks) - MAX_CHUNKS_PER_FACULTY))
+    return chunks[:MAX_CHUNKS_PER_FACULTY]
+
+
+def report_dropped(dropped):
+    """
+    Prints how many chunks MAX_CHUNKS_PER_FACULTY cut, if any.
+    """
+    if dropped:
+        print(f"⚠️ {len(dropped)} profiles exceed MAX_CHUNKS_PER_FACULTY={MAX_CHUNKS_PER_FACULTY}: "
+              f"{sum(n for _, n in dropped)} chunks not indexed (e.g. {dropped[0][0]})")
+
+
+def chunk_hash(row):
+    digest = hashlib.sha1()
+    for field in ("name", "research", "specialization", "biography", "teaching", "publications"):
+        digest.update((row[field] or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    digest.update(f"{CHUNK_WORDS}/{CHUNK_OVERLAP}/{MAX_CHUNKS_PER_FACULTY}".encode())
+    return digest.hexdigest()
+
+
+def quantize(vectors, dtype):
+    """
+    float16: half the memory, no scale. int8: a quarter of the memory, one
+    float32 scale per vector (symmetric, max-abs).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported chunk dtype '{dtype}' (use float16 or int8)")
+
+
+def create_chunk_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS faculty_chunk_state (
+            profile_url TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            dtype TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS faculty_chunks (
+            profile_url TEXT NOT NULL,
+            chunk_no INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            scale REAL NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (profile_url, chunk_no)
+        )
+    ''')
+
+
+class ChunkIndex:
+    """
+    Quantized chunk embeddings grouped by faculty row.
+
+    vectors[offsets[i]:offsets[i + 1]] are the chunks of row i, so max-sim
+    per faculty is a single np.maximum.reduceat over the chunk scores.
+    """
+
+    def __init__(self, vectors, scales, fields, offsets):
+        self.vectors = vectors
+        self.scales = scales
+        self.fields = fields
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + self.scales.nbytes + self.fields.nbytes + self.offsets.nbytes
+
+    def chunk_scores(self, query, start=0, stop=None):
+        stop = len(self.vectors) if stop is None else stop
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block in range(start, stop, SCORE_BLOCK):
+            end = min(block + SCORE_BLOCK, stop)
+            scores[block - start:end - start] = (
+                self.vectors[block:end].astype(np.float32) @ query
+            ) * self.scales[block:end]
+        return scores
+
+    def max_sim(self, query):
+        """
+        Best chunk score of every faculty row (rows without chunks get -1).
+        """
+        n_rows = len(self.offsets) - 1
+        result = np.full(n_rows, -1.0, dtype=np.float32)
+        if not len(self.vectors):
+            return result
+        scores = self.chunk_scores(query)
+        filled = np.flatnonzero(np.diff(self.offsets) > 0)
+        result[filled] = np.maximum.reduceat(scores, self.offsets[filled])
+        return result
+
+    def max_sim_rows(self, query, rows):
+        """
+        Max-sim for a subset of rows only (e.g. a keyword shortlist): one
+        gather of their chunks, then np.maximum.reduceat per row.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        result = np.full(len(rows), -1.0, dtype=np.float32)
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        filled = np.flatnonzero(counts > 0)
+        if not len(filled):
+            return result
+        counts = counts[filled]
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        # Chunk positions of the selected rows, row after row
+        index = np.repeat(starts[filled] - bounds[:-1], counts) + np.arange(bounds[-1])
+        scores = np.empty(len(index), dtype=np.float32)
+        for block in range(0, len(index), SCORE_BLOCK):
+            part = index[block:block + SCORE_BLOCK]
+            scores[block:block + len(part)] = (self.vectors[part].astype(np.float32) @ query) * self.scales[part]
+        result[filled] = np.maximum.reduceat(scores, bounds[:-1])
+        return result
+
+    def row_of(self, chunk_ids):
+        """
+        Faculty row of each chunk id.
+        """
+        return np.searchsorted(self.offsets, chunk_ids, side="right") - 1
+
+    def dequantized(self):
+        """
+        float32 chunk vectors (vector * scale), e.g. for a VectorBackend.
+        """
+        matrix = np.empty(self.vectors.shape, dtype=np.float32)
+        for block in range(0, len(self.vectors), SCORE_BLOCK):
+            end = min(block + SCORE_BLOCK, len(self.vectors))
+            matrix[block:end] = self.vectors[block:end].astype(np.float32) * self.scales[block:end, None]
+        return matrix
+
+    def best_field(self, query, row):
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        if stop == start:
+            return None
+        return FIELDS[self.fields[start + int(np.argmax(self.chunk_scores(query, start, stop)))]]
+
+
+def sync_chunk_index(conn, model, rows, dtype="float16", model_name=MODEL_NAME):
+    """
+    Encodes the chunks of new or changed profiles, drops those of removed
+    profiles, and returns a ChunkIndex aligned with `rows`.
+    """
+    create_chunk_tables(conn)
+
+    state = {
+        url: (digest, stored_model, stored_dtype)
+        for url, digest, stored_model, stored_dtype in conn.execute(
+            "SELECT profile_url, content_hash, model, dtype FROM faculty_chunk_state"
+        )
+    }
+
+    stale_rows = []
+    hashes = {}
+    for row in rows:
+        url = row["profile_url"]
+        hashes[url] = chunk_hash(row)
+        if state.get(url) != (hashes[url], model_name, dtype):
+            stale_rows.append(row)
+
+    if stale_rows:
+        dropped = []
+        pending = [
+            (row["profile_url"], field, text)
+            for row in stale_rows for field, text in faculty_chunks(row, dropped)
+        ]
+        report_dropped(dropped)
+        encoded = timed_encode(
+            model, [text for _, _, text in pending], "chunk",
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=len(pending) > 256
+        )
+        vectors, scales = quantize(encoded, dtype)
+
+        stale_urls = [(row["profile_url"],) for row in stale_rows]
+        conn.executemany("DELETE FROM faculty_chunks WHERE profile_url = ?", stale_urls)
+
+        chunk_numbers = {}
+        records = []
+        for (url, field, _), vector, scale in zip(pending, vectors, scales):
+            chunk_no = chunk_numbers.get(url, 0)
+            chunk_numbers[url] = chunk_no + 1
+            records.append((url, chunk_no, field, float(scale), vector.tobytes()))
+        conn.executemany(
+            "INSERT INTO faculty_chunks (profile_url, chunk_no, field, scale, vector) VALUES (?, ?, ?, ?, ?)",
+            records
+        )
+        conn.executemany('''
+            INSERT INTO faculty_chunk_state (profile_url, content_hash, model, dtype) VALUES (?, ?, ?, ?)
+            ON CONFLICT(profile_url) DO UPDATE SET
+                content_hash = excluded.content_hash, model = excluded.model, dtype = excluded.dtype
+        ''', [(row["profile_url"], hashes[row["profile_url"]], model_name, dtype) for row in stale_rows])
+
+    # Drop chunks of profiles that disappeared from the faculty table
+    removed = [(url,) for url in state if url not in hashes]
+    if removed:
+        conn.executemany("DELETE FROM faculty_chunks WHERE profile_url = ?", removed)
+        conn.executemany("DELETE FROM faculty_chunk_state WHERE profile_url = ?", removed)
+    conn.commit()
+
+    return read_chunk_index(conn, rows, dtype)
+
+
+def read_chunk_index(conn, rows, dtype):
+    np_dtype = np.float16 if dtype == "float16" else np.int8
+    position = {row["profile_url"]: i for i, row in enumerate(rows)}
+    field_codes = {name: code for code, name in enumerate(FIELDS)}
+
+    grouped = [[] for _ in rows]
+    for url, field, scale, blob in conn.execute(
+        "SELECT profile_url, field, scale, vector FROM faculty_chunks ORDER BY profile_url, chunk_no"
+    ):
+        i = position.get(url)
+        if i is not None:
+            grouped[i].append((field_codes[field], scale, np.frombuffer(blob, dtype=np_dtype)))
+
+    counts = np.array([len(g) for g in grouped], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    chunks = [c for g in grouped for c in g]
+    if not chunks:
+        return ChunkIndex(np.zeros((0, 0), dtype=np_dtype), np.zeros(0, dtype=np.float32),
+                          np.zeros(0, dtype=np.int8), offsets)
+
+    return ChunkIndex(
+        np.ascontiguousarray(np.vstack([c[2] for c in chunks])),
+        np.array([c[1] for c in chunks], dtype=np.float32),
+        np.array([c[0] for c in chunks], dtype=np.int8),
+        offsets
+    )
+
+
+def load_chunk_index(model, rows, db_path=DB_PATH, dtype="float16", model_name=MODEL_NAME):
+    """
+    Opens the database and returns the ChunkIndex for `rows`, kept in sync
+    with their current text.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return sync_chunk_index(conn, model, rows, dtype, model_name)
+    finally:
+        conn.close()
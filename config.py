@@ -0,0 +1,39 @@
+import os
+
+# Deployment settings of the search engine and the index builders, read
+# from FACULTY_* environment variables. Kept apart from search_engine.py so
+# build_index.py and snapshot.py can read them without importing the engine.
+# The database path is FACULTY_DB (db.DB_PATH).
+
+# "exact" (brute force) or "ivf" (approximate, for multi-institution corpora)
+VECTOR_BACKEND = os.environ.get("FACULTY_VECTOR_BACKEND", "exact")
+
+# Chunk embeddings of every long field, scored by max-sim per faculty:
+# "float16", "int8" (smaller, slightly lossier) or "off" (profile vectors only)
+CHUNK_INDEX = os.environ.get("FACULTY_CHUNK_INDEX", "float16")
+
+# Warm-start snapshot of the corpus matrices, memory-mapped on startup:
+# "auto" (<db name>_snapshot/ next to the database), "off" or a directory
+SNAPSHOT = os.environ.get("FACULTY_SNAPSHOT", "auto")
+
+# Load the model in a background thread right away ("1"), or only when a
+# query misses the query cache ("0")
+PRELOAD_MODEL = os.environ.get("FACULTY_PRELOAD_MODEL", "1") != "0"
+
+# Search results cache: memory budget in MB (0 keeps nothing in memory) and
+# an optional SQLite tier shared by processes and restarts: "off", "auto"
+# (<db name>_results.db next to the database) or a file path
+RESULT_CACHE_MB = float(os.environ.get("FACULTY_RESULT_CACHE_MB", "64"))
+RESULT_CACHE_DISK = os.environ.get("FACULTY_RESULT_CACHE_DISK", "off")
+
+# "fp32" (PyTorch), "int8" (PyTorch with dynamically quantized Linear
+# layers), "onnx" (ONNX Runtime export) or "onnx-int8" (ONNX Runtime,
+# int8-quantized export). Non-fp32 vectors are stored under their own
+# model id, so switching re-encodes the corpus once.
+ENCODER_BACKEND = os.environ.get("FACULTY_ENCODER", "fp32")
+
+# Intra-op threads of torch / ONNX Runtime; 0 keeps the library default
+ENCODER_THREADS = int(os.environ.get("FACULTY_ENCODER_THREADS", "0"))
+
+# Batch size for model.encode; 0 autotunes it on the first corpus-sized encode
+ENCODER_BATCH_SIZE = int(os.environ.get("FACULTY_ENCODER_BATCH_SIZE", "0"))
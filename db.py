@@ -0,0 +1,80 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# FACULTY_DB points every module (and a uvicorn worker) at another database
+DB_PATH = os.environ.get("FACULTY_DB", "faculty_data.db")
+
+
+def enable_wal(db_path=DB_PATH):
+    """
+    Switches the database to WAL mode (persistent), so readers never block
+    behind a writer such as the scraper pipeline.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class ReadOnlyConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections that can be handed to
+    worker threads.
+
+    A dedicated watcher connection answers data_version(): SQLite changes
+    that value whenever another connection commits, so callers can cache
+    query results until the data actually changes.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._watcher = self._connect()
+        self._watcher_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._connect()
+        # Pool exhausted: wait for a connection to be released
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def data_version(self):
+        with self._watcher_lock:
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        self._watcher.close()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,153 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+
+from db import DB_PATH
+from metrics import timed_encode
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+MISSING = "Data is not available"
+
+
+def profile_text(name, research, specialization):
+    """
+    Builds the text that represents one faculty member in the vector index.
+    """
+    # Handle null values
+    r_text = research if research and MISSING not in research else ""
+    s_text = specialization if specialization and MISSING not in specialization else ""
+
+    # The name is part of the text so the model can also match on names
+    combined_text = f"Name: {name}. {r_text} {s_text}".strip()
+    return combined_text if combined_text else f"Name: {name}"
+
+
+def content_hash(name, research, specialization):
+    """
+    Fingerprint of the fields that feed profile_text(). A row is only
+    re-encoded when this value changes.
+    """
+    digest = hashlib.sha1()
+    for part in (name, research, specialization):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+EMBEDDINGS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        profile_url TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        dim INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (profile_url, model)
+    )
+'''
+
+
+def create_embedding_table(conn):
+    """
+    Vectors live next to the faculty table, one float32 BLOB per
+    (profile_url, model), so switching models keeps the other's vectors.
+    Tables keyed by profile_url alone are rebuilt with the new key.
+    """
+    conn.execute(EMBEDDINGS_SCHEMA.format(table="faculty_embeddings"))
+    key = [row[1] for row in sorted(conn.execute("PRAGMA table_info(faculty_embeddings)"), key=lambda r: r[5]) if row[5]]
+    if key != ["profile_url", "model"]:
+        conn.execute(EMBEDDINGS_SCHEMA.format(table="faculty_embeddings_new"))
+        conn.execute('''
+            INSERT INTO faculty_embeddings_new (profile_url, content_hash, model, dim, vector)
+            SELECT profile_url, content_hash, model, dim, vector FROM faculty_embeddings
+        ''')
+        conn.execute("DROP TABLE faculty_embeddings")
+        conn.execute("ALTER TABLE faculty_embeddings_new RENAME TO faculty_embeddings")
+
+
+def sync_embeddings(conn, model, rows, model_name=MODEL_NAME):
+    """
+    Returns an (N, dim) float32 matrix aligned with `rows`.
+
+    Stored vectors are reused when the content hash and model still match;
+    only new or changed profiles are encoded. Vectors of profiles that are
+    no longer in `rows` are removed.
+    """
+    create_embedding_table(conn)
+
+    stored = {
+        url: (digest, vector, dim)
+        for url, digest, vector, dim in conn.execute(
+            "SELECT profile_url, content_hash, vector, dim FROM faculty_embeddings WHERE model = ?",
+            (model_name,)
+        )
+    }
+
+    hashes = [content_hash(r["name"], r["research"], r["specialization"]) for r in rows]
+    vectors = [None] * len(rows)
+    stale = []
+    for i, (row, digest) in enumerate(zip(rows, hashes)):
+        cached = stored.get(row["profile_url"])
+        if cached and cached[0] == digest:
+            vectors[i] = np.frombuffer(cached[1], dtype=np.float32, count=cached[2])
+        else:
+            stale.append(i)
+
+    if stale:
+        texts = [profile_text(rows[i]["name"], rows[i]["research"], rows[i]["specialization"]) for i in stale]
+        encoded = timed_encode(
+            model, texts, "profile",
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=len(texts) > 256
+        ).astype(np.float32)
+
+        for i, vector in zip(stale, encoded):
+            vectors[i] = vector
+
+        conn.executemany('''
+            INSERT INTO faculty_embeddings (profile_url, content_hash, model, dim, vector)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(profile_url, model) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                dim = excluded.dim,
+                vector = excluded.vector
+        ''', [
+            (rows[i]["profile_url"], hashes[i], model_name, len(vectors[i]), vectors[i].tobytes())
+            for i in stale
+        ])
+
+    # Drop vectors of profiles that disappeared from the faculty table
+    live = {r["profile_url"] for r in rows}
+    removed = [(url, model_name) for url in stored if url not in live]
+    if removed:
+        conn.executemany("DELETE FROM faculty_embeddings WHERE profile_url = ? AND model = ?", removed)
+
+    conn.commit()
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+
+
+def read_faculty(db_path=DB_PATH):
+    """
+    Every faculty row as a dict, in id order.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM faculty ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def load_index(model, rows, db_path=DB_PATH, model_name=MODEL_NAME):
+    """
+    Returns the embedding matrix of `rows`, kept in sync with the database.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return sync_embeddings(conn, model, rows, model_name)
+    finally:
+        conn.close()
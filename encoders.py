@@ -0,0 +1,296 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from config import ENCODER_BACKEND, ENCODER_BATCH_SIZE, ENCODER_THREADS
+from db import DB_PATH
+from embeddings import MISSING, MODEL_NAME, profile_text, read_faculty
+
+# Encoder backends (see config.ENCODER_BACKEND)
+BACKENDS = ["fp32", "int8", "onnx", "onnx-int8"]
+
+# Autotuning runs on encodes of at least AUTOTUNE_MIN_TEXTS texts, timing
+# each candidate on AUTOTUNE_SAMPLE of them
+AUTOTUNE_MIN_TEXTS = 1024
+AUTOTUNE_SAMPLE = 512
+AUTOTUNE_CANDIDATES = (8, 16, 32, 64, 128, 256)
+
+# Int8 export shipped in the sentence-transformers model repositories
+# (AVX2 runs on any x86-64 server from the last decade)
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+# Agreement with fp32 required before a backend is reported as safe to use
+MIN_COSINE = 0.99
+MIN_TOP_K_OVERLAP = 0.9
+
+
+def encoder_id(backend=ENCODER_BACKEND, name=MODEL_NAME):
+    """
+    Model id stored next to the vectors an encoder produced.
+    """
+    return name if backend == "fp32" else f"{name}+{backend}"
+
+
+def load_encoder(backend=ENCODER_BACKEND, name=MODEL_NAME, threads=ENCODER_THREADS):
+    """
+    A CPU SentenceTransformer for one of BACKENDS. sentence_transformers
+    (and torch) are only imported here.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}' (use one of {', '.join(BACKENDS)})")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend in ("fp32", "int8"):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(name, device="cpu")
+        if backend == "int8":
+            # Weights of every Linear layer become int8; activations are
+            # quantized on the fly per batch
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The onnx encoders require 'optimum[onnxruntime]'") from None
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": options}
+    if backend == "onnx-int8":
+        model_kwargs["file_name"] = ONNX_INT8_FILE
+    return SentenceTransformer(name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+def autotune_batch_size(model, texts, candidates=AUTOTUNE_CANDIDATES, sample=AUTOTUNE_SAMPLE):
+    """
+    Times model.encode on an evenly spread sample of `texts` for every
+    candidate batch size. Returns (best batch size, {batch size: texts/s}).
+    """
+    step = max(1, len(texts) // sample)
+    sample_texts = list(texts[::step][:sample])
+    # The first call pays for lazy initialisation; keep it out of the timings
+    model.encode(sample_texts[:8], convert_to_numpy=True)
+
+    rates = {}
+    for batch_size in candidates:
+        if rates and batch_size > len(sample_texts):
+            break
+        started = time.perf_counter()
+        model.encode(sample_texts, batch_size=batch_size, convert_to_numpy=True)
+        rates[batch_size] = len(sample_texts) / (time.perf_counter() - started)
+    return max(rates, key=rates.get), rates
+
+
+class LazyModel:
+    """
+    Stands in for a SentenceTransformer until something has to be encoded.
+
+    The real encoder is loaded on the first encode() call, or ahead of time
+    in a background thread after start(); callers arriving during the load
+    wait for it instead of loading a second copy. Corpus-sized encodes use
+    `batch_size`, autotuned on the first one when it is 0; callers persist
+    the tuned value under `tuning_key` and pass it back on later builds.
+    """
+
+    def __init__(self, name=MODEL_NAME, backend=ENCODER_BACKEND, threads=ENCODER_THREADS,
+                 batch_size=ENCODER_BATCH_SIZE):
+        self.name = name
+        self.backend = backend
+        self.threads = threads
+        self.batch_size = batch_size
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def id(self):
+        return encoder_id(self.backend, self.name)
+
+    @property
+    def tuning_key(self):
+        """
+        What an autotuned batch size depends on: the encoder, its thread
+        count and the cores of this machine.
+        """
+        return f"{self.id} threads={self.threads or 'default'} cpus={os.cpu_count()}"
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def start(self):
+        if self._thread is None and self._model is None:
+            self._thread = threading.Thread(target=self._background_load, name="model-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _background_load(self):
+        try:
+            self.get()
+        except Exception as e:
+            # The next encode() retries and raises to its caller
+            print(f"⚠️ Background model load failed: {e}")
+
+    def get(self):
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+                self._model = load_encoder(self.backend, self.name, self.threads)
+                self.load_seconds = time.perf_counter() - started
+            return self._model
+
+    def encode(self, texts, **options):
+        model = self.get()
+        if "batch_size" not in options:
+            if self.batch_size:
+                options["batch_size"] = self.batch_size
+            elif len(texts) >= AUTOTUNE_MIN_TEXTS:
+                self.batch_size, rates = autotune_batch_size(model, texts)
+                print(f"⚙️ Encoder batch size {self.batch_size} ({rates[self.batch_size]:.0f} texts/s)")
+                options["batch_size"] = self.batch_size
+        return model.encode(texts, **options)
+
+
+# --------------------------------------------------
+# Comparison against fp32
+# --------------------------------------------------
+def sample_queries(rows, limit=100):
+    """
+    Realistic short queries: the first specialization of each profile.
+    """
+    queries = []
+    for row in rows:
+        specialization = row["specialization"]
+        if specialization and specialization != MISSING:
+            first = specialization.split(",")[0].strip()
+            if first and first not in queries:
+                queries.append(first)
+        if len(queries) >= limit:
+            break
+    return queries
+
+
+def _encode(model, texts, batch_size=None):
+    options = {"convert_to_numpy": True, "normalize_embeddings": True}
+    if batch_size:
+        options["batch_size"] = batch_size
+    return np.asarray(model.encode(texts, **options), dtype=np.float32)
+
+
+def _measure(model, texts, queries):
+    batch_size, rates = autotune_batch_size(model, texts)
+    started = time.perf_counter()
+    corpus = _encode(model, texts, batch_size)
+    corpus_seconds = time.perf_counter() - started
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        started = time.perf_counter()
+        query_vectors.append(_encode(model, [query])[0])
+        latencies.append(time.perf_counter() - started)
+    latencies = np.asarray(latencies) * 1000
+
+    speed = {
+        "batch_size": batch_size,
+        "batch_rates": {size: round(rate, 1) for size, rate in rates.items()},
+        "corpus_texts_per_s": round(len(texts) / corpus_seconds, 1),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+    return corpus, np.vstack(query_vectors), speed
+
+
+def _agreement(corpus, queries, reference_corpus, reference_queries, k):
+    corpus_cosine = np.sum(corpus * reference_corpus, axis=1)
+    query_cosine = np.sum(queries * reference_queries, axis=1)
+
+    k = min(k, len(corpus))
+    top = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    reference_top = np.argsort(-(reference_queries @ reference_corpus.T), axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(top.tolist(), reference_top.tolist())]
+
+    return {
+        "corpus_cosine_mean": round(float(corpus_cosine.mean()), 5),
+        "corpus_cosine_min": round(float(corpus_cosine.min()), 5),
+        "query_cosine_mean": round(float(query_cosine.mean()), 5),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+        "ok": bool(corpus_cosine.mean() >= MIN_COSINE and np.mean(overlap) >= MIN_TOP_K_OVERLAP),
+    }
+
+
+def compare_encoders(texts, queries, backends=BACKENDS, name=MODEL_NAME, threads=ENCODER_THREADS, k=10):
+    """
+    Load time, corpus throughput (at the autotuned batch size) and query
+    latency of every backend, plus its agreement with fp32: cosine between
+    the vectors of the same text and the overlap of the top-k profiles
+    returned for each query.
+    """
+    report = {"model": name, "threads": threads, "texts": len(texts), "queries": len(queries), "backends": {}}
+    reference = None
+    for backend in ["fp32"] + [b for b in backends if b != "fp32"]:
+        print(f"⏱️  {backend}...")
+        try:
+            started = time.perf_counter()
+            model = load_encoder(backend, name, threads)
+            load_seconds = time.perf_counter() - started
+        except (RuntimeError, OSError, ValueError) as e:
+            report["backends"][backend] = {"error": str(e)}
+            continue
+
+        corpus, query_vectors, speed = _measure(model, texts, queries)
+        result = {"load_s": round(load_seconds, 3), **speed}
+        if backend == "fp32":
+            reference = (corpus, query_vectors)
+        elif reference is not None:
+            result["agreement"] = _agreement(corpus, query_vectors, *reference, k)
+            fp32_speed = report["backends"]["fp32"]["corpus_texts_per_s"]
+            result["speedup"] = round(speed["corpus_texts_per_s"] / fp32_speed, 2)
+        report["backends"][backend] = result
+        del model
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare encoder backends against the fp32 model.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--threads", type=int, default=ENCODER_THREADS)
+    parser.add_argument("--limit", type=int, default=2000, help="Profiles encoded per backend")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", default="encoder_report.json")
+    args = parser.parse_args()
+
+    rows = read_faculty(args.db)[:args.limit]
+    texts = [profile_text(row["name"], row["research"], row["specialization"]) for row in rows]
+    if not texts:
+        print(f"⚠️ No faculty data found in {args.db}.")
+    else:
+        report = compare_encoders(
+            texts, sample_queries(rows), args.backends.split(","), args.model, args.threads, args.k
+        )
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        for backend, result in report["backends"].items():
+            if "error" in result:
+                print(f"❌ {backend}: {result['error']}")
+                continue
+            line = f"📊 {backend}: {result['corpus_texts_per_s']} texts/s, query p50 {result['query_p50_ms']} ms"
+            if "agreement" in result:
+                agreement = result["agreement"]
+                verdict = "✅ safe to switch" if agreement["ok"] else "⚠️ ranking differs"
+                line += f", {result['speedup']}x, cosine {agreement['corpus_cosine_mean']}, {verdict}"
+            print(line)
+        print(f"✅ Report written to {args.output}")
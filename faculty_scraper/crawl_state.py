@@ -0,0 +1,106 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+from scrapy import signals
+
+
+def fingerprint(data):
+    """
+    Stable hash of a dict of extracted fields (or of raw bytes).
+    """
+    if isinstance(data, bytes):
+        return hashlib.sha1(data).hexdigest()
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    What the last successful crawl saw for each profile_url: HTTP validators
+    (ETag / Last-Modified), a hash of the page body and a hash of the
+    extracted fields.
+
+    New observations are staged in memory and only written once the item
+    made it through every pipeline (see commit()), so a failed store never
+    marks a page as up to date.
+    """
+
+    def __init__(self, db_path):
+        # Autocommit + WAL: each write is its own short transaction, so the
+        # state never holds the write lock while the storage pipeline needs it
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                profile_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                fields_hash TEXT,
+                crawled_at REAL
+            )
+        ''')
+        self._pending = {}
+        # Set by a buffering storage pipeline that commits after its own flush
+        self.defer_commits = False
+        self._state = {
+            row[0]: {"etag": row[1], "last_modified": row[2], "body_hash": row[3], "fields_hash": row[4]}
+            for row in self.conn.execute(
+                "SELECT profile_url, etag, last_modified, body_hash, fields_hash FROM crawl_state"
+            )
+        }
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # One store per crawl, shared by the middleware and the pipeline
+        store = getattr(crawler, "crawl_state", None)
+        if store is None:
+            store = cls(crawler.settings.get("CRAWL_STATE_DB", "faculty_data.db"))
+            crawler.crawl_state = store
+            crawler.signals.connect(store.item_scraped, signal=signals.item_scraped)
+            crawler.signals.connect(store.spider_closed, signal=signals.spider_closed)
+        return store
+
+    def item_scraped(self, item, response, spider):
+        # The item passed every pipeline: its page is now up to date
+        if not self.defer_commits:
+            self.commit(item.get("profile_url"))
+
+    def spider_closed(self, spider):
+        self.close()
+
+    def get(self, profile_url):
+        return self._state.get(profile_url)
+
+    def stage(self, profile_url, **values):
+        self._pending.setdefault(profile_url, {}).update(values)
+
+    def commit(self, profile_url):
+        values = self._pending.pop(profile_url, None)
+        if not values:
+            return
+        state = self._state.setdefault(profile_url, {})
+        state.update(values)
+
+        self.conn.execute('''
+            INSERT INTO crawl_state (profile_url, etag, last_modified, body_hash, fields_hash, crawled_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(profile_url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash,
+                fields_hash = excluded.fields_hash,
+                crawled_at = excluded.crawled_at
+        ''', (
+            profile_url,
+            state.get("etag"),
+            state.get("last_modified"),
+            state.get("body_hash"),
+            state.get("fields_hash"),
+            time.time()
+        ))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,105 @@
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.asyncio import create_looping_call
+
+from metrics import REGISTRY, TRACER
+
+RESPONSES = REGISTRY.counter(
+    "faculty_crawl_responses_total", "Responses received by the crawler", ["status"]
+)
+ITEMS = REGISTRY.counter(
+    "faculty_crawl_items_total", "Items leaving the item pipelines", ["outcome"]
+)
+DOWNLOAD_SECONDS = REGISTRY.histogram(
+    "faculty_crawl_download_seconds", "Download latency per response"
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "faculty_crawl_parse_seconds", "Profile field extraction time per page", ["institution"]
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "faculty_crawl_db_write_seconds", "Transform and upsert time per SQLite batch"
+)
+PAGES_PER_SECOND = REGISTRY.gauge(
+    "faculty_crawl_pages_per_second", "Responses per second since the crawl started"
+)
+
+
+class CrawlMetrics:
+    """
+    Crawl instrumentation: counts responses and items, records download
+    latency and pages/sec, and writes the process metrics (including parse
+    and DB write histograms from the spider and pipeline) to METRICS_FILE
+    every METRICS_INTERVAL seconds and when the spider closes.
+
+    With METRICS_TRACE_FILE set, timed spans are also saved as a Chrome
+    trace for flame-graph analysis.
+    """
+
+    def __init__(self, stats, path, interval, trace_path=None):
+        self.stats = stats
+        self.path = path
+        self.interval = interval
+        self.trace_path = trace_path
+        self.started = None
+        self.pages = 0
+        self.task = None
+        if trace_path:
+            TRACER.enable()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("METRICS_ENABLED", True):
+            raise NotConfigured
+        extension = cls(
+            crawler.stats,
+            settings.get("METRICS_FILE"),
+            settings.getfloat("METRICS_INTERVAL", 60.0),
+            settings.get("METRICS_TRACE_FILE")
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+        if self.path and self.interval:
+            self.task = create_looping_call(self.write)
+            self.task.start(self.interval, now=False)
+
+    def response_received(self, response, request, spider):
+        self.pages += 1
+        RESPONSES.inc(status=response.status)
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            DOWNLOAD_SECONDS.observe(latency)
+
+    def item_scraped(self, item, spider):
+        ITEMS.inc(outcome="scraped")
+
+    def item_dropped(self, item, response, exception, spider):
+        ITEMS.inc(outcome="dropped")
+
+    def write(self):
+        elapsed = time.monotonic() - self.started
+        PAGES_PER_SECOND.set(round(self.pages / elapsed, 3) if elapsed else 0.0)
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            REGISTRY.write(self.path)
+
+    def spider_closed(self, spider, reason):
+        if self.task and self.task.running:
+            self.task.stop()
+        self.write()
+        self.stats.set_value("metrics/pages_per_second", PAGES_PER_SECOND.value())
+        if self.trace_path:
+            events = TRACER.dump(self.trace_path)
+            spider.logger.info("Wrote %d trace events to %s", events, self.trace_path)
@@ -0,0 +1,206 @@
+import re
+import time
+from collections import defaultdict
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+_translator = HTMLTranslator()
+
+# "div.a.b": the leftmost compound of a CSS spec, used as its anchor
+ANCHOR_CSS_RE = re.compile(r"^([a-zA-Z][\w-]*)?((?:\.[\w-]+)+)$")
+# CSS that is more than descendant steps and a trailing ::text/::attr()
+CSS_COMPLEX_RE = re.compile(r"[>+~,\[]|(?<!:):(?!:)")
+# "//div[<predicate>]<tail>" where the tail starts with / or //
+ANCHOR_XPATH_RE = re.compile(r"^//([a-zA-Z][\w-]*)\[([^\[\]]+)\](/.+)$")
+CLASS_EQUALS_RE = re.compile(r"@class\s*=\s*['\"]([^'\"]+)['\"]")
+CLASS_CONTAINS_RE = re.compile(r"(not\(\s*)?contains\(\s*@class\s*,\s*['\"]([^'\"\s]+)['\"]\s*\)")
+
+
+def clean_list(values):
+    """Helper to remove empty strings and whitespace from list of strings"""
+    return [v.strip() for v in values if v and v.strip()]
+
+
+def _to_string(value):
+    if isinstance(value, str):
+        return value
+    return etree.tostring(value, encoding="unicode", method="html", with_tail=False)
+
+
+class FieldRule:
+    """
+    One compiled field spec.
+
+    Specs that start at a class-identified element get an anchor: the tag,
+    one class `key` to look the rule up by (matched as a substring of a
+    class token when `substring` is set, as in contains(@class, ...)) and
+    an exact `test` for a candidate element. `tail` is then evaluated
+    relative to every matching anchor. Other specs keep one precompiled
+    `path` over the whole document.
+    """
+
+    def __init__(self, field, spec):
+        self.field = field
+        self.first = spec.get("first", False)
+        self.items = spec.get("items", False)
+        self.join = spec.get("join", " ")
+        self.tag = self.key = self.test = self.tail = self.path = None
+        self.substring = False
+
+        if "css" in spec:
+            self._compile_css(spec["css"])
+        else:
+            self._compile_xpath(spec["xpath"])
+
+    @property
+    def anchored(self):
+        return self.tail is not None
+
+    def _compile_css(self, css):
+        parts = css.split()
+        match = ANCHOR_CSS_RE.match(parts[0]) if len(parts) > 1 else None
+        if not match or CSS_COMPLEX_RE.search(css):
+            self.path = etree.XPath(_translator.css_to_xpath(css), smart_strings=False)
+            return
+
+        classes = match.group(2).strip(".").split(".")
+        required = set(classes)
+        self.tag = (match.group(1) or "*").lower()
+        self.key = classes[-1]
+        self.test = lambda element: required <= set(element.get("class").split())
+        self.tail = etree.XPath(
+            _translator.css_to_xpath(" ".join(parts[1:]), prefix="descendant::"), smart_strings=False
+        )
+
+    def _compile_xpath(self, xpath):
+        branches = [branch.strip() for branch in xpath.split(" | ")]
+        matches = [ANCHOR_XPATH_RE.match(branch) for branch in branches]
+        # All union branches must share one anchor, so their relative tails
+        # can be evaluated as one union (keeping document order)
+        if not all(matches) or len({(m.group(1), m.group(2)) for m in matches}) != 1:
+            self.path = etree.XPath(xpath, smart_strings=False)
+            return
+
+        tag, predicate = matches[0].group(1).lower(), matches[0].group(2)
+        equals = CLASS_EQUALS_RE.findall(predicate)
+        contains = [value for negated, value in CLASS_CONTAINS_RE.findall(predicate) if not negated]
+        if equals:
+            self.key = equals[0].split()[0]
+        elif contains:
+            self.key, self.substring = contains[0], True
+        else:
+            self.path = etree.XPath(xpath, smart_strings=False)
+            return
+
+        self.tag = tag
+        self.test = etree.XPath(f"boolean(self::{tag}[{predicate}])")
+        self.tail = etree.XPath(" | ".join("." + m.group(3) for m in matches), smart_strings=False)
+
+    def matches_token(self, token):
+        return self.key in token if self.substring else self.key == token
+
+    def value(self, results):
+        """
+        Same output rules as the spec language:
+          first - keep the first match as-is
+          items - one entry per matched node (its text joined with spaces)
+          join  - separator used to join the cleaned matches
+        """
+        if self.first:
+            return _to_string(results[0]) if results else None
+        if self.items:
+            values = [" ".join(clean_list(node.itertext())) for node in results]
+        else:
+            values = [_to_string(r) for r in results]
+        return self.join.join(clean_list(values))
+
+
+class ProfileExtractor:
+    """
+    Extracts every profile field of an institution in one walk over the
+    parsed page.
+
+    Field specs are compiled once. Specs anchored at a class-identified
+    element ("div.about p::text", "//div[@class='work-exp1']//text()") are
+    resolved during a single iteration over the document: each element's
+    class tokens are looked up in a token -> rules table, and the few
+    candidates are confirmed with the rule's exact test. The relative tails
+    then only search inside their anchors instead of rescanning the whole
+    tree. Other specs fall back to one precompiled XPath each.
+
+    Time spent per field is accumulated in `timings` (seconds) and `calls`.
+    """
+
+    def __init__(self, profile_specs):
+        self.rules = [FieldRule(field, spec) for field, spec in profile_specs.items()]
+        self.anchored = [rule for rule in self.rules if rule.anchored]
+        tags = {rule.tag for rule in self.anchored}
+        self.walk_tags = () if "*" in tags else tuple(sorted(tags))
+        # class token -> anchored rules it may select, filled lazily since
+        # substring keys can match tokens never seen at compile time
+        self._token_rules = {}
+        self.timings = defaultdict(float)
+        self.calls = 0
+
+    def _rules_for(self, token):
+        rules = self._token_rules.get(token)
+        if rules is None:
+            rules = [rule for rule in self.anchored if rule.matches_token(token)]
+            self._token_rules[token] = rules
+        return rules
+
+    def _collect_anchors(self, root):
+        found = {rule.field: [] for rule in self.anchored}
+        if not self.anchored:
+            return found
+
+        claimed = defaultdict(set)
+        for element in root.iter(*self.walk_tags):
+            class_attr = element.get("class")
+            if not class_attr:
+                continue
+            candidates = None
+            for token in class_attr.split():
+                rules = self._rules_for(token)
+                if rules:
+                    candidates = (candidates or set()).union(rules)
+            if not candidates:
+                continue
+
+            for rule in candidates:
+                if (rule.tag == "*" or element.tag == rule.tag) and rule.test(element):
+                    # A nested anchor's matches are already covered by the
+                    # enclosing one ("//a//text()" returns each node once)
+                    if not any(a in claimed[rule] for a in element.iterancestors()):
+                        found[rule.field].append(element)
+                    claimed[rule].add(element)
+        return found
+
+    def extract(self, root):
+        """
+        {field: value} for an lxml root (e.g. `response.selector.root`).
+        """
+        start = time.perf_counter()
+        anchors = self._collect_anchors(root)
+        self.timings["_walk"] += time.perf_counter() - start
+
+        values = {}
+        for rule in self.rules:
+            start = time.perf_counter()
+            if rule.anchored:
+                results = [r for anchor in anchors[rule.field] for r in rule.tail(anchor)]
+            else:
+                results = rule.path(root)
+            values[rule.field] = rule.value(results)
+            self.timings[rule.field] += time.perf_counter() - start
+        self.calls += 1
+        return values
+
+    def profile(self):
+        """
+        Mean milliseconds per page for the anchor walk ("_walk") and each field.
+        """
+        if not self.calls:
+            return {}
+        return {field: round(seconds * 1000 / self.calls, 4) for field, seconds in self.timings.items()}
@@ -17,4 +17,5 @@ class FacultyItem(scrapy.Item):
     specialization = scrapy.Field()
     teaching = scrapy.Field()
     publications = scrapy.Field()
-    research = scrapy.Field()
\ No newline at end of file
+    research = scrapy.Field()
+    faculty_type = scrapy.Field()  # Listing the profile was linked from
\ No newline at end of file
@@ -4,10 +4,15 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from faculty_scraper.crawl_state import CrawlStateStore, fingerprint
+from faculty_scraper.replay import CrawlArchive
+from store import untyped_profiles
+
 
 class FacultyScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -98,3 +103,156 @@ class FacultyScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ConditionalRequestMiddleware:
+    """
+    Incremental re-crawl of profile pages (requests carrying a
+    "profile_url" meta key).
+
+    Sends If-None-Match / If-Modified-Since from the last crawl and drops
+    the request on 304, or when the returned body hashes to what was seen
+    last time, so unchanged pages are never parsed. Set CRAWL_STATE_FORCE
+    to re-parse everything.
+
+    Profiles stored without a faculty_type (`backfill`) are always parsed
+    when their listing gives one, so rows from before the column existed
+    get their category on the next crawl.
+    """
+
+    def __init__(self, store, stats, force=False, backfill=()):
+        self.store = store
+        self.stats = stats
+        self.force = force
+        self.backfill = set(backfill)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("CRAWL_STATE_ENABLED", True):
+            raise NotConfigured
+        return cls(
+            CrawlStateStore.from_crawler(crawler),
+            crawler.stats,
+            crawler.settings.getbool("CRAWL_STATE_FORCE"),
+            untyped_profiles(crawler.settings.get("FACULTY_DB", "faculty_data.db"))
+        )
+
+    def _forced(self, request):
+        if self.force:
+            return True
+        return request.meta.get("profile_url") in self.backfill and bool(request.meta.get("faculty_type"))
+
+    def process_request(self, request, spider):
+        profile_url = request.meta.get("profile_url")
+        if not profile_url or self._forced(request):
+            return None
+
+        state = self.store.get(profile_url)
+        if state:
+            if state.get("etag"):
+                request.headers.setdefault("If-None-Match", state["etag"])
+            if state.get("last_modified"):
+                request.headers.setdefault("If-Modified-Since", state["last_modified"])
+        return None
+
+    def process_response(self, request, response, spider):
+        profile_url = request.meta.get("profile_url")
+        if not profile_url:
+            return response
+
+        forced = self._forced(request)
+        if forced and not self.force:
+            self.stats.inc_value("crawl_state/faculty_type_backfill")
+        if response.status == 304:
+            self.stats.inc_value("crawl_state/not_modified")
+            raise IgnoreRequest(f"Not modified: {profile_url}")
+        if response.status != 200:
+            return response
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        body_hash = fingerprint(response.body)
+        self.store.stage(
+            profile_url,
+            etag=etag.decode("latin-1") if etag else None,
+            last_modified=last_modified.decode("latin-1") if last_modified else None,
+            body_hash=body_hash
+        )
+
+        state = self.store.get(profile_url)
+        if not forced and state and state.get("body_hash") == body_hash:
+            # Same content under new validators: remember them, skip parsing
+            self.store.commit(profile_url)
+            self.stats.inc_value("crawl_state/unchanged_body")
+            raise IgnoreRequest(f"Unchanged body: {profile_url}")
+        return response
+
+
+class ArchiveRecorderMiddleware:
+    """
+    Record mode (REPLAY_RECORD=True): stores every raw response, before
+    decompression and redirect handling, in the REPLAY_ARCHIVE SQLite file
+    served by `python -m faculty_scraper.replay`.
+    """
+
+    def __init__(self, archive, stats):
+        self.archive = archive
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("REPLAY_RECORD") or settings.get("REPLAY_PROXY"):
+            raise NotConfigured
+        middleware = cls(CrawlArchive(settings.get("REPLAY_ARCHIVE", "crawl_archive.db")), crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, values in response.headers.items()
+            for value in values
+        ]
+        self.archive.record(request.url, response.status, headers, response.body)
+        self.stats.inc_value("replay/recorded")
+        return response
+
+    def spider_closed(self, spider):
+        self.archive.close()
+
+
+class ReplayMiddleware:
+    """
+    Replay mode (REPLAY_PROXY=http://host:port): sends every request through
+    the local fixture server instead of the network. https:// URLs are
+    fetched as http:// (the fixture server cannot terminate TLS) and the
+    response gets its original URL back, so spiders and items see the same
+    URLs as in a live crawl.
+    """
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        proxy = crawler.settings.get("REPLAY_PROXY")
+        if not proxy:
+            raise NotConfigured
+        return cls(proxy)
+
+    def process_request(self, request, spider):
+        if request.meta.get("proxy") == self.proxy:
+            return None
+        meta = {**request.meta, "proxy": self.proxy}
+        if request.url.startswith("https://"):
+            meta["replay_url"] = request.url
+            return request.replace(url="http://" + request.url[len("https://"):], meta=meta, dont_filter=True)
+        request.meta.update(meta)
+        return None
+
+    def process_response(self, request, response, spider):
+        original = request.meta.get("replay_url")
+        if original and response.url == request.url:
+            return response.replace(url=original)
+        return response
@@ -0,0 +1,179 @@
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Headers that describe the original connection, not the archived page
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "proxy-connection"}
+
+
+def archive_key(url):
+    """
+    Pages are archived without their scheme: a replayed https:// page is
+    fetched as http:// through the fixture server.
+    """
+    parts = urlsplit(url)
+    return parts._replace(scheme="", fragment="").geturl().lstrip("/")
+
+
+class CrawlArchive:
+    """
+    Raw HTTP responses of a crawl (status, headers, undecoded body), one row
+    per URL, in a SQLite file.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                recorded_at REAL
+            )
+        ''')
+
+    def record(self, url, status, headers, body):
+        """
+        `headers` is a list of (name, value) string pairs.
+        """
+        self.conn.execute('''
+            INSERT INTO pages (url, status, headers, body, recorded_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                status = excluded.status, headers = excluded.headers,
+                body = excluded.body, recorded_at = excluded.recorded_at
+        ''', (archive_key(url), status, json.dumps(headers), body, time.time()))
+
+    def load(self):
+        """
+        {key: (status, headers, body)} for every archived page.
+        """
+        return {
+            url: (status, json.loads(headers), body)
+            for url, status, headers, body in self.conn.execute(
+                "SELECT url, status, headers, body FROM pages"
+            )
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves an archive as a plain-HTTP forward proxy: a GET for any archived
+    absolute URL returns the recorded response, anything else is a 404.
+
+    Every response waits latency_ms (+/- jitter_ms), and a failure_rate
+    share of requests fails with a 503 (failure_mode="status") or a dropped
+    connection ("reset"). A fixed seed makes runs repeatable.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, pages, latency_ms=0, jitter_ms=0,
+                 failure_rate=0.0, failure_mode="status", seed=0):
+        super().__init__(address, FixtureHandler)
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "failures": 0}
+
+    def draw(self):
+        # (delay in seconds, fail?) for one request
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self.rng.random() < self.failure_rate
+        return max(delay, 0) / 1000, fail
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        delay, fail = server.draw()
+        time.sleep(delay)
+
+        if fail:
+            server.count("failures")
+            if server.failure_mode == "reset":
+                self.close_connection = True
+                self.connection.close()
+                return
+            self._send(503, [("Content-Type", "text/plain")], b"Injected failure")
+            return
+
+        # Proxy requests carry the absolute URL; direct ones only a path
+        url = self.path if "://" in self.path else f"http://{self.headers.get('Host', '')}{self.path}"
+        page = server.pages.get(archive_key(url))
+        if page is None:
+            server.count("misses")
+            self._send(404, [("Content-Type", "text/plain")], b"Not in archive")
+            return
+
+        server.count("hits")
+        status, headers, body = page
+        self._send(status, headers, body)
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() not in HOP_HEADERS:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(archive_path, host="127.0.0.1", port=8899, **options):
+    archive = CrawlArchive(archive_path)
+    pages = archive.load()
+    archive.close()
+
+    server = FixtureServer((host, port), pages, **options)
+    print(f"🗄️  Replaying {len(pages)} archived pages on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {server.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a recorded crawl archive as a local HTTP proxy.")
+    parser.add_argument("--archive", default="crawl_archive.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=["status", "reset"], default="status")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    serve(
+        args.archive, args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate, failure_mode=args.failure_mode, seed=args.seed
+    )
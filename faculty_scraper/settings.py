@@ -22,7 +22,11 @@ ADDONS = {}
 ROBOTSTXT_OBEY = True
 
 # Concurrency and throttling settings
-#CONCURRENT_REQUESTS = 16
+# CONCURRENT_REQUESTS is the global cap across all institutions. Each
+# institution crawls in its own download slot, configured from the
+# download_delay/concurrency of its entry in institutions.json; the two
+# values below are the defaults for entries that omit them.
+CONCURRENT_REQUESTS = 32
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 DOWNLOAD_DELAY = 1
 
@@ -46,21 +50,55 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "faculty_scraper.middlewares.FacultyScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "faculty_scraper.middlewares.ReplayMiddleware": 50,
+    "faculty_scraper.middlewares.ConditionalRequestMiddleware": 543,
+    "faculty_scraper.middlewares.ArchiveRecorderMiddleware": 950,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "faculty_scraper.extensions.CrawlMetrics": 500,
+}
+
+# Prometheus-style crawl metrics (pages/sec, download, parse and DB write
+# latency), rewritten every METRICS_INTERVAL seconds for a node_exporter
+# textfile collector. METRICS_TRACE_FILE saves timed spans as a Chrome
+# trace (chrome://tracing, Perfetto), e.g. -s METRICS_TRACE_FILE=logs/crawl_trace.json
+METRICS_ENABLED = True
+METRICS_FILE = "logs/crawl_metrics.prom"
+METRICS_INTERVAL = 60
+METRICS_TRACE_FILE = None
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    'faculty_scraper.pipelines.FacultySqlitePipeline': 300,
-#}
+ITEM_PIPELINES = {
+    "faculty_scraper.pipelines.ChangedItemPipeline": 100,
+    "faculty_scraper.pipelines.FacultySqlitePipeline": 300,
+}
+
+# Items are transformed and upserted into FACULTY_DB while the crawl runs,
+# SQLITE_BATCH_SIZE rows per transaction
+FACULTY_DB = "faculty_data.db"
+SQLITE_BATCH_SIZE = 200
+
+# Incremental re-crawl: conditional requests + content fingerprints per
+# profile_url, kept in the crawl_state table. Run with
+# -s CRAWL_STATE_FORCE=True to re-parse and re-emit every profile.
+CRAWL_STATE_ENABLED = True
+CRAWL_STATE_DB = "faculty_data.db"
+CRAWL_STATE_FORCE = False
+
+# Offline record/replay. Record raw responses into REPLAY_ARCHIVE with
+#   scrapy crawl faculty -s REPLAY_RECORD=True
+# then serve them (with optional latency/failure injection) through
+#   python -m faculty_scraper.replay --latency-ms 50 --failure-rate 0.01
+# and crawl against that server with
+#   scrapy crawl faculty -s REPLAY_PROXY=http://127.0.0.1:8899 -s CRAWL_STATE_ENABLED=False
+REPLAY_ARCHIVE = "crawl_archive.db"
+REPLAY_RECORD = False
+REPLAY_PROXY = None
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
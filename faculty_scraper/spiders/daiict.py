@@ -1,51 +1,128 @@
+import json
+from pathlib import Path
+
 import scrapy
+from faculty_scraper.extensions import PARSE_SECONDS
+from faculty_scraper.extractor import ProfileExtractor
 from faculty_scraper.items import FacultyItem
+from filters import listing_type
+from metrics import span
+
+# Per-institution start URLs, selector profiles and politeness settings
+INSTITUTIONS_FILE = Path(__file__).resolve().parent.parent / "institutions.json"
+
+
+def load_institutions(path=INSTITUTIONS_FILE, only=None):
+    """
+    Reads the institution profiles. `only` is an optional comma-separated
+    list of institution names to crawl.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        institutions = json.load(f)["institutions"]
+
+    if only:
+        wanted = {name.strip() for name in only.split(",")}
+        institutions = [inst for inst in institutions if inst["name"] in wanted]
+    if not institutions:
+        raise ValueError(f"No institutions selected from {path}")
+    return institutions
+
 
 class FacultySpider(scrapy.Spider):
+    """
+    Crawls every institution listed in institutions.json at once.
+
+    Each institution gets its own download slot, so politeness
+    (delay/concurrency) is enforced per site while CONCURRENT_REQUESTS
+    caps the total across sites. Usage:
+
+        scrapy crawl faculty -a institutions=path/to/file.json -a only=daiict
+    """
+
     name = "faculty"
-    allowed_domains = ["daiict.ac.in"]
-    
-    start_urls = [
-        "https://www.daiict.ac.in/faculty",
-        "https://www.daiict.ac.in/adjunct-faculty",
-        "https://www.daiict.ac.in/adjunct-faculty-international",
-        "https://www.daiict.ac.in/distinguished-professor",
-        "https://www.daiict.ac.in/professor-practice"
-    ]
-
-    def clean_list(self, values):
-        """Helper to remove empty strings and whitespace from list of strings"""
-        return [v.strip() for v in values if v and v.strip()]
+
+    def __init__(self, institutions=None, only=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.institutions = {
+            inst["name"]: inst
+            for inst in load_institutions(institutions or INSTITUTIONS_FILE, only)
+        }
+        self.allowed_domains = sorted({
+            domain
+            for inst in self.institutions.values()
+            for domain in inst["allowed_domains"]
+        })
+        # Profile selectors are compiled once per institution
+        self.extractors = {
+            name: ProfileExtractor(inst["profile"])
+            for name, inst in self.institutions.items()
+        }
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+
+        # One download slot per institution with its own delay/concurrency.
+        # Replayed crawls hit the local fixture server, so the site's
+        # politeness limits give way to DOWNLOAD_DELAY and
+        # CONCURRENT_REQUESTS_PER_DOMAIN, which can then be tuned freely.
+        replay = bool(crawler.settings.get("REPLAY_PROXY"))
+        slots = dict(crawler.settings.getdict("DOWNLOAD_SLOTS"))
+        for name, inst in spider.institutions.items():
+            delay = crawler.settings.getfloat("DOWNLOAD_DELAY")
+            concurrency = crawler.settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+            slots.setdefault(name, {
+                "delay": delay if replay else inst.get("download_delay", delay),
+                "concurrency": concurrency if replay else inst.get("concurrency", concurrency),
+            })
+        crawler.settings.set("DOWNLOAD_SLOTS", slots, priority="spider")
+        return spider
+
+    async def start(self):
+        # Interleave institutions so every slot has work from the first second
+        queues = [
+            [(name, url) for url in inst["start_urls"]]
+            for name, inst in self.institutions.items()
+        ]
+        while any(queues):
+            for queue in queues:
+                if queue:
+                    name, url = queue.pop(0)
+                    # The listing a profile is linked from gives its category
+                    yield scrapy.Request(url, callback=self.parse, meta=self._meta(
+                        name, faculty_type=listing_type(url)
+                    ))
+
+    def _meta(self, institution, **extra):
+        return {"institution": institution, "download_slot": institution, **extra}
+
+    def select(self, selector, spec):
+        if "css" in spec:
+            return selector.css(spec["css"])
+        return selector.xpath(spec["xpath"])
 
     def parse(self, response):
         """
         Parse the main faculty listing pages
         """
+        institution = response.meta["institution"]
+        listing = self.institutions[institution]["listing"]
+
         # Select the list items containing faculty info
-        faculty_cards = response.css("div.facultyInformation ul li")
-
-        for faculty in faculty_cards:
-            # Combined selector to handle different class name variations on the site
-            profile_link = faculty.css(
-                "div.personalDetails h3 a::attr(href), "
-                "div.personalDetail h3 a::attr(href), "
-                "div.personalsDetails h3 a::attr(href)"
-            ).get()
-
-            name = faculty.css(
-                "div.personalDetails h3 a::text, "
-                "div.personalDetail h3 a::text, "
-                "div.personalsDetails h3 a::text"
-            ).get()
+        for faculty in self.select(response, listing["faculty_cards"]):
+            profile_link = self.select(faculty, listing["profile_link"]).get()
+            name = self.select(faculty, listing["name"]).get()
 
             if profile_link:
                 yield response.follow(
                     profile_link,
                     callback=self.parse_faculty_profile,
-                    meta={
-                        "name": name.strip() if name else "Unknown", 
-                        "profile_url": response.urljoin(profile_link)
-                    }
+                    meta=self._meta(
+                        institution,
+                        name=name.strip() if name else "Unknown",
+                        profile_url=response.urljoin(profile_link),
+                        faculty_type=response.meta.get("faculty_type")
+                    )
                 )
 
     def parse_faculty_profile(self, response):
@@ -56,60 +133,18 @@ class FacultySpider(scrapy.Spider):
 
         item["name"] = response.meta.get("name")
         item["profile_url"] = response.meta.get("profile_url")
+        item["faculty_type"] = response.meta.get("faculty_type")
 
-        # -------- LEFT SIDE --------
-        # Education: Join multiple degrees with a pipe |
-        edu_raw = response.css(
-            "div.contact-box-p.pb0.EducationIcon div.detail div.field-content div.field.field--name-field-faculty-name.field--type-string.field--label-hidden.field__item::text"
-        ).getall()
-        item["education"] = " | ".join(self.clean_list(edu_raw))
-
-        item["email"] = response.css(
-            "div.contact-box-p.emailIcon div.field__item::text"
-        ).get()
-
-        item["phone"] = response.css(
-            "div.contact-box-p.pb0.mobileIcon div.detail div.field-content div.field.field--name-field-contact-no.field--type-string.field--label-hidden.field__item::text"
-        ).get()
-
-        item["address"] = response.css(
-            "div.contact-box-p.pb0.addressIcon div.detail div.field-content div.field.field--name-field-address.field--type-string-long.field--label-hidden.field__item::text"
-        ).get()
-
-        item['faculty_web'] = response.css(
-            "div.contact-box-p.facultyweb a::attr(href)"
-        ).get()
-
-        # -------- RIGHT SIDE --------
-        # Biography: Join paragraphs with newlines
-        bio_raw = response.css("div.about p::text").getall()
-        item["biography"] = "\n".join(self.clean_list(bio_raw))
-
-        # Specialization: Join with commas
-        spec_raw = response.xpath("//div[@class='work-exp margin-bottom-20']//text()").getall()
-        item["specialization"] = ", ".join(self.clean_list(spec_raw))
-
-        # Teaching: Join with newlines
-        teach_raw = response.xpath(
-            "//div[contains(@class,'work-exp') "
-            "and not(contains(@class,'margin-bottom-20')) "
-            "and not(contains(@class,'work-exp1'))]"
-            "//text()"
-        ).getall()
-        item["teaching"] = "\n".join(self.clean_list(teach_raw))
-
-        # Publications: Processes list into a single string with newlines
-        pub_list = [
-            " ".join(self.clean_list(li.xpath(".//text()").getall()))
-            for li in response.xpath(
-                "//div[contains(@class,'education') and contains(@class,'overflowContent')]//ul/li | "
-                "//div[contains(@class,'education') and contains(@class,'overflowContent')]//ol/li"
-            )
-        ]
-        item["publications"] = "\n".join(self.clean_list(pub_list))
+        institution = response.meta["institution"]
+        with span("parse_profile", PARSE_SECONDS, "crawl", institution=institution):
+            values = self.extractors[institution].extract(response.selector.root)
+        for field, value in values.items():
+            item[field] = value
 
-        # Research: Join with newlines
-        res_raw = response.xpath("//div[@class='work-exp1']//text()").getall()
-        item["research"] = "\n".join(self.clean_list(res_raw))
+        yield item
 
-        yield item
\ No newline at end of file
+    def closed(self, reason):
+        # Mean parse cost per profile page, per field, in the crawl stats
+        for name, extractor in self.extractors.items():
+            for field, ms in extractor.profile().items():
+                self.crawler.stats.set_value(f"extractor/{name}/{field}_ms", ms)
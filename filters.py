@@ -0,0 +1,107 @@
+import posixpath
+import re
+
+import numpy as np
+
+# Structured search filters: faculty_type (listing category, e.g. "Adjunct
+# Faculty"; several may be given comma-separated), education (keywords that
+# must all appear in the education field) and has_email (True/False)
+FILTER_FIELDS = ("faculty_type", "education", "has_email")
+
+
+def faculty_type_label(text):
+    """
+    Canonical faculty category: "adjunct-faculty" and "ADJUNCT faculty"
+    both become "Adjunct Faculty".
+    """
+    words = [word for word in re.split(r"[\s_-]+", text or "") if word]
+    return " ".join(word.capitalize() for word in words) or None
+
+
+def listing_type(url):
+    """
+    Faculty category of a listing page, from the last segment of its URL
+    (".../adjunct-faculty-international" -> "Adjunct Faculty International").
+    """
+    segment = url.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+    return faculty_type_label(posixpath.splitext(segment)[0])
+
+
+def normalize_filters(filters):
+    """
+    Drops unset filters and normalizes the rest, so equal filters compare
+    (and cache) equal. Returns a dict with a subset of FILTER_FIELDS.
+    """
+    filters = filters or {}
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    normalized = {}
+    types = filters.get("faculty_type")
+    if types:
+        if isinstance(types, str):
+            types = types.split(",")
+        labels = sorted({faculty_type_label(t) for t in types} - {None})
+        if labels:
+            normalized["faculty_type"] = labels
+    education = filters.get("education") or ""
+    if not isinstance(education, str):
+        education = " ".join(education)
+    words = re.findall(r"\w+", education.lower())
+    if words:
+        normalized["education"] = sorted(set(words))
+    if filters.get("has_email") is not None:
+        normalized["has_email"] = bool(filters["has_email"])
+    return normalized
+
+
+def filter_clause(filters):
+    """
+    (WHERE clause, params) selecting the faculty rows that pass `filters`
+    (normalized), or None when nothing is filtered. Each condition is served
+    by an index: idx_faculty_type, the faculty_fts education column and
+    idx_faculty_email.
+    """
+    clauses, params = [], []
+    if "faculty_type" in filters:
+        marks = ", ".join("?" for _ in filters["faculty_type"])
+        clauses.append(f"faculty_type COLLATE NOCASE IN ({marks})")
+        params.extend(filters["faculty_type"])
+    if "education" in filters:
+        # Quoted words, so user input is never parsed as FTS5 syntax
+        words = " ".join(f'"{word}"' for word in filters["education"])
+        clauses.append("id IN (SELECT rowid FROM faculty_fts WHERE faculty_fts MATCH ?)")
+        params.append(f"education : ({words})")
+    if "has_email" in filters:
+        # "> ''" (rather than "!= ''") can range-scan the NOCASE email index
+        clauses.append(
+            "email COLLATE NOCASE > ''" if filters["has_email"] else "(email IS NULL OR email = '')"
+        )
+    if not clauses:
+        return None
+    return " AND ".join(clauses), params
+
+
+def matching_ids(conn, filters):
+    """
+    Sorted ids of the faculty rows that pass `filters` (normalized), or
+    None when nothing is filtered.
+    """
+    clause = filter_clause(filters)
+    if clause is None:
+        return None
+    where, params = clause
+    # Sorted here: ORDER BY id would make SQLite scan the table instead
+    ids = [row[0] for row in conn.execute(f"SELECT id FROM faculty WHERE {where}", params)]
+    return np.sort(np.array(ids, dtype=np.int64))
+
+
+def faculty_types(conn):
+    """
+    [(faculty_type, count)] of every category in the table.
+    """
+    return [tuple(row) for row in conn.execute(
+        "SELECT faculty_type, COUNT(*) FROM faculty WHERE faculty_type IS NOT NULL "
+        "GROUP BY faculty_type COLLATE NOCASE ORDER BY faculty_type COLLATE NOCASE"
+    )]
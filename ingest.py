@@ -0,0 +1,259 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+
+from db import DB_PATH
+from store import create_table, upsert_faculty
+from transform import transform_records
+
+# Lines per batch: one parse task and one upsert transaction
+BATCH_SIZE = 2000
+
+# Batches a worker pool may hold at once, per worker; bounds memory
+IN_FLIGHT_PER_WORKER = 2
+
+# Bytes read from the feed at a time, and bytes at its start that are
+# hashed to recognize the same file on resume
+READ_SIZE = 1 << 20
+HEAD_BYTES = 4096
+
+
+def _zstd_decompressor():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Reading .zst feeds requires the 'zstandard' package") from None
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def iter_feed_bytes(path, offset=0):
+    """
+    Decompressed bytes of a feed from `offset` on: plain, .gz, or .zst/.zstd
+    when the optional `zstandard` package is installed.
+
+    Plain files seek to `offset`. Compressed streams cannot seek, so their
+    first `offset` bytes are decompressed and skipped. A compressed stream
+    that ends early (a feed still being written) stops at the last byte
+    that decompressed instead of failing.
+    """
+    with open(path, 'rb') as f:
+        chunks = iter(partial(f.read, READ_SIZE), b'')
+        if not path.endswith(('.gz', '.zst', '.zstd')):
+            f.seek(offset)
+            yield from chunks
+            return
+
+        gz = path.endswith('.gz')
+        decompressor = zlib.decompressobj(wbits=31) if gz else _zstd_decompressor()
+        skip = offset
+        for chunk in chunks:
+            while chunk:
+                data = decompressor.decompress(chunk)
+                chunk = b''
+                # Concatenated gzip members (e.g. an appended feed)
+                if gz and decompressor.eof:
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+                if skip:
+                    cut = min(skip, len(data))
+                    data, skip = data[cut:], skip - cut
+                if data:
+                    yield data
+
+
+def iter_line_batches(path, offset=0, batch_size=BATCH_SIZE):
+    """
+    Yields (end_offset, [line, ...]) batches of raw JSON Lines starting at
+    `offset`. Offsets count bytes of the decompressed stream, so a batch's
+    end_offset is where a resumed run starts reading.
+
+    A last line without its newline is only read when it is complete JSON;
+    otherwise a writer is still appending it, so the offset stops before it
+    and the next run reads it whole.
+    """
+    position = offset
+    pending = b''
+    batch = []
+    for data in iter_feed_bytes(path, offset):
+        lines = (pending + data).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            position += len(line) + 1
+            if line.strip():
+                batch.append(line)
+            if len(batch) >= batch_size:
+                yield position, batch
+                batch = []
+    if pending.strip():
+        try:
+            json.loads(pending)
+        except ValueError:
+            pass
+        else:
+            position += len(pending)
+            batch.append(pending)
+    if batch:
+        yield position, batch
+
+
+def feed_identity(path, head_bytes=HEAD_BYTES):
+    """
+    (file id, bytes hashed, size) of a feed: the file id combines the inode
+    with a hash of its first `head_bytes` raw bytes, so a replaced or
+    rewritten feed gets another id while an appended one keeps it.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        head = f.read(head_bytes)
+    file_id = f"{stat.st_dev}:{stat.st_ino}:{hashlib.sha1(head).hexdigest()}"
+    return file_id, len(head), stat.st_size
+
+
+def parse_batch(lines):
+    """
+    JSON-decodes and cleans one batch of lines. Runs in worker processes.
+    """
+    return transform_records(json.loads(line) for line in lines)
+
+
+def iter_parsed_batches(batches, workers=1):
+    """
+    Parses batches in order, fanned out over a process pool when
+    workers > 1. At most workers * IN_FLIGHT_PER_WORKER batches are pending.
+    """
+    if workers <= 1:
+        for end_offset, lines in batches:
+            yield end_offset, parse_batch(lines)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for end_offset, lines in batches:
+            pending.append((end_offset, pool.submit(parse_batch, lines)))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                end, future = pending.popleft()
+                yield end, future.result()
+        while pending:
+            end, future = pending.popleft()
+            yield end, future.result()
+
+
+def create_ingest_state(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            feed TEXT PRIMARY KEY,
+            byte_offset INTEGER NOT NULL,
+            records INTEGER NOT NULL,
+            updated_at TEXT,
+            file_id TEXT,
+            head_bytes INTEGER,
+            file_size INTEGER
+        )
+    ''')
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(ingest_state)")}
+    for column, definition in (('file_id', 'TEXT'), ('head_bytes', 'INTEGER'), ('file_size', 'INTEGER')):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE ingest_state ADD COLUMN {column} {definition}")
+
+
+def resume_offset(conn, feed):
+    """
+    Stored byte offset of `feed`, or 0 when there is none or the file on
+    disk is no longer the one it was recorded for (other file id, or
+    smaller than it was).
+    """
+    state = conn.execute(
+        "SELECT byte_offset, file_id, head_bytes, file_size FROM ingest_state WHERE feed = ?", (feed,)
+    ).fetchone()
+    if not state or not state[0]:
+        return 0
+    offset, file_id, head_bytes, file_size = state
+    if file_id is None or feed_identity(feed, head_bytes)[0] != file_id or os.path.getsize(feed) < file_size:
+        print(f"🔄 {feed} changed since the last run; reading it from the start")
+        conn.execute("DELETE FROM ingest_state WHERE feed = ?", (feed,))
+        return 0
+    return offset
+
+
+def ingest_feed(path, db_path=DB_PATH, batch_size=BATCH_SIZE, workers=1, restart=False):
+    """
+    Streams a JSON Lines feed into the faculty table with constant memory.
+
+    Each batch is upserted in the same transaction that records the feed's
+    byte offset and identity in `ingest_state`, so an interrupted run
+    resumes after the last stored batch (and a replaced feed is read from
+    the start). Returns the totals
+    {"records", "inserted", "updated", "offset"}.
+    """
+    feed = os.path.abspath(path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    totals = {'records': 0, 'inserted': 0, 'updated': 0, 'offset': 0}
+    try:
+        with conn:
+            create_table(conn)
+            create_ingest_state(conn)
+            if restart:
+                conn.execute("DELETE FROM ingest_state WHERE feed = ?", (feed,))
+            offset = resume_offset(conn, feed)
+        if offset:
+            print(f"⏩ Resuming {path} at byte {offset}")
+
+        totals['offset'] = offset
+        batches = iter_line_batches(path, offset, batch_size)
+        for end_offset, rows in iter_parsed_batches(batches, workers):
+            file_id, head_bytes, file_size = feed_identity(feed)
+            with conn:
+                changeset = upsert_faculty(conn, rows)
+                conn.execute('''
+                    INSERT INTO ingest_state (feed, byte_offset, records, updated_at, file_id, head_bytes, file_size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(feed) DO UPDATE SET
+                        byte_offset = excluded.byte_offset,
+                        records = ingest_state.records + excluded.records,
+                        updated_at = excluded.updated_at,
+                        file_id = excluded.file_id,
+                        head_bytes = excluded.head_bytes,
+                        file_size = excluded.file_size
+                ''', (feed, end_offset, len(rows), datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                      file_id, head_bytes, file_size))
+
+            totals['records'] += len(rows)
+            totals['inserted'] += len(changeset['inserted'])
+            totals['updated'] += len(changeset['updated'])
+            totals['offset'] = end_offset
+    finally:
+        conn.close()
+
+    print(
+        f"✅ Ingested {totals['records']} records from {path}: "
+        f"{totals['inserted']} inserted, {totals['updated']} updated."
+    )
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a JSON Lines crawl feed into SQLite.")
+    parser.add_argument("feed", nargs="?", default="faculty_data.jsonl",
+                        help="JSON Lines feed (.jsonl, .jsonl.gz or .jsonl.zst)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes that parse and clean batches in parallel")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the stored offset and read the feed from the start")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.feed):
+        print(f"❌ Error: '{args.feed}' not found!")
+    else:
+        ingest_feed(args.feed, args.db, args.batch_size, args.workers, args.restart)
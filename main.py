@@ -1,38 +1,410 @@
-from fastapi import FastAPI
-import sqlite3
+import json
+import os
+import re
+import threading
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-def get_db_connection():
-    # Connects to your persistent relational database
-    conn = sqlite3.connect('faculty_data.db')
-    # This allows us to access data by column name (e.g., row['name'])
-    conn.row_factory = sqlite3.Row  
-    return conn
+from db import DB_PATH, ReadOnlyConnectionPool
+from filters import faculty_types
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from search_engine import DEFAULT_TOP_K, FacultySearchEngine
+from store import schema_outdated
+
+# Read-only connections shared by all requests (created at startup)
+pool = None
+
+# /all is served from a pre-serialized body until the DB's data_version moves
+_all_cache = {"version": None, "body": None}
+_all_lock = threading.Lock()
+
+# Build the search engine in the background at startup instead of on the
+# first /search request (FACULTY_SEARCH_WARMUP=0 disables)
+SEARCH_WARMUP = os.environ.get("FACULTY_SEARCH_WARMUP", "1") != "0"
+
+# Set at startup when the database predates the current schema: the
+# endpoints that need the migrated tables answer 503 until it is migrated
+_schema = {"outdated": False}
+SCHEMA_MESSAGE = "predates the current schema; run `python store.py --migrate`"
+
+# Rows per page fetched while streaming, and the page size cap for /all
+STREAM_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+@asynccontextmanager
+async def lifespan(app):
+    global pool
+    pool = ReadOnlyConnectionPool(DB_PATH)
+    # The API never migrates: the schema (and WAL mode) is set up by the
+    # writers or by `python store.py --migrate`. A cold search engine does
+    # write its own embedding tables and snapshot; `python snapshot.py`
+    # (or build_index.py) builds them ahead of time.
+    _schema["outdated"] = _schema_outdated()
+    if _schema["outdated"]:
+        print(f"⚠️ {DB_PATH} {SCHEMA_MESSAGE} for /search/text, /publications and the search filters.")
+    if SEARCH_WARMUP:
+        threading.Thread(target=_warm_search_engine, name="search-warmup", daemon=True).start()
+    yield
+    if _engine is not None:
+        _engine.save_query_cache()
+        _engine.result_cache.close()
+    pool.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+# Search engine state, refreshed from engine.metrics() on every scrape
+ENGINE_GAUGE = REGISTRY.gauge(
+    "faculty_search_engine", "Search engine index and query cache figures", ["metric"]
+)
+
+def _schema_outdated():
+    with pool.connection() as conn:
+        return schema_outdated(conn)
+
+async def require_current_schema():
+    """
+    503 for endpoints that need the migrated tables (full-text index,
+    publications, faculty_type) while the database predates them. Checked
+    again on every such request, so a migration takes effect without a
+    restart.
+    """
+    if _schema["outdated"]:
+        _schema["outdated"] = await run_in_threadpool(_schema_outdated)
+        if _schema["outdated"]:
+            raise HTTPException(status_code=503, detail=f"{DB_PATH} {SCHEMA_MESSAGE}")
 
 @app.get("/")
-def home():
+async def home():
     return {"message": "Welcome to the Faculty API. Use /all to see data."}
 
+def _fetch_all_body(version):
+    with _all_lock:
+        # Another request may have refreshed the cache while we waited
+        if _all_cache["version"] == version:
+            return _all_cache["body"]
+
+        with pool.connection() as conn:
+            # Query the 'faculty' table you created and stored data in
+            rows = conn.execute("SELECT * FROM faculty").fetchall()
+
+        # Convert relational database rows into a standard JSON list
+        data = [dict(row) for row in rows]
+        body = json.dumps({"count": len(data), "faculty": data}).encode("utf-8")
+
+        _all_cache.update(version=version, body=body)
+        return body
+
+def _all_body():
+    # data_version() waits on the watcher lock, so it runs off the event loop
+    version = pool.data_version()
+    if _all_cache["version"] == version:
+        return _all_cache["body"]
+    return _fetch_all_body(version)
+
+def _faculty_columns():
+    with pool.connection() as conn:
+        return [row["name"] for row in conn.execute("PRAGMA table_info(faculty)")]
+
+def _select_columns(fields):
+    """
+    Validates ?fields= against the real columns (never interpolates user
+    input into SQL). "id" is always included since it is the page cursor.
+    """
+    columns = _faculty_columns()
+    if not fields:
+        return columns
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+def _fetch_rows(columns, after_id, limit):
+    """
+    Up to `limit` faculty rows after `after_id`, in id order (keyset
+    pagination). The connection goes back to the pool before returning.
+    """
+    sql = f"SELECT {', '.join(columns)} FROM faculty WHERE id > ? ORDER BY id LIMIT ?"
+    with pool.connection() as conn:
+        return [dict(row) for row in conn.execute(sql, (after_id or 0, limit))]
+
+def _fetch_page(columns, after_id, limit):
+    """
+    One /all page serialized to JSON bytes here, like the cached full body,
+    instead of going through FastAPI's per-dict encoding.
+    """
+    # One extra row tells whether another page follows
+    data = _fetch_rows(columns, after_id, limit + 1)
+    more = len(data) > limit
+    data = data[:limit]
+    next_after_id = data[-1]["id"] if more else None
+    return json.dumps(
+        {"count": len(data), "limit": limit, "next_after_id": next_after_id, "faculty": data}
+    ).encode("utf-8")
+
+async def _ndjson_lines(columns, after_id, limit):
+    """
+    Streams rows in STREAM_BATCH_SIZE pages, each fetched in the threadpool
+    on a connection that is released before the page is sent, so a slow or
+    vanished client never holds one.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = STREAM_BATCH_SIZE if remaining is None else min(STREAM_BATCH_SIZE, remaining)
+        rows = await run_in_threadpool(_fetch_rows, columns, after_id, size)
+        if not rows:
+            break
+        yield b"".join(json.dumps(row).encode("utf-8") + b"\n" for row in rows)
+        if len(rows) < size:
+            break
+        after_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+
 @app.get("/all")
-def get_all_faculty():
+async def get_all_faculty(
+    after_id: int | None = Query(None, ge=0),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
     """
     Serving: Fetches and returns all cleaned faculty data as JSON.
+
+    ?after_id=&limit= pages by id and ?fields=name,email projects columns;
+    both return pages of at most `limit` (default MAX_PAGE_SIZE) rows with
+    the `next_after_id` of the next page, or null on the last one.
+    ?format=ndjson streams every row (or `limit` rows), one JSON object per
+    line.
+    """
+    if format == "ndjson":
+        columns = await run_in_threadpool(_select_columns, fields)
+        return StreamingResponse(
+            _ndjson_lines(columns, after_id, limit),
+            media_type="application/x-ndjson"
+        )
+
+    if after_id is not None or limit is not None or fields:
+        columns = await run_in_threadpool(_select_columns, fields)
+        body = await run_in_threadpool(_fetch_page, columns, after_id, limit or MAX_PAGE_SIZE)
+        return Response(content=body, media_type="application/json")
+
+    body = await run_in_threadpool(_all_body)
+    return Response(content=body, media_type="application/json")
+
+def _fetch_by_email(email):
+    with pool.connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM faculty WHERE email = ? COLLATE NOCASE", (email.strip(),)
+        ).fetchone()
+    return dict(row) if row else None
+
+@app.get("/faculty/by-email")
+async def get_faculty_by_email(email: str):
+    """
+    Serving: One faculty member by email (indexed, case-insensitive).
+    """
+    faculty = await run_in_threadpool(_fetch_by_email, email)
+    if faculty is None:
+        raise HTTPException(status_code=404, detail="Faculty not found")
+    return faculty
+
+def _fetch_faculty(faculty_id):
+    with pool.connection() as conn:
+        row = conn.execute("SELECT * FROM faculty WHERE id = ?", (faculty_id,)).fetchone()
+    return dict(row) if row else None
+
+@app.get("/faculty/{faculty_id}")
+async def get_faculty(faculty_id: int):
+    """
+    Serving: One faculty member by primary key.
+    """
+    faculty = await run_in_threadpool(_fetch_faculty, faculty_id)
+    if faculty is None:
+        raise HTTPException(status_code=404, detail="Faculty not found")
+    return faculty
+
+def _fetch_publications(since, until, doi, faculty_id, after_id, limit):
+    clauses = ["p.id > ?"]
+    params = [after_id or 0]
+    if since is not None:
+        clauses.append("p.year >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("p.year <= ?")
+        params.append(until)
+    if doi:
+        clauses.append("p.doi = ?")
+        params.append(doi.strip().lower())
+    if faculty_id is not None:
+        clauses.append("p.faculty_id = ?")
+        params.append(faculty_id)
+    # One extra row tells whether another page follows
+    params.append(limit + 1)
+
+    with pool.connection() as conn:
+        rows = conn.execute(f'''
+            SELECT p.id, p.faculty_id, f.name AS faculty_name, p.year, p.venue,
+                   p.doi, p.title, p.citation
+            FROM publications p
+            JOIN faculty f ON f.id = p.faculty_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY p.id
+            LIMIT ?
+        ''', params).fetchall()
+    data = [dict(row) for row in rows[:limit]]
+    next_after_id = data[-1]["id"] if len(rows) > limit else None
+    return {"count": len(data), "limit": limit, "next_after_id": next_after_id, "publications": data}
+
+@app.get("/publications", dependencies=[Depends(require_current_schema)])
+async def get_publications(
+    since: int | None = None,
+    until: int | None = None,
+    doi: str | None = None,
+    faculty_id: int | None = None,
+    after_id: int | None = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Serving: Individual publications filtered by year range, DOI or faculty
+    (indexed), paged by id.
+    """
+    return await run_in_threadpool(_fetch_publications, since, until, doi, faculty_id, after_id, limit)
+
+def _fts_query(text):
+    # Quote every word so user input can never be parsed as FTS5 syntax
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+def _text_search(q, limit):
+    match = _fts_query(q)
+    if not match:
+        return []
+    with pool.connection() as conn:
+        rows = conn.execute('''
+            SELECT f.id, f.name, f.email, f.specialization, f.profile_url,
+                   bm25(faculty_fts) AS rank,
+                   snippet(faculty_fts, -1, '[', ']', '...', 12) AS snippet
+            FROM faculty_fts
+            JOIN faculty f ON f.id = faculty_fts.rowid
+            WHERE faculty_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        ''', (match, limit)).fetchall()
+    return [dict(row) for row in rows]
+
+@app.get("/search/text", dependencies=[Depends(require_current_schema)])
+async def search_text(q: str, limit: int = Query(20, ge=1, le=200)):
+    """
+    Serving: Keyword search over biography, specialization, teaching,
+    publications, research and education through the FTS5 index (all words
+    must match).
+    """
+    results = await run_in_threadpool(_text_search, q, limit)
+    return {"query": q, "count": len(results), "results": results}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_search_engine():
+    # One warm index per process, built on the first search request
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FacultySearchEngine()
+        return _engine
+
+def _warm_search_engine():
+    try:
+        get_search_engine()
+    except Exception as e:
+        # /search retries (and reports the error) on its first request
+        print(f"⚠️ Search engine warm-up failed: {e}")
+
+@app.get("/search")
+async def search_faculty(
+    q: str,
+    k: int = Query(DEFAULT_TOP_K, ge=1, le=50),
+    faculty_type: str | None = None,
+    education: str | None = None,
+    has_email: bool | None = None,
+):
+    """
+    Serving: Semantic search over research/specialization using the shared engine.
+
+    ?faculty_type=Adjunct Faculty (comma-separated for several),
+    ?education=phd usa (all words, in the education field) and
+    ?has_email=true restrict the rows that are scored.
+    """
+    filters = {"faculty_type": faculty_type, "education": education, "has_email": has_email}
+    if any(value is not None for value in filters.values()):
+        await require_current_schema()
+    hits = await run_in_threadpool(lambda: get_search_engine().search(q, k, filters))
+    return {
+        "query": q,
+        "filters": {name: value for name, value in filters.items() if value is not None},
+        "count": len(hits),
+        "results": [{"score": hit["score"], **hit["faculty"]} for hit in hits]
+    }
+
+def _fetch_faculty_types():
+    with pool.connection() as conn:
+        return [{"faculty_type": name, "count": count} for name, count in faculty_types(conn)]
+
+@app.get("/search/filters", dependencies=[Depends(require_current_schema)])
+async def search_filters():
+    """
+    Values accepted by the /search filters: every faculty_type with its count.
+    """
+    return {"faculty_type": await run_in_threadpool(_fetch_faculty_types)}
+
+@app.get("/search/stats")
+async def search_stats():
+    """
+    Query and result cache hit rates, micro-batch sizes and vector backend
+    build stats.
+    """
+    return await run_in_threadpool(lambda: get_search_engine().metrics())
+
+def _engine_gauges():
+    if _engine is None:
+        return
+    stats = _engine.metrics()
+    cache, batcher, results = stats["query_cache"], stats["batcher"], stats["result_cache"]
+    figures = {
+        "rows": stats["rows"],
+        "query_cache_size": cache["size"],
+        "query_cache_hits": cache["hits"],
+        "query_cache_misses": cache["misses"],
+        "result_cache_size": results["size"],
+        "result_cache_bytes": results["bytes"],
+        "result_cache_hits": results["hits"] + results["disk_hits"],
+        "result_cache_misses": results["misses"],
+        "encode_batches": batcher["batches"],
+        "encode_batch_items": batcher["items"],
+    }
+    if stats["chunks"] is not None:
+        figures["chunks"] = stats["chunks"]["chunks"]
+        figures["chunk_bytes"] = stats["chunks"]["bytes"]
+    if stats["db_writes_since_load"] is not None:
+        figures["db_writes_since_load"] = stats["db_writes_since_load"]
+    for name, value in figures.items():
+        ENGINE_GAUGE.set(value, metric=name)
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text format: request counts and latency per route, model
+    encode time and per-stage search latency.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Query the 'faculty' table you created and stored data in
-    cursor.execute("SELECT * FROM faculty")
-    rows = cursor.fetchall()
-    
-    # Convert relational database rows into a standard JSON list
-    data = [dict(row) for row in rows]
-    
-    conn.close()
-    return {"count": len(data), "faculty": data}
+    _engine_gauges()
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
     # Starts the local development server
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,307 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond lookups to slow encodes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Trace events kept in memory; the oldest are dropped past this
+TRACE_MAX_EVENTS = 200_000
+
+# Chrome trace file written at exit when set (open in chrome://tracing or Perfetto)
+TRACE_FILE = os.environ.get("FACULTY_TRACE")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    # repr keeps full precision (":g" would round large counters)
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+# --------------------------------------------------
+# Metric types
+# --------------------------------------------------
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram, rendered as _bucket/_sum/_count series.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [('le', le)])} {cumulative}")
+        labels = _label_text(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Named metrics of one process, rendered in the Prometheus text format.
+    Asking for an existing name returns the registered metric.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **options)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Writes the current values to a file (node_exporter textfile format).
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+
+# --------------------------------------------------
+# Tracing
+# --------------------------------------------------
+class TraceRecorder:
+    """
+    Collects timed spans as Chrome trace events ("X" complete events with
+    thread ids), for flame-graph views in chrome://tracing or Perfetto.
+    Recording is off until `enable()`.
+    """
+
+    def __init__(self, max_events=TRACE_MAX_EVENTS):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+
+    def enable(self):
+        self.enabled = True
+
+    def record(self, name, start, duration, category="app", args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        # deque.append is atomic, so threads need no lock here
+        self.events.append(event)
+
+    def dump(self, path):
+        events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+TRACER = TraceRecorder()
+
+if TRACE_FILE:
+    TRACER.enable()
+    atexit.register(TRACER.dump, TRACE_FILE)
+
+
+@contextmanager
+def span(name, histogram=None, category="app", **labels):
+    """
+    Times a block: observes `histogram` (with `labels`) and, while tracing
+    is enabled, records a trace event named `name`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(duration, **labels)
+        if TRACER.enabled:
+            TRACER.record(name, start, duration, category, labels or None)
+
+
+# --------------------------------------------------
+# Shared metrics
+# --------------------------------------------------
+ENCODE_SECONDS = REGISTRY.histogram(
+    "faculty_encode_seconds", "Time spent in model.encode per call", ["kind"]
+)
+ENCODE_TEXTS = REGISTRY.counter(
+    "faculty_encode_texts_total", "Texts passed to model.encode", ["kind"]
+)
+SEARCH_SECONDS = REGISTRY.histogram(
+    "faculty_search_seconds", "Time per search stage for one query", ["stage"]
+)
+SEARCH_QUERIES = REGISTRY.counter(
+    "faculty_search_queries_total", "Queries ranked by the search engine"
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "faculty_http_requests_total", "HTTP requests served", ["method", "route", "status"]
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "faculty_http_request_seconds", "HTTP request latency until the last body byte", ["method", "route"]
+)
+
+
+def timed_encode(model, texts, kind, **options):
+    """
+    model.encode(texts, **options), observed under faculty_encode_seconds.
+    """
+    ENCODE_TEXTS.inc(len(texts), kind=kind)
+    with span("encode", ENCODE_SECONDS, "search", kind=kind):
+        return model.encode(texts, **options)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording a request counter and latency histogram per
+    route template ("/faculty/{faculty_id}", not every id). Timing ends with
+    the last body chunk, so streamed responses are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=path, status=status)
+            HTTP_SECONDS.observe(duration, method=method, route=path)
+            if TRACER.enabled:
+                TRACER.record(f"{method} {path}", start, duration, "http", {"status": status})
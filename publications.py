@@ -0,0 +1,194 @@
+import hashlib
+import re
+
+MISSING = "Data is not available"
+
+DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"“”<>]+)", re.IGNORECASE)
+URL_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+YEAR_RE = re.compile(r"(?<!\d)(19[5-9]\d|20\d\d)(?!\d)")
+QUOTED_RE = re.compile(r"[\"“”](.{8,}?)[\"“”]")
+VENUE_WORDS = re.compile(
+    r"journal|conference|transactions|proceedings|letters|symposium|workshop|review|magazine|"
+    r"\bieee\b|\bacm\b|springer|elsevier",
+    re.IGNORECASE
+)
+# Where a venue name stops: volume/issue/page markers, a year, a bracket
+VENUE_END_RE = re.compile(
+    r",|\(|\bvol\b|\bvolume\b|\bno\b\.?|\bpp\b|\bisbn\b|\bissn\b|\bdoi\b|\s\d",
+    re.IGNORECASE
+)
+
+
+def split_publications(text):
+    """
+    The scraper joins one publication per line.
+    """
+    if not text or text == MISSING:
+        return []
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+def parse_citation(citation):
+    """
+    Best-effort parse of one free-form citation into
+    {"title", "venue", "year", "doi"}; fields that cannot be found are None.
+    """
+    # "https://doi.org /10.1007/..." -> "https://doi.org/10.1007/..."
+    normalized = re.sub(r"doi\.org\s*/\s*", "doi.org/", citation, flags=re.IGNORECASE)
+
+    doi = None
+    match = DOI_RE.search(normalized)
+    if match:
+        doi = match.group(1).rstrip(".,;)]").lower()
+
+    # Years inside URLs/DOIs are not publication years
+    plain = URL_RE.sub(" ", normalized)
+    plain = DOI_RE.sub(" ", plain)
+    years = [int(y) for y in YEAR_RE.findall(plain)]
+    year = years[-1] if years else None
+
+    title = None
+    venue = None
+    quoted = QUOTED_RE.search(plain)
+    if quoted:
+        title = quoted.group(1).strip(" ,.")
+        venue = _venue_from(plain[quoted.end():])
+    else:
+        # Unquoted "Authors, Title, Venue, vol..." style: pick the first
+        # comma-separated part that looks like a venue
+        for part in plain.split(",")[1:]:
+            if VENUE_WORDS.search(part):
+                venue = _venue_from(part)
+                break
+
+    return {"title": title or None, "venue": venue or None, "year": year, "doi": doi}
+
+
+def _venue_from(text):
+    # Drop leftover punctuation/quote bytes, then "in", "In:", "Proc. of the"
+    text = re.sub(r"^\W+", "", text)
+    text = re.sub(r"^(in\b:?\s*)?(proc(eedings)?\b\.?\s*(of\s+)?(the\s+)?)?", "", text, flags=re.IGNORECASE)
+    end = VENUE_END_RE.search(text)
+    venue = text[:end.start()] if end else text
+    venue = venue.strip(" ,.:;")
+    return venue if len(venue) >= 3 else None
+
+
+def citation_hash(citation):
+    """
+    Natural key of a citation within one faculty member's list: case and
+    spacing edits keep the key (and the row id).
+    """
+    return hashlib.sha1(" ".join(citation.lower().split()).encode("utf-8")).hexdigest()
+
+
+PUBLICATIONS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        faculty_id INTEGER NOT NULL REFERENCES faculty(id) ON DELETE CASCADE,
+        citation_hash TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        citation TEXT NOT NULL,
+        title TEXT,
+        venue TEXT,
+        year INTEGER,
+        doi TEXT,
+        UNIQUE (faculty_id, citation_hash)
+    )
+'''
+
+
+def create_publications_table(conn):
+    """
+    One row per publication of a faculty member, with parsed citation fields.
+    Children are removed with their faculty row by a trigger.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(publications)")}
+    if columns and "citation_hash" not in columns:
+        _migrate_publications(conn)
+
+    conn.execute(PUBLICATIONS_SCHEMA.format(table="publications"))
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_publications_year ON publications(year)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_publications_doi ON publications(doi)")
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS faculty_publications_delete AFTER DELETE ON faculty BEGIN
+            DELETE FROM publications WHERE faculty_id = old.id;
+        END
+    ''')
+
+    if not columns:
+        ids = [row[0] for row in conn.execute("SELECT id FROM faculty")]
+        sync_publications(conn, ids)
+
+
+def _migrate_publications(conn):
+    # Tables keyed by (faculty_id, position) are rebuilt with the natural
+    # key, keeping their ids (repeated citations keep the first row)
+    conn.create_function("citation_hash", 1, citation_hash, deterministic=True)
+    conn.execute(PUBLICATIONS_SCHEMA.format(table="publications_new"))
+    conn.execute('''
+        INSERT OR IGNORE INTO publications_new
+            (id, faculty_id, citation_hash, position, citation, title, venue, year, doi)
+        SELECT id, faculty_id, citation_hash(citation), position, citation, title, venue, year, doi
+        FROM publications ORDER BY faculty_id, position
+    ''')
+    # The trigger names the old table; create_publications_table recreates it
+    conn.execute("DROP TRIGGER IF EXISTS faculty_publications_delete")
+    conn.execute("DROP TABLE publications")
+    conn.execute("ALTER TABLE publications_new RENAME TO publications")
+
+
+def sync_publications(conn, faculty_ids):
+    """
+    Re-derives the publications rows of the given faculty ids from their
+    publications text. Rows are upserted on (faculty_id, citation_hash), so
+    a citation keeps its id while it stays in the list; only citations that
+    disappeared are deleted and only new or edited ones are parsed.
+    The caller owns the transaction.
+    """
+    for start in range(0, len(faculty_ids), 500):
+        chunk = faculty_ids[start:start + 500]
+        marks = ", ".join("?" for _ in chunk)
+        stored = {
+            (faculty_id, digest): (pub_id, position, citation)
+            for pub_id, faculty_id, digest, position, citation in conn.execute(
+                f"SELECT id, faculty_id, citation_hash, position, citation FROM publications "
+                f"WHERE faculty_id IN ({marks})", chunk
+            )
+        }
+
+        keep = set()
+        rows = []
+        for faculty_id, text in conn.execute(
+            f"SELECT id, publications FROM faculty WHERE id IN ({marks})", chunk
+        ):
+            position = 0
+            for citation in split_publications(text):
+                key = (faculty_id, citation_hash(citation))
+                if key in keep:
+                    continue
+                keep.add(key)
+                previous = stored.get(key)
+                if previous is None or previous[1:] != (position, citation):
+                    parsed = parse_citation(citation)
+                    rows.append((
+                        faculty_id, key[1], position, citation,
+                        parsed["title"], parsed["venue"], parsed["year"], parsed["doi"]
+                    ))
+                position += 1
+
+        conn.executemany(
+            "DELETE FROM publications WHERE id = ?",
+            [(pub_id,) for key, (pub_id, _, _) in stored.items() if key not in keep]
+        )
+        conn.executemany('''
+            INSERT INTO publications (faculty_id, citation_hash, position, citation, title, venue, year, doi)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(faculty_id, citation_hash) DO UPDATE SET
+                position = excluded.position,
+                citation = excluded.citation,
+                title = excluded.title,
+                venue = excluded.venue,
+                year = excluded.year,
+                doi = excluded.doi
+        ''', rows)
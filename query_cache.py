@@ -0,0 +1,336 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_query(query):
+    """
+    Cache key for a query. MiniLM is uncased, so case and spacing do not
+    change the embedding.
+    """
+    return " ".join((query or "").lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache of normalized query -> embedding with a TTL.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if self.ttl_seconds is None or self.clock() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, query, vector):
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (vector, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """
+        (normalized query, embedding) pairs that have not expired, oldest first.
+        """
+        now = self.clock()
+        with self._lock:
+            return [
+                (key, vector) for key, (vector, stored_at) in self._entries.items()
+                if self.ttl_seconds is None or now - stored_at < self.ttl_seconds
+            ]
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Memory estimate of a cached search result: per entry (plus its key) and per
+# (index, score, rrf, field) hit, as measured with tracemalloc
+RESULT_ENTRY_BYTES = 200
+RESULT_HIT_BYTES = 160
+
+
+def result_key(version, query, k, filters):
+    """
+    Cache key of one search: index version, normalized query, k and the
+    normalized filters. The version comes first, so keys of an older index
+    never match.
+    """
+    return f"{version}\x1f{normalize_query(query)}\x1f{k}\x1f{json.dumps(filters, sort_keys=True)}"
+
+
+class SearchResultCache:
+    """
+    Thread-safe LRU cache of search results, bounded by an estimate of the
+    memory they take, with an optional SQLite tier on disk that is shared
+    by processes and survives restarts.
+
+    Results are lists of (row index, score, rrf, field) tuples. max_bytes=0
+    keeps nothing in memory.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20, path=None, max_disk_entries=100000):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._disk_writes = 0
+        if path:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            with self._disk:
+                self._disk.execute('''
+                    CREATE TABLE IF NOT EXISTS search_results (
+                        key TEXT PRIMARY KEY,
+                        results TEXT NOT NULL,
+                        stored_at REAL NOT NULL
+                    )
+                ''')
+                self._disk.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_search_results_stored_at ON search_results(stored_at)"
+                )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return results
+
+        results = self._disk_get(key)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, results)
+        return results
+
+    def put(self, key, results):
+        results = [tuple(hit) for hit in results]
+        self._remember(key, results)
+        self._disk_put(key, results)
+
+    def retain(self, version):
+        """
+        Drops the in-memory results of every other index version.
+        """
+        prefix = f"{version}\x1f"
+        with self._lock:
+            for key in [key for key in self._entries if not key.startswith(prefix)]:
+                self.bytes -= self._size(key, self._entries.pop(key))
+
+    def _size(self, key, results):
+        return RESULT_ENTRY_BYTES + len(key) + RESULT_HIT_BYTES * len(results)
+
+    def _remember(self, key, results):
+        size = self._size(key, results)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= self._size(key, previous)
+            self._entries[key] = results
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key, old_results = self._entries.popitem(last=False)
+                self.bytes -= self._size(old_key, old_results)
+                self.evictions += 1
+
+    def _disk_get(self, key):
+        with self._disk_lock:
+            if self._disk is None:
+                return None
+            try:
+                row = self._disk.execute("SELECT results FROM search_results WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError:
+                # Another process holds the database lock; the memory tier still works
+                return None
+        return [tuple(hit) for hit in json.loads(row[0])] if row else None
+
+    def _disk_put(self, key, results):
+        with self._disk_lock:
+            if self._disk is None:
+                return
+            try:
+                self._disk_write(key, results)
+            except sqlite3.OperationalError:
+                pass
+
+    def _disk_write(self, key, results):
+        with self._disk:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO search_results (key, results, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(results), time.time())
+            )
+            self._disk_writes += 1
+            # Trim to the newest max_disk_entries now and then
+            if self._disk_writes % 1000 == 0:
+                self._disk.execute('''
+                    DELETE FROM search_results WHERE key IN (
+                        SELECT key FROM search_results ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_disk_entries,))
+
+    def close(self):
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def metrics(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk": self.path,
+        }
+
+
+class MicroBatcher:
+    """
+    Collects encode requests from concurrent callers for up to `max_wait_ms`
+    and runs them through `encode_fn` as one batch.
+
+    encode_fn takes a list of strings and returns one vector per string.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, max_wait_ms=5):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+        self._worker = threading.Thread(target=self._run, name="query-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, texts):
+        """
+        Blocking helper: submits every text and waits for all of them.
+        """
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+
+            # Wait a few milliseconds for more callers to join this batch
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # Identical queries in one batch are encoded once
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(unique, self.encode_fn(unique)))
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def metrics(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,423 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from bm25 import BM25Index, reciprocal_rank_fusion
+from chunk_index import load_chunk_index
+from config import (
+    CHUNK_INDEX, ENCODER_BACKEND, PRELOAD_MODEL, RESULT_CACHE_DISK, RESULT_CACHE_MB, SNAPSHOT, VECTOR_BACKEND
+)
+from db import DB_PATH, ReadOnlyConnectionPool
+from embeddings import MODEL_NAME, load_index, profile_text, read_faculty
+from encoders import LazyModel
+from filters import matching_ids, normalize_filters
+from metrics import SEARCH_QUERIES, SEARCH_SECONDS, span, timed_encode
+from query_cache import MicroBatcher, QueryEmbeddingCache, SearchResultCache, result_key
+from snapshot import (
+    corpus_fingerprint, load_batch_size, load_query_cache, load_snapshot, save_batch_size,
+    save_query_cache, snapshot_path, write_snapshot
+)
+from store import write_version
+from vector_backends import make_backend
+
+# Shared defaults for every front end (CLI, Streamlit, FastAPI)
+DEFAULT_TOP_K = 5
+MIN_SCORE = 0.30
+
+# Hybrid retrieval: how many candidates each side contributes to the fusion,
+# and from which corpus size the BM25 pass prefilters the dense rerank
+SPARSE_DEPTH = 200
+DENSE_DEPTH = 50
+PREFILTER_MIN_ROWS = 5000
+# Nearest chunks an approximate backend returns before they are reduced to
+# faculty rows
+CHUNK_DEPTH = 500
+# Keyword hits kept below min_score: the top KEYWORD_RANK BM25 matches and
+# rows whose name holds every query word. A query equal to a name ranks
+# that profile first with score 1.0.
+KEYWORD_RANK = 10
+
+# Query embedding cache and micro-batching of concurrent query encodes
+QUERY_CACHE_SIZE = 10000
+QUERY_CACHE_TTL = 24 * 3600
+BATCH_MAX_SIZE = 32
+BATCH_MAX_WAIT_MS = 5
+
+# Row masks of recent filter combinations, reused until the database changes
+FILTER_CACHE_SIZE = 16
+
+
+def name_key(text):
+    """
+    Lowercased words of a name or query: "Dr. Abhishek  Gupta" and
+    "dr abhishek gupta" both become ("dr", "abhishek", "gupta").
+    """
+    return tuple(re.findall(r"\w+", (text or "").lower()))
+
+
+class FacultySearchEngine:
+    """
+    Loads the faculty rows once and keeps their embeddings in one contiguous
+    float32 matrix, so a query costs one encode plus a matrix product.
+
+    Results fuse the dense ranking with a BM25 keyword ranking through
+    reciprocal-rank fusion, so names and acronyms ("VLSI") match literally.
+
+    With a chunk index the dense score of a faculty member is the best
+    match over the profile text, windows of biography/research/teaching and
+    each publication, instead of the single truncated profile vector.
+
+    Matrices are memory-mapped from the warm-start snapshot when it matches
+    the database, and the model is only needed to encode queries, so it
+    loads lazily (see PRELOAD_MODEL).
+
+    Structured filters (see filters.py) are resolved through the SQLite
+    indexes into a boolean mask over the rows before any scoring; only the
+    rows that pass are scored, so filtered queries cost less.
+
+    Results are cached by query, k, filters and index_version(), which
+    moves with every write to the faculty table, so filters (resolved live
+    in SQLite) never hit a result cached before the write. Rankings come
+    from the rows loaded at startup: rebuild the engine to pick up changed
+    profiles (metrics()["db_writes_since_load"] tells when).
+    """
+
+    def __init__(self, model=None, db_path=DB_PATH, min_score=MIN_SCORE,
+                 backend=VECTOR_BACKEND, backend_options=None, chunk_index=CHUNK_INDEX,
+                 snapshot=SNAPSHOT, preload_model=PRELOAD_MODEL, encoder=ENCODER_BACKEND,
+                 result_cache_mb=RESULT_CACHE_MB, result_cache_disk=RESULT_CACHE_DISK):
+        if model is None:
+            model = LazyModel(MODEL_NAME, encoder)
+            if preload_model:
+                model.start()
+        self.model = model
+        # Vectors are stored and snapshotted per encoder (fp32, int8, onnx)
+        self.model_id = getattr(model, "id", MODEL_NAME)
+        self.min_score = min_score
+        self.snapshot_path = snapshot_path(snapshot, db_path)
+
+        self.rows = read_faculty(db_path)
+        self.ids = np.array([row["id"] for row in self.rows], dtype=np.int64)
+        self.by_name = {}
+        for i, row in enumerate(self.rows):
+            self.by_name.setdefault(name_key(row["name"]), []).append(i)
+        # Read-only connections for resolving filters
+        self.pool = ReadOnlyConnectionPool(db_path, size=4)
+        self._masks = OrderedDict()
+        self._masks_lock = threading.Lock()
+        # A snapshot built from the same rows skips the model, the
+        # embedding tables and BM25 tokenization entirely
+        warm = load_snapshot(self.snapshot_path, self.rows, self.model_id, chunk_index) if self.snapshot_path else None
+        self.warm_start = warm is not None
+        if self.warm_start:
+            matrix, self.chunks, self.bm25 = warm
+        else:
+            # A batch size autotuned by an earlier cold build is reused
+            tuning_key = getattr(model, "tuning_key", None)
+            untuned = bool(tuning_key and self.snapshot_path and not model.batch_size)
+            if untuned:
+                model.batch_size = load_batch_size(self.snapshot_path, tuning_key)
+                untuned = not model.batch_size
+            matrix = load_index(self.model, self.rows, db_path, self.model_id)
+            self.chunks = (
+                load_chunk_index(self.model, self.rows, db_path, chunk_index, self.model_id)
+                if chunk_index != "off" else None
+            )
+            self.bm25 = BM25Index(self.rows)
+            if self.snapshot_path:
+                write_snapshot(self.snapshot_path, self.rows, matrix, self.chunks, self.bm25, self.model_id, chunk_index)
+                if untuned and model.batch_size:
+                    save_batch_size(self.snapshot_path, tuning_key, model.batch_size)
+
+        self.embeddings = np.ascontiguousarray(matrix, dtype=np.float32)
+        # build_stats records build time and, for approximate backends,
+        # recall@k against exact search
+        self.backend = make_backend(backend, **(backend_options or {})).build(self.embeddings)
+        # Approximate backends index the chunk vectors as well; with "exact"
+        # the blocked max-sim over the quantized chunks is the exact search
+        self.chunk_backend = None
+        if self.chunks is not None and len(self.chunks) and self.backend.name != "exact":
+            self.chunk_backend = make_backend(backend, **(backend_options or {})).build(self.chunks.dequantized())
+        self.texts = [
+            profile_text(row["name"], row["research"], row["specialization"])
+            for row in self.rows
+        ]
+
+        self.query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        if self.snapshot_path:
+            load_query_cache(self.snapshot_path, self.query_cache, self.model_id)
+        self.batcher = MicroBatcher(self._encode_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+
+        # Everything that decides the results besides the database contents
+        self._loaded_version = hashlib.sha1(
+            f"{corpus_fingerprint(self.rows, self.model_id, chunk_index)}/{min_score}/{backend}/"
+            f"{sorted((backend_options or {}).items())}/{SPARSE_DEPTH}/{DENSE_DEPTH}/{PREFILTER_MIN_ROWS}/{CHUNK_DEPTH}/{KEYWORD_RANK}".encode()
+        ).hexdigest()
+        self._index_version = None
+        self._data_version = None
+        self._db_version = None
+        with self.pool.connection() as conn:
+            self._loaded_db_version = write_version(conn)
+        self._version_lock = threading.Lock()
+        disk = os.path.splitext(db_path)[0] + "_results.db" if result_cache_disk == "auto" else result_cache_disk
+        self.result_cache = SearchResultCache(
+            int(result_cache_mb * 2**20), None if disk == "off" else disk
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _encode_batch(self, texts):
+        return timed_encode(
+            self.model, texts, "query",
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+    def encode(self, queries):
+        """
+        Query embeddings as an (n, dim) array. Cached queries skip the model;
+        the rest join the micro-batcher so concurrent callers share one
+        model call.
+        """
+        vectors = [self.query_cache.get(query) for query in queries]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self.batcher.encode([queries[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                self.query_cache.put(queries[i], vector)
+                vectors[i] = vector
+        return np.vstack(vectors)
+
+    def save_query_cache(self):
+        """
+        Stores the query cache in the snapshot directory for the next start.
+        """
+        if self.snapshot_path:
+            save_query_cache(self.snapshot_path, self.query_cache, self.model_id)
+
+    def index_version(self):
+        """
+        Identifies the loaded index together with the faculty table's write
+        counter (store.write_version). PRAGMA data_version tells when
+        another connection has written to the database; only then is the
+        counter read again.
+        """
+        data_version = self.pool.data_version()
+        with self._version_lock:
+            if data_version != self._data_version:
+                with self.pool.connection() as conn:
+                    db_version = write_version(conn)
+                # Without the counter (database not migrated) data_version,
+                # which is per connection, keeps keys to this process
+                stored = db_version if db_version is not None else f"{os.getpid()}:{data_version}"
+                self._index_version = hashlib.sha1(f"{self._loaded_version}/{stored}".encode()).hexdigest()[:16]
+                self._data_version = data_version
+                self._db_version = db_version
+                self.result_cache.retain(self._index_version)
+            return self._index_version
+
+    def _writes_since_load(self):
+        self.index_version()
+        if self._db_version is None or self._loaded_db_version is None:
+            return None
+        return self._db_version - self._loaded_db_version
+
+    def metrics(self):
+        return {
+            "rows": len(self.rows),
+            "encoder": self.model_id,
+            "warm_start": self.warm_start,
+            "model_loaded": getattr(self.model, "loaded", True),
+            "model_load_seconds": getattr(self.model, "load_seconds", None),
+            "backend": self.backend.build_stats,
+            "chunks": {
+                "chunks": len(self.chunks),
+                "bytes": self.chunks.nbytes,
+                "backend": self.chunk_backend.build_stats if self.chunk_backend is not None else None,
+            } if self.chunks is not None else None,
+            "query_cache": self.query_cache.metrics(),
+            "result_cache": self.result_cache.metrics(),
+            "db_writes_since_load": self._writes_since_load(),
+            "batcher": self.batcher.metrics(),
+        }
+
+    def filter_mask(self, filters):
+        """
+        Boolean array over self.rows, True for the rows that pass `filters`
+        ({"faculty_type", "education", "has_email"}); None when nothing is
+        filtered.
+        """
+        filters = normalize_filters(filters)
+        if not filters:
+            return None
+
+        key = (self.pool.data_version(), repr(sorted(filters.items())))
+        with self._masks_lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+
+        with self.pool.connection() as conn:
+            ids = matching_ids(conn, filters)
+        mask = np.zeros(len(self.rows), dtype=bool)
+        if len(self.ids) and len(ids):
+            # Rows are in id order: ids map to row positions by binary search,
+            # skipping ids added to the database after the index was loaded
+            positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+            mask[positions[self.ids[positions] == ids]] = True
+
+        with self._masks_lock:
+            self._masks[key] = mask
+            while len(self._masks) > FILTER_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+    def search(self, query, k=DEFAULT_TOP_K, filters=None):
+        """
+        Returns up to k hits as {"index", "score", "rrf", "field", "faculty"}
+        dicts, best first by fused rank. "score" is the cosine similarity and
+        "field" the field of the best matching chunk (None without chunks).
+        """
+        return self.search_batch([query], k, filters)[0]
+
+    def search_batch(self, queries, k=DEFAULT_TOP_K, filters=None):
+        """
+        Encodes all queries in one batch, then ranks each one with the
+        hybrid BM25 + dense scorer over the rows that pass `filters`.
+        Returns one hit list per query.
+        """
+        if not queries or not self.rows:
+            return [[] for _ in queries]
+        k = min(k, len(self.rows))
+        filters = normalize_filters(filters)
+
+        # Cached results skip the filters, the encode and the scoring
+        with span("search.result_cache", SEARCH_SECONDS, "search", stage="result_cache"):
+            version = self.index_version()
+            keys = [result_key(version, query, k, filters) for query in queries]
+            results = [self.result_cache.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if missing:
+            ranked = self._rank([queries[i] for i in missing], k, filters)
+            for i, hits in zip(missing, ranked):
+                results[i] = [(hit["index"], hit["score"], hit["rrf"], hit["field"]) for hit in hits]
+                self.result_cache.put(keys[i], results[i])
+
+        # Fresh dicts every time, so callers cannot alter a cached result
+        return [
+            [{"index": i, "score": score, "rrf": rrf, "field": field, "faculty": self.rows[i]}
+             for i, score, rrf, field in hits]
+            for hits in results
+        ]
+
+    def _rank(self, queries, k, filters):
+        with span("search.filter", SEARCH_SECONDS, "search", stage="filter"):
+            mask = self.filter_mask(filters)
+        if mask is not None and not mask.any():
+            # Nothing passes: no need to encode or score
+            return [[] for _ in queries]
+
+        with span("search.encode", SEARCH_SECONDS, "search", stage="encode"):
+            query_embeddings = self.encode(list(queries))
+        SEARCH_QUERIES.inc(len(queries))
+        return [
+            self._hybrid_search(query, query_embedding, k, mask)
+            for query, query_embedding in zip(queries, query_embeddings)
+        ]
+
+    def _hybrid_search(self, query, query_embedding, k, mask=None):
+        with span("search.bm25", SEARCH_SECONDS, "search", stage="bm25"):
+            sparse = self.bm25.search(query, SPARSE_DEPTH, mask)
+        sparse_ids = [i for i, _ in sparse]
+        with span("search.dense", SEARCH_SECONDS, "search", stage="dense"):
+            dense_scores = self._dense_scores(query_embedding, sparse_ids, mask)
+        with span("search.fuse", SEARCH_SECONDS, "search", stage="fuse"):
+            return self._fuse(query, query_embedding, dense_scores, sparse_ids, k, mask)
+
+    def _dense_scores(self, query_embedding, sparse_ids, mask=None):
+        candidates = np.flatnonzero(mask) if mask is not None else None
+        # Once the corpus (or its filtered part) is large, the cheap sparse
+        # pass picks the shortlist and only those rows are scored against
+        # the query vector
+        if sparse_ids and len(self.rows if candidates is None else candidates) >= PREFILTER_MIN_ROWS:
+            candidates = np.asarray(sparse_ids)
+            dense_scores = dict(zip(sparse_ids, self._score(query_embedding, candidates).tolist()))
+        elif candidates is not None:
+            # Filtered queries score the rows that passed, and nothing else;
+            # past half the corpus one contiguous product beats the gather
+            if 2 * len(candidates) > len(self.rows):
+                scores = self._score_all(query_embedding)[candidates]
+            else:
+                scores = self._score(query_embedding, candidates)
+            depth = min(DENSE_DEPTH, len(scores))
+            keep = np.argpartition(-scores, depth - 1)[:depth]
+            # Sparse hits passed the same filters, so they are candidates too
+            keep = np.union1d(keep, np.searchsorted(candidates, sparse_ids))
+            dense_scores = dict(zip(candidates[keep].tolist(), scores[keep].tolist()))
+        elif self.chunk_backend is not None:
+            # Nearest chunks, reduced to the best one per faculty row; the top
+            # rows and the keyword hits then get their exact max-sim
+            chunk_ids, chunk_scores = self.chunk_backend.search(query_embedding, CHUNK_DEPTH)
+            rows = self.chunks.row_of(chunk_ids)
+            best = np.zeros(0, dtype=np.int64)
+            if len(rows):
+                order = np.argsort(rows, kind="stable")
+                rows, chunk_scores = rows[order], chunk_scores[order]
+                starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+                row_scores = np.maximum.reduceat(chunk_scores, starts)
+                best = rows[starts][np.argsort(-row_scores)[:DENSE_DEPTH]]
+            ids = np.union1d(best, np.asarray(sparse_ids, dtype=np.int64))
+            dense_scores = dict(zip(ids.tolist(), self.chunks.max_sim_rows(query_embedding, ids).tolist()))
+        elif self.chunks is not None:
+            scores = self.chunks.max_sim(query_embedding)
+            depth = min(DENSE_DEPTH, len(scores))
+            best = np.argpartition(-scores, depth - 1)[:depth]
+            dense_scores = {i: float(scores[i]) for i in best.tolist() + sparse_ids}
+        else:
+            best, best_scores = self.backend.search(query_embedding, DENSE_DEPTH)
+            dense_scores = dict(zip(best.tolist(), best_scores.tolist()))
+            missing = [i for i in sparse_ids if i not in dense_scores]
+            if missing:
+                dense_scores.update(zip(missing, self.backend.score(query_embedding, np.asarray(missing)).tolist()))
+        return dense_scores
+
+    def _fuse(self, query, query_embedding, dense_scores, sparse_ids, k, mask=None):
+        dense_ids = sorted(dense_scores, key=dense_scores.get, reverse=True)[:DENSE_DEPTH]
+        fused = reciprocal_rank_fusion([dense_ids, sparse_ids])
+
+        # Strong keyword matches are kept even when the vectors disagree
+        words = set(name_key(query))
+        keyword_hits = set(sparse_ids[:KEYWORD_RANK])
+        keyword_hits.update(i for i in sparse_ids if words and words <= set(name_key(self.rows[i]["name"])))
+        exact = [i for i in self.by_name.get(name_key(query), ()) if words and (mask is None or mask[i])]
+
+        ranked = exact + [i for i in sorted(fused, key=fused.get, reverse=True) if i not in exact]
+        hits = []
+        for i in ranked:
+            if i in exact or dense_scores[i] >= self.min_score or i in keyword_hits:
+                hits.append({
+                    "index": i,
+                    "score": 1.0 if i in exact else dense_scores[i],
+                    "rrf": fused.get(i, 0.0),
+                    "field": self.chunks.best_field(query_embedding, i) if self.chunks is not None else None,
+                    "faculty": self.rows[i]
+                })
+            if len(hits) == k:
+                break
+        return hits
+
+    def _score(self, query_embedding, ids):
+        if self.chunks is not None:
+            return self.chunks.max_sim_rows(query_embedding, ids)
+        return self.backend.score(query_embedding, ids)
+
+    def _score_all(self, query_embedding):
+        if self.chunks is not None:
+            return self.chunks.max_sim(query_embedding)
+        return self.embeddings @ query_embedding
@@ -1,6 +1,8 @@
 import sqlite3
 import os
-from sentence_transformers import SentenceTransformer, util
+
+from embeddings import MODEL_NAME
+from search_engine import FacultySearchEngine
 
 def perform_search():
     # --------------------------------------------------
@@ -13,62 +15,27 @@ def perform_search():
         return
 
     # --------------------------------------------------
-    # 1. Load AI model
-    # --------------------------------------------------
-    print("🚀 Loading AI Model (all-MiniLM-L6-v2)...")
-    # This model is lightweight and excellent for name/topic matching
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-
+    # 1. Load the shared search engine
     # --------------------------------------------------
-    # 2. Connect to database and fetch data
-    # --------------------------------------------------
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
+    # The index is memory-mapped from the warm-start snapshot when the data
+    # is unchanged (otherwise only new or changed profiles are encoded), and
+    # the AI model loads in the background while the first query is typed.
+    print(f"🚀 Loading search index ({MODEL_NAME} embeddings)...")
     try:
-        cursor.execute("SELECT name, research, specialization FROM faculty")
-        rows = cursor.fetchall()
+        engine = FacultySearchEngine(db_path=db_path)
     except sqlite3.OperationalError:
         print("❌ Error: Table 'faculty' does not exist in the database.")
         return
-    finally:
-        conn.close()
 
-    if not rows:
+    if not len(engine):
         print("⚠️ No faculty data found in the database.")
         return
 
-    # --------------------------------------------------
-    # 3. Prepare search corpus (Crucial Change Here)
-    # --------------------------------------------------
-    names = []
-    search_corpus = []
-
-    for name, research, specialization in rows:
-        names.append(name)
-
-        # Handle null values
-        r_text = research if research and "Data is not available" not in research else ""
-        s_text = specialization if specialization and "Data is not available" not in specialization else ""
+    source = "warm-start snapshot" if engine.warm_start else "database"
+    print(f"📊 Index ready for {len(engine)} faculty profiles (from the {source}).")
 
-        # WE ADD THE NAME TO THE TEXT: This allows the AI to "read" the name during search
-        # Format: "Name: Abhishek Gupta. Research: Robotics. Specialization: AI"
-        combined_text = f"Name: {name}. {r_text} {s_text}".strip()
-        
-        search_corpus.append(combined_text if combined_text else f"Name: {name}")
-
-    # --------------------------------------------------
-    # 4. Generate embeddings (The Index)
     # --------------------------------------------------
-    print(f"📊 Indexing {len(search_corpus)} faculty profiles. Please wait...")
-    corpus_embeddings = model.encode(
-        search_corpus,
-        convert_to_tensor=True,
-        show_progress_bar=True
-    )
-
-    # --------------------------------------------------
-    # 5. Interactive search loop
+    # 2. Interactive search loop
     # --------------------------------------------------
     print("\n✅ Semantic Search Engine Ready!")
     print("-----------------------------------------")
@@ -78,6 +45,13 @@ def perform_search():
     print("  • Keywords (e.g., 'who works in VLSI')")
     print("Type 'exit' to quit.")
 
+    try:
+        search_loop(engine)
+    finally:
+        # Queries asked this session are answered without the model next time
+        engine.save_query_cache()
+
+def search_loop(engine):
     while True:
         query = input("\n🔎 Enter search query: ").strip()
 
@@ -87,34 +61,23 @@ def perform_search():
             print("👋 Exiting search engine. Goodbye!")
             break
 
-        # Encode the user's query
-        query_embedding = model.encode(query, convert_to_tensor=True)
-
-        # Perform semantic search
-        hits = util.semantic_search(
-            query_embedding,
-            corpus_embeddings,
-            top_k=3
-        )[0]
+        # Perform semantic search (threshold and top_k are shared defaults)
+        hits = engine.search(query)
 
         print(f"\nResults for: '{query}'")
         print("-" * 30)
 
         found_any = False
         for i, hit in enumerate(hits, start=1):
-            idx = hit["corpus_id"]
+            idx = hit["index"]
             score = hit["score"] * 100  # Convert to percentage
 
-            # Filter out very low-quality matches (Threshold)
-            if score < 35:
-                continue
-            
             found_any = True
-            print(f"{i}. 👤 {names[idx]}")
+            print(f"{i}. 👤 {hit['faculty']['name']}")
             print(f"   📊 Match Confidence: {score:.2f}%")
             
             # Show a snippet of the context found
-            snippet = search_corpus[idx]
+            snippet = engine.texts[idx]
             if len(snippet) > 160:
                 snippet = snippet[:157] + "..."
             print(f"   🔬 Context: {snippet}\n")
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bm25 import FIELD_WEIGHTS, STOPWORDS, TOKEN_RE, BM25Index
+from chunk_index import CHUNK_OVERLAP, CHUNK_WORDS, MAX_CHUNKS_PER_FACULTY, ChunkIndex, chunk_hash
+from config import CHUNK_INDEX
+from db import DB_PATH
+from embeddings import MODEL_NAME, content_hash
+
+# Bumped whenever the file layout changes; older snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+META_FILE = "meta.json"
+CHUNK_ARRAYS = ["chunk_vectors", "chunk_scales", "chunk_fields", "chunk_offsets"]
+BM25_ARRAYS = ["bm25_ids", "bm25_tfs", "bm25_offsets", "bm25_idf", "bm25_norm"]
+BM25_VOCABULARY_FILE = "bm25_vocabulary.json"
+QUERY_CACHE_FILE = "query_cache"
+TUNING_FILE = "encoder_tuning.json"
+
+
+def snapshot_path(setting, db_path=DB_PATH):
+    """
+    Directory of the warm-start snapshot for a FACULTY_SNAPSHOT value:
+    "auto" (next to the database), "off" (None) or an explicit path.
+    """
+    if setting == "off":
+        return None
+    if setting == "auto":
+        return os.path.splitext(db_path)[0] + "_snapshot"
+    return setting
+
+
+def corpus_fingerprint(rows, model_name=MODEL_NAME, chunk_dtype="float16"):
+    """
+    Changes whenever a row, the row order, the model, the chunking or the
+    keyword tokenizer does. Uses the stored content_hash of each row, so no
+    text is re-read.
+    """
+    digest = hashlib.sha1(
+        f"{SNAPSHOT_VERSION}/{model_name}/{chunk_dtype}/"
+        f"{CHUNK_WORDS}/{CHUNK_OVERLAP}/{MAX_CHUNKS_PER_FACULTY}/"
+        f"{sorted(FIELD_WEIGHTS.items())}/{sorted(STOPWORDS)}/{TOKEN_RE.pattern}".encode()
+    )
+    for row in rows:
+        row_digest = row.get("content_hash") or (
+            content_hash(row["name"], row["research"], row["specialization"]) + chunk_hash(row)
+        )
+        digest.update(f"{row['id']}\x1f{row['profile_url']}\x1f{row_digest}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _save_array(path, name, array):
+    # Written beside the old file and swapped in, so a process that still
+    # has the old one memory-mapped keeps reading valid pages
+    target = os.path.join(path, f"{name}.npy")
+    tmp = f"{target}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp, target)
+
+
+def open_array(path, name, dtype, shape):
+    """
+    A writable memory-mapped .npy, filled in place (e.g. shard by shard)
+    and swapped in with commit_array().
+    """
+    return np.lib.format.open_memmap(
+        os.path.join(path, f"{name}.npy.tmp"), mode="w+", dtype=dtype, shape=shape
+    )
+
+
+def commit_array(path, name, array):
+    array.flush()
+    target = os.path.join(path, f"{name}.npy")
+    os.replace(f"{target}.tmp", target)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def begin_snapshot(path):
+    """
+    Prepares `path` for new arrays. Without meta.json the directory reads
+    as "no snapshot" while they are being replaced.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+
+def finish_snapshot(path, rows, bm25, model_name=MODEL_NAME, chunk_dtype="off", dim=0, n_chunks=0):
+    """
+    Saves the BM25 postings and the meta.json that ties the arrays already
+    in `path` to the rows they were built from.
+    """
+    vocabulary, arrays = bm25.to_arrays()
+    for name in BM25_ARRAYS:
+        _save_array(path, name, arrays[name])
+    _write_json(os.path.join(path, BM25_VOCABULARY_FILE), vocabulary)
+
+    _write_json(os.path.join(path, META_FILE), {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": corpus_fingerprint(rows, model_name, chunk_dtype),
+        "model": model_name,
+        "chunk_dtype": chunk_dtype,
+        "rows": len(rows),
+        "dim": dim,
+        "chunks": n_chunks,
+        "bm25": {"k1": bm25.k1, "b": bm25.b, "terms": len(vocabulary)},
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+
+
+def write_snapshot(path, rows, embeddings, chunks, bm25, model_name=MODEL_NAME, chunk_dtype="float16"):
+    """
+    Saves the corpus matrix, chunk index (None when off) and BM25 postings
+    as .npy files plus a meta.json that ties them to the rows they were
+    built from.
+    """
+    begin_snapshot(path)
+    _save_array(path, "embeddings", embeddings)
+    if chunks is not None:
+        for name, array in zip(CHUNK_ARRAYS, (chunks.vectors, chunks.scales, chunks.fields, chunks.offsets)):
+            _save_array(path, name, array)
+    finish_snapshot(
+        path, rows, bm25, model_name,
+        chunk_dtype if chunks is not None else "off",
+        int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        len(chunks) if chunks is not None else 0
+    )
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_snapshot(path, rows, model_name=MODEL_NAME, chunk_dtype="float16"):
+    """
+    (embeddings, chunks, bm25) memory-mapped from `path`, or None when there
+    is no snapshot or it was built from other rows, another model or chunk
+    dtype. chunks is None when chunk_dtype is "off".
+    """
+    meta = read_meta(path)
+    if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    wanted = chunk_dtype if chunk_dtype != "off" else meta["chunk_dtype"]
+    if meta["chunk_dtype"] != wanted or meta["fingerprint"] != corpus_fingerprint(rows, model_name, wanted):
+        return None
+
+    try:
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        chunks = None
+        if chunk_dtype != "off":
+            chunks = ChunkIndex(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in CHUNK_ARRAYS))
+        with open(os.path.join(path, BM25_VOCABULARY_FILE), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in BM25_ARRAYS}
+    except (OSError, ValueError):
+        return None
+    if len(embeddings) != len(rows) or (chunks is not None and len(chunks.offsets) != len(rows) + 1):
+        return None
+    bm25 = BM25Index.from_arrays(vocabulary, arrays, meta["bm25"]["k1"], meta["bm25"]["b"])
+    return embeddings, chunks, bm25
+
+
+# --------------------------------------------------
+# Query embeddings
+# --------------------------------------------------
+def save_query_cache(path, cache, model_name=MODEL_NAME):
+    """
+    Persists the query embedding cache, so repeated queries after a restart
+    are answered without loading the model.
+    """
+    entries = cache.items()
+    if not entries:
+        return
+    os.makedirs(path, exist_ok=True)
+    _save_array(path, QUERY_CACHE_FILE, np.vstack([vector for _, vector in entries]))
+    _write_json(os.path.join(path, f"{QUERY_CACHE_FILE}.json"), {
+        "model": model_name,
+        "queries": [query for query, _ in entries],
+    })
+
+
+def load_query_cache(path, cache, model_name=MODEL_NAME):
+    """
+    Fills `cache` from a saved query cache; returns how many were loaded.
+    """
+    try:
+        with open(os.path.join(path, f"{QUERY_CACHE_FILE}.json"), encoding="utf-8") as f:
+            saved = json.load(f)
+        vectors = np.load(os.path.join(path, f"{QUERY_CACHE_FILE}.npy"))
+    except (OSError, ValueError):
+        return 0
+    if saved.get("model") != model_name or len(vectors) != len(saved["queries"]):
+        return 0
+    for query, vector in zip(saved["queries"], vectors):
+        cache.put(query, vector)
+    return len(saved["queries"])
+
+
+
+# --------------------------------------------------
+# Encoder tuning
+# --------------------------------------------------
+def load_batch_size(path, key):
+    """
+    Encoder batch size autotuned by an earlier build for `key` (see
+    LazyModel.tuning_key), or 0 when there is none.
+    """
+    try:
+        with open(os.path.join(path, TUNING_FILE), encoding="utf-8") as f:
+            return int(json.load(f).get(key, 0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0
+
+
+def save_batch_size(path, key, batch_size):
+    """
+    Records the autotuned batch size for `key`. The file outlives snapshot
+    rebuilds, so autotuning runs once per model and machine.
+    """
+    os.makedirs(path, exist_ok=True)
+    tuning_path = os.path.join(path, TUNING_FILE)
+    try:
+        with open(tuning_path, encoding="utf-8") as f:
+            tuning = json.load(f)
+    except (OSError, ValueError):
+        tuning = {}
+    if not isinstance(tuning, dict):
+        tuning = {}
+    tuning[key] = int(batch_size)
+    _write_json(tuning_path, tuning)
+
+
+if __name__ == "__main__":
+    from search_engine import FacultySearchEngine
+
+    parser = argparse.ArgumentParser(description="Build or refresh the search warm-start snapshot.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--output", default="auto", help="Snapshot directory (default: next to the database)")
+    parser.add_argument("--chunks", default=CHUNK_INDEX, choices=["float16", "int8", "off"])
+    args = parser.parse_args()
+
+    engine = FacultySearchEngine(db_path=args.db, chunk_index=args.chunks, snapshot=args.output, preload_model=False)
+    state = "up to date" if engine.warm_start else "written"
+    print(f"✅ Snapshot {state}: {engine.snapshot_path} ({len(engine)} rows)")
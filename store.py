@@ -1,15 +1,39 @@
+import hashlib
 import sqlite3
-from transform import transform_data
+from datetime import datetime, timezone
+from itertools import islice
 
-def save_to_db(data):
+from db import DB_PATH, enable_wal
+from publications import create_publications_table, sync_publications
+
+# Columns written from a transformed record, in insert order
+FACULTY_COLUMNS = [
+    'name', 'education', 'email', 'phone', 'address', 'faculty_web',
+    'biography', 'specialization', 'teaching', 'publications', 'research',
+    'profile_url', 'faculty_type'
+]
+
+# Text columns covered by the faculty_fts full-text index (education is
+# there for the education keyword filter of the search engine)
+FTS_COLUMNS = ['biography', 'specialization', 'teaching', 'publications', 'research', 'education']
+MISSING = "Data is not available"
+
+# Records upserted per executemany in save_to_db
+SAVE_BATCH_SIZE = 5000
+
+# Change tracking columns maintained by upsert_faculty()
+TRACKING_COLUMNS = {
+    'content_hash': 'TEXT',
+    'version': 'INTEGER NOT NULL DEFAULT 1',
+    'updated_at': 'TEXT',
+}
+
+
+def create_table(conn):
     """
-    Storage: Persists cleaned data in SQLite.
+    Creates the faculty table, and adds columns that older databases lack.
     """
-    # Create connection to the relational DB
-    conn = sqlite3.connect('faculty_data.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS faculty (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
@@ -19,42 +43,321 @@ def save_to_db(data):
             address TEXT,
             biography TEXT,
             specialization TEXT,
-            teaching TEXT,       
-            publications TEXT,   
-            research TEXT,       
-            profile_url TEXT UNIQUE
+            teaching TEXT,
+            publications TEXT,
+            research TEXT,
+            profile_url TEXT UNIQUE,
+            faculty_web TEXT,
+            faculty_type TEXT,
+            content_hash TEXT,
+            version INTEGER NOT NULL DEFAULT 1,
+            updated_at TEXT
+        )
+    ''')
+
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(faculty)")}
+    for column in FACULTY_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE faculty ADD COLUMN {column} TEXT")
+    for column, definition in TRACKING_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE faculty ADD COLUMN {column} {definition}")
+
+    # Lookup indexes for /faculty/by-email, name queries and search filters
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_faculty_name ON faculty(name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_faculty_email ON faculty(email COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_faculty_type ON faculty(faculty_type COLLATE NOCASE)")
+
+    create_fts(conn)
+    create_write_counter(conn)
+    create_publications_table(conn)
+
+
+def create_write_counter(conn):
+    """
+    faculty_meta.version counts writes to the faculty table: triggers bump
+    it on every insert, update and delete, so readers can tell that the
+    table changed from one row instead of rescanning it.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS faculty_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO faculty_meta (key, value) VALUES ('version', 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS faculty_version_{event.lower()} AFTER {event} ON faculty BEGIN
+                UPDATE faculty_meta SET value = value + 1 WHERE key = 'version';
+            END
+        ''')
+
+
+def write_version(conn):
+    """
+    Current faculty_meta.version, or None for a database without the
+    counter (not migrated yet).
+    """
+    try:
+        row = conn.execute("SELECT value FROM faculty_meta WHERE key = 'version'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def create_fts(conn):
+    """
+    FTS5 index over the FTS_COLUMNS, kept in sync by triggers.
+    The "Data is not available" placeholder is indexed as NULL so it never
+    matches keyword queries; for the same reason the index is populated
+    with the NULLIF() expressions below rather than FTS5's 'rebuild'.
+    An index built over other columns is dropped and rebuilt.
+    """
+    indexed = [row[1] for row in conn.execute("PRAGMA table_info(faculty_fts)")]
+    if indexed == FTS_COLUMNS:
+        return
+    if indexed:
+        for trigger in ('faculty_fts_insert', 'faculty_fts_delete', 'faculty_fts_update'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE faculty_fts")
+
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f"NULLIF(new.{c}, '{MISSING}')" for c in FTS_COLUMNS)
+    old_values = ', '.join(f"NULLIF(old.{c}, '{MISSING}')" for c in FTS_COLUMNS)
+
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE faculty_fts USING fts5(
+            {columns},
+            content='faculty', content_rowid='id', tokenize='porter unicode61'
         )
     ''')
+    conn.execute(f'''
+        CREATE TRIGGER faculty_fts_insert AFTER INSERT ON faculty BEGIN
+            INSERT INTO faculty_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER faculty_fts_delete AFTER DELETE ON faculty BEGIN
+            INSERT INTO faculty_fts (faculty_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER faculty_fts_update AFTER UPDATE OF {columns} ON faculty BEGIN
+            INSERT INTO faculty_fts (faculty_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO faculty_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+    # Index the rows that already exist
+    conn.execute(f'''
+        INSERT INTO faculty_fts (rowid, {columns})
+        SELECT id, {', '.join(f"NULLIF({c}, '{MISSING}')" for c in FTS_COLUMNS)} FROM faculty
+    ''')
+
+
+def schema_outdated(conn):
+    """
+    True when the database predates the current schema (missing faculty
+    columns, a full-text index over other columns or no write counter).
+    Read-only front ends use it to ask for `python store.py --migrate`
+    instead of migrating.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(faculty)")}
+    indexed = [row[1] for row in conn.execute("PRAGMA table_info(faculty_fts)")]
+    return (
+        not set(FACULTY_COLUMNS) | set(TRACKING_COLUMNS) <= existing
+        or indexed != FTS_COLUMNS
+        or write_version(conn) is None
+    )
 
-    # Efficient SQL storage
-    for entry in data:
-        cursor.execute('''
-            INSERT OR IGNORE INTO faculty (
-                name, education, email, phone, address, 
-                biography, specialization, teaching, 
-                publications, research, profile_url
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-
-            entry.get('name'), 
-            entry.get('education'), 
-            entry.get('email'),
-            entry.get('phone'), 
-            entry.get('address'), 
-            entry.get('biography'),
-            entry.get('specialization'), 
-            entry.get('teaching'),     
-            entry.get('publications'), 
-            entry.get('research'),     
-            entry.get('profile_url')
-        ))
-
-    conn.commit()
-    conn.close()
-    print("Clean dataset with academic details saved to faculty_data.db successfully.")
+
+def init_db(db_path=DB_PATH):
+    """
+    Creates or migrates the schema (tables, indexes, full-text index).
+    This is the explicit migrate step (`python store.py --migrate`); the
+    writers (save_to_db, the scraper pipeline, ingest.py) run create_table
+    themselves, and the search front ends never migrate (a cold search
+    engine only adds its own embedding tables). Also switches the database
+    to WAL mode, so readers never wait on a writer.
+    """
+    enable_wal(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            create_table(conn)
+    finally:
+        conn.close()
+
+
+def row_hash(row):
+    """
+    Fingerprint of every stored field of a cleaned record.
+    """
+    digest = hashlib.sha1()
+    for column in FACULTY_COLUMNS:
+        digest.update((row.get(column) or '').encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def _select_by_url(conn, column, urls, chunk_size=500):
+    """
+    {profile_url: column} for the given urls, queried in chunks.
+    """
+    found = {}
+    for start in range(0, len(urls), chunk_size):
+        chunk = urls[start:start + chunk_size]
+        marks = ', '.join('?' for _ in chunk)
+        found.update(conn.execute(
+            f"SELECT profile_url, {column} FROM faculty WHERE profile_url IN ({marks})", chunk
+        ).fetchall())
+    return found
+
+
+def upsert_faculty(conn, rows):
+    """
+    Inserts new profiles and updates changed ones (keyed by profile_url),
+    bumping `version` and `updated_at`; unchanged rows are not written.
+    Rows without a profile_url cannot be keyed and are skipped.
+    The caller owns the transaction.
+
+    Returns {"inserted": [...], "updated": [...]} lists of profile_urls.
+    """
+    rows = [row for row in rows if row.get('profile_url')]
+    # The last record wins when a batch repeats a profile_url
+    rows = list({row['profile_url']: row for row in rows}.values())
+    hashes = [row_hash(row) for row in rows]
+    stored = _select_by_url(conn, 'content_hash', [row['profile_url'] for row in rows])
+
+    changeset = {'inserted': [], 'updated': []}
+    changed = []
+    for row, digest in zip(rows, hashes):
+        url = row['profile_url']
+        if url not in stored:
+            changeset['inserted'].append(url)
+        elif stored[url] != digest:
+            changeset['updated'].append(url)
+        else:
+            continue
+        changed.append((row, digest))
+
+    if not changed:
+        return changeset
+
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    columns = ', '.join(FACULTY_COLUMNS + ['content_hash', 'updated_at'])
+    placeholders = ', '.join('?' for _ in range(len(FACULTY_COLUMNS) + 2))
+    updates = ', '.join(f"{c} = excluded.{c}" for c in FACULTY_COLUMNS if c != 'profile_url')
+
+    conn.executemany(f'''
+        INSERT INTO faculty ({columns}) VALUES ({placeholders})
+        ON CONFLICT(profile_url) DO UPDATE SET
+            {updates},
+            content_hash = excluded.content_hash,
+            updated_at = excluded.updated_at,
+            version = faculty.version + 1
+        WHERE faculty.content_hash IS NOT excluded.content_hash
+    ''', [
+        tuple(row.get(c) for c in FACULTY_COLUMNS) + (digest, now)
+        for row, digest in changed
+    ])
+
+    # Keep the normalized publications table in step with the text column
+    ids = _select_by_url(conn, 'id', [row['profile_url'] for row, _ in changed])
+    sync_publications(conn, list(ids.values()))
+    return changeset
+
+
+def delete_missing(conn, keep_urls):
+    """
+    Deletes profiles whose profile_url is not in keep_urls.
+    Returns the deleted profile_urls.
+    """
+    keep = set(keep_urls)
+    gone = [url for (url,) in conn.execute("SELECT profile_url FROM faculty") if url not in keep]
+    conn.executemany("DELETE FROM faculty WHERE profile_url = ?", [(url,) for url in gone])
+    return gone
+
+
+def untyped_profiles(db_path=DB_PATH):
+    """
+    profile_urls stored without a faculty_type (rows written before the
+    crawler recorded the listing category). Empty for a new database.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return {url for (url,) in conn.execute("SELECT profile_url FROM faculty WHERE faculty_type IS NULL")}
+    except sqlite3.OperationalError:
+        return set()
+    finally:
+        conn.close()
+
+
+def save_to_db(data, prune=False, db_path=DB_PATH):
+    """
+    Storage: Persists cleaned data in SQLite.
+
+    `data` is any iterable of cleaned records. Upserts by profile_url and
+    only writes rows whose content changed. With prune=True, `data` is
+    treated as the full snapshot and profiles missing from it are deleted;
+    an empty snapshot (e.g. a missing input file) deletes nothing.
+    Returns the changeset
+    {"inserted": [...], "updated": [...], "deleted": [...]} of profile_urls,
+    so downstream indexes can update incrementally.
+    """
+    # Create connection to the relational DB (in WAL mode, so the API
+    # keeps reading while this writes)
+    enable_wal(db_path)
+    conn = sqlite3.connect(db_path)
+    changeset = {'inserted': [], 'updated': [], 'deleted': []}
+    inserted = set()
+    seen_urls = set()
+    records = iter(data)
+
+    try:
+        with conn:
+            create_table(conn)
+
+            # Efficient SQL storage: one transaction, batched writes; `data`
+            # may be a generator (transform_data) and is read once
+            while True:
+                batch = list(islice(records, SAVE_BATCH_SIZE))
+                if not batch:
+                    break
+                if prune:
+                    seen_urls.update(entry.get('profile_url') for entry in batch)
+                changes = upsert_faculty(conn, batch)
+                inserted.update(changes['inserted'])
+                changeset['inserted'].extend(changes['inserted'])
+                # A profile repeated in a later batch was inserted by this call
+                changeset['updated'].extend(url for url in changes['updated'] if url not in inserted)
+            if prune and not seen_urls:
+                print("⚠️ Empty snapshot: nothing pruned.")
+            elif prune:
+                changeset['deleted'] = delete_missing(conn, seen_urls)
+    finally:
+        conn.close()
+
+    print(
+        f"Clean dataset saved to {db_path}: {len(changeset['inserted'])} inserted, "
+        f"{len(changeset['updated'])} updated, {len(changeset['deleted'])} deleted."
+    )
+    return changeset
 
 if __name__ == "__main__":
-    # Run the modular pipeline
-    cleaned_data = transform_data()
-    if cleaned_data:
-        save_to_db(cleaned_data)
\ No newline at end of file
+    import argparse
+
+    from transform import transform_data
+
+    parser = argparse.ArgumentParser(description="Clean faculty_data.json into the faculty database.")
+    parser.add_argument("--migrate", action="store_true",
+                        help="only create or migrate the schema and full-text index, then exit")
+    args = parser.parse_args()
+
+    if args.migrate:
+        init_db()
+        print(f"🗄️ Schema of {DB_PATH} is up to date.")
+    else:
+        # Run the modular pipeline, streaming cleaned records into the database
+        save_to_db(transform_data())
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pytest
+
+# The modules are flat files at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import save_to_db  # noqa: E402
+
+MISSING = "Data is not available"
+
+
+class FakeModel:
+    """
+    Stands in for a SentenceTransformer: a hashed bag of words, normalized.
+    Counts the texts it encoded.
+    """
+
+    dim = 64
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **options):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1)
+        return vectors[0] if single else vectors
+
+
+def make_record(n, **fields):
+    """
+    A cleaned record as transform_item() returns it.
+    """
+    record = {
+        "name": f"Person {n}",
+        "education": "PhD, Some University",
+        "email": f"person{n}@example.edu",
+        "phone": None,
+        "address": None,
+        "faculty_web": None,
+        "biography": MISSING,
+        "specialization": f"Topic {n}",
+        "teaching": MISSING,
+        "publications": MISSING,
+        "research": MISSING,
+        "profile_url": f"https://example.edu/faculty/person-{n}",
+        "faculty_type": "Faculty",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def fake_model():
+    return FakeModel()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "faculty.db")
+
+
+@pytest.fixture
+def faculty_db(db_path):
+    """
+    A migrated database holding five profiles.
+    """
+    save_to_db([make_record(n) for n in range(1, 6)], db_path=db_path)
+    return db_path
+
+
+@pytest.fixture
+def connect():
+    opened = []
+
+    def _connect(path):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        opened.append(conn)
+        return conn
+
+    yield _connect
+    for conn in opened:
+        conn.close()
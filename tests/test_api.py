@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import make_record
+from store import init_db, save_to_db
+
+BUNDLED_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faculty_data.db")
+
+
+@pytest.fixture
+def client_for(monkeypatch):
+    """
+    Starts the API on a given database (no search warm-up).
+    """
+    clients = []
+
+    def _client(db_path):
+        monkeypatch.setattr(main, "DB_PATH", db_path)
+        monkeypatch.setattr(main, "SEARCH_WARMUP", False)
+        monkeypatch.setattr(main, "_all_cache", {"version": None, "body": None})
+        client = TestClient(main.app)
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield _client
+    for client in clients:
+        client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """
+    A copy of the bundled database, which predates the migrated schema.
+    """
+    path = str(tmp_path / "old.db")
+    shutil.copy(BUNDLED_DB, path)
+    return path
+
+
+# --------------------------------------------------
+# Databases that predate the current schema
+# --------------------------------------------------
+@pytest.mark.parametrize("url", [
+    "/search/text?q=learning",
+    "/publications",
+    "/search/filters",
+    "/search?q=learning&faculty_type=Faculty",
+])
+def test_old_schema_answers_503(client_for, old_db, url):
+    response = client_for(old_db).get(url)
+
+    assert response.status_code == 503
+    assert "store.py --migrate" in response.json()["detail"]
+
+
+def test_old_schema_still_serves_the_faculty_table(client_for, old_db):
+    client = client_for(old_db)
+
+    assert client.get("/all?limit=2").status_code == 200
+    assert client.get("/faculty/1").status_code == 200
+
+
+def test_migration_takes_effect_without_a_restart(client_for, old_db):
+    client = client_for(old_db)
+    assert client.get("/search/text?q=learning").status_code == 503
+
+    init_db(old_db)
+
+    assert client.get("/search/text?q=learning").status_code == 200
+    assert client.get("/publications?limit=1").status_code == 200
+    assert client.get("/search/filters").status_code == 200
+
+
+# --------------------------------------------------
+# Publications
+# --------------------------------------------------
+@pytest.fixture
+def publications_db(db_path):
+    save_to_db([
+        make_record(n, publications="\n".join(f"Paper {n}.{i}, Journal of Tests, {2000 + i}" for i in range(3)))
+        for n in range(1, 3)
+    ], db_path=db_path)
+    return db_path
+
+
+def _pages(client, url, key):
+    pages, after = [], None
+    while True:
+        page = client.get(url if after is None else f"{url}&after_id={after}").json()
+        pages.append(len(page[key]))
+        after = page["next_after_id"]
+        if after is None:
+            return pages
+
+
+def test_exactly_full_last_publications_page_has_no_cursor(client_for, publications_db):
+    client = client_for(publications_db)
+
+    assert _pages(client, "/publications?limit=3", "publications") == [3, 3]
+    assert _pages(client, "/publications?limit=4", "publications") == [4, 2]
+    assert client.get("/publications?limit=6").json()["next_after_id"] is None
+
+
+def test_publications_filters(client_for, publications_db):
+    client = client_for(publications_db)
+
+    page = client.get("/publications?since=2001&until=2001").json()
+
+    assert [p["citation"] for p in page["publications"]] == ["Paper 1.1, Journal of Tests, 2001",
+                                                            "Paper 2.1, Journal of Tests, 2001"]
+
+
+# --------------------------------------------------
+# /all pages, projection and streaming
+# --------------------------------------------------
+@pytest.fixture
+def faculty_api(client_for, db_path):
+    save_to_db([make_record(n) for n in range(1, 8)], db_path=db_path)
+    return client_for(db_path)
+
+
+def test_keyset_pages_cover_every_row_once(faculty_api):
+    ids, after = [], None
+    while True:
+        page = faculty_api.get("/all", params={"limit": 3, **({"after_id": after} if after else {})}).json()
+        ids += [row["id"] for row in page["faculty"]]
+        after = page["next_after_id"]
+        if after is None:
+            break
+
+    assert ids == list(range(1, 8))
+    assert _pages(faculty_api, "/all?limit=7", "faculty") == [7]
+
+
+def test_fields_without_limit_return_a_capped_page_with_cursor(faculty_api, monkeypatch):
+    monkeypatch.setattr(main, "MAX_PAGE_SIZE", 5)
+
+    page = faculty_api.get("/all?fields=name").json()
+
+    assert page["limit"] == 5 and page["next_after_id"] == 5
+    assert page["faculty"][0] == {"id": 1, "name": "Person 1"}
+
+
+def test_unknown_field_is_rejected(faculty_api):
+    assert faculty_api.get("/all?fields=name,password").status_code == 400
+
+
+def test_pages_are_served_as_json(faculty_api):
+    response = faculty_api.get("/all?limit=2&after_id=2")
+
+    assert response.headers["content-type"] == "application/json"
+    assert [row["id"] for row in response.json()["faculty"]] == [3, 4]
+
+
+def test_ndjson_streams_every_row_across_pages(faculty_api, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 2)
+
+    lines = faculty_api.get("/all?format=ndjson&fields=email").text.splitlines()
+    limited = faculty_api.get("/all?format=ndjson&after_id=2&limit=3").text.splitlines()
+
+    assert [json.loads(line)["id"] for line in lines] == list(range(1, 8))
+    assert [json.loads(line)["id"] for line in limited] == [3, 4, 5]
+
+
+def test_ndjson_returns_its_connections_to_the_pool(faculty_api, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 2)
+    with faculty_api.stream("GET", "/all?format=ndjson") as response:
+        next(response.iter_lines())
+
+    # Every connection opened for the stream is idle again
+    assert main.pool._created >= 1
+    assert main.pool._idle.qsize() == main.pool._created
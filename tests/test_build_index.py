@@ -0,0 +1,135 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import build_index
+import encoders
+from build_index import plan_shards, shard_file
+from conftest import FakeModel, make_record
+from search_engine import FacultySearchEngine
+from store import save_to_db
+
+
+class ThreadPool(ThreadPoolExecutor):
+    """
+    Runs the encoder workers as threads of the test process.
+    """
+
+    def __init__(self, max_workers=None, mp_context=None, **options):
+        super().__init__(max_workers, **options)
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """
+    (first_id, last_id) of every shard encoded, in completion order.
+    """
+    shards = []
+    encode_shard = build_index.encode_shard
+
+    def _encode_shard(db_path, first_id, last_id, *args):
+        shards.append((first_id, last_id))
+        return encode_shard(db_path, first_id, last_id, *args)
+
+    monkeypatch.setattr(build_index, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(build_index, "encode_shard", _encode_shard)
+    monkeypatch.setattr(encoders, "load_encoder", lambda *args: FakeModel())
+    return shards
+
+
+@pytest.fixture
+def build(faculty_db, tmp_path):
+    output = str(tmp_path / "snapshot")
+
+    def _build(**options):
+        return build_index.build_index(faculty_db, output, shard_size=2, workers=2, chunk_dtype="float16", **options)
+
+    return _build
+
+
+def test_shards_follow_fixed_id_ranges():
+    rows = [{"id": i} for i in (1, 2, 3, 7, 10001)]
+
+    shards = plan_shards(rows, shard_size=3)
+
+    assert {key: [row["id"] for row in shard] for key, shard in shards.items()} == {
+        (1, 3): [1, 2, 3], (7, 9): [7], (10000, 10002): [10001]
+    }
+    assert shard_file("d", 1, 3) == os.path.join("d", "shard_0000000001_0000000003.npz")
+
+
+def test_build_writes_a_snapshot_the_engine_warm_starts_from(encoded, build, faculty_db):
+    output = build()
+
+    assert sorted(encoded) == [(1, 2), (3, 4), (5, 6)]
+    model = FakeModel()
+    engine = FacultySearchEngine(model=model, db_path=faculty_db, snapshot=output, chunk_index="float16",
+                                 preload_model=False)
+    try:
+        assert engine.warm_start and model.encoded == 0
+        np.testing.assert_allclose(engine.embeddings, FakeModel().encode(engine.texts), atol=1e-6)
+        assert len(engine.chunks.offsets) == len(engine) + 1
+    finally:
+        engine.batcher.close()
+        engine.result_cache.close()
+        engine.pool.close()
+
+
+def test_rerun_reuses_every_up_to_date_shard(encoded, build):
+    build()
+    encoded.clear()
+
+    build()
+
+    assert encoded == []
+
+
+def test_changed_row_re_encodes_only_its_shard(encoded, build, faculty_db):
+    build()
+    encoded.clear()
+
+    save_to_db([make_record(3, research="Changed after the build")], db_path=faculty_db)
+    build()
+
+    assert encoded == [(3, 4)]
+
+
+def test_restart_encodes_everything_again(encoded, build):
+    build()
+    encoded.clear()
+
+    build(restart=True)
+
+    assert sorted(encoded) == [(1, 2), (3, 4), (5, 6)]
+
+
+def test_shards_of_removed_rows_are_deleted(encoded, build, faculty_db):
+    output = build()
+
+    save_to_db([make_record(n) for n in range(1, 5)], prune=True, db_path=faculty_db)
+    build()
+
+    assert sorted(os.path.basename(path) for path in glob.glob(os.path.join(f"{output}_shards", "*.npz"))) == [
+        "shard_0000000001_0000000002.npz", "shard_0000000003_0000000004.npz"
+    ]
+
+
+def test_row_edited_during_the_build_fails_it_until_rerun(encoded, build, faculty_db, monkeypatch):
+    encode_shard = build_index.encode_shard
+
+    def _edit_then_encode(db_path, first_id, *args):
+        if first_id == 3:
+            save_to_db([make_record(3, research="Edited mid-build")], db_path=faculty_db)
+        return encode_shard(db_path, first_id, *args)
+
+    monkeypatch.setattr(build_index, "encode_shard", _edit_then_encode)
+    with pytest.raises(RuntimeError, match="1 shards changed"):
+        build()
+
+    monkeypatch.setattr(build_index, "encode_shard", encode_shard)
+    encoded.clear()
+    build()
+    assert encoded == []
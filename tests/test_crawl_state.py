@@ -0,0 +1,214 @@
+from collections import Counter
+
+import pytest
+from scrapy.exceptions import DropItem, IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+
+from faculty_scraper.crawl_state import CrawlStateStore, fingerprint
+from faculty_scraper.middlewares import ConditionalRequestMiddleware
+from faculty_scraper.pipelines import ChangedItemPipeline
+
+URL = "https://example.edu/faculty/person-1"
+PAGE = b"<html><body><h1>Person 1</h1></body></html>"
+
+
+class Stats:
+    """
+    The inc_value part of a scrapy stats collector.
+    """
+
+    def __init__(self):
+        self.values = Counter()
+
+    def inc_value(self, key, count=1):
+        self.values[key] += count
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+@pytest.fixture
+def store(state_path):
+    store = CrawlStateStore(state_path)
+    yield store
+    store.close()
+
+
+def _request(url=URL, **meta):
+    return Request(url, meta={"profile_url": url, **meta})
+
+
+def _response(request, status=200, body=PAGE, **headers):
+    return HtmlResponse(request.url, status=status, headers=headers, body=body, request=request)
+
+
+def _seen(store, url=URL, body=PAGE, **values):
+    store.stage(url, body_hash=fingerprint(body), **values)
+    store.commit(url)
+
+
+# --------------------------------------------------
+# State store
+# --------------------------------------------------
+def test_fingerprint_is_stable_across_key_order():
+    assert fingerprint({"a": 1, "b": "x"}) == fingerprint({"b": "x", "a": 1})
+    assert fingerprint(b"abc") != fingerprint(b"abd")
+
+
+def test_staged_values_are_stored_only_on_commit(store, state_path):
+    store.stage(URL, etag='"v1"')
+    assert store.get(URL) is None
+
+    store.commit(URL)
+
+    assert store.get(URL)["etag"] == '"v1"'
+    reopened = CrawlStateStore(state_path)
+    assert reopened.get(URL)["etag"] == '"v1"'
+    reopened.close()
+
+
+def test_commit_merges_with_the_previous_state(store, state_path):
+    _seen(store, etag='"v1"', fields_hash="f1")
+
+    store.stage(URL, etag='"v2"')
+    store.commit(URL)
+
+    reopened = CrawlStateStore(state_path)
+    assert reopened.get(URL) == {"etag": '"v2"', "last_modified": None,
+                                 "body_hash": fingerprint(PAGE), "fields_hash": "f1"}
+    reopened.close()
+
+
+def test_scraped_items_commit_unless_deferred(store):
+    store.stage(URL, etag='"v1"')
+    store.defer_commits = True
+    store.item_scraped({"profile_url": URL}, None, None)
+    assert store.get(URL) is None
+
+    store.defer_commits = False
+    store.item_scraped({"profile_url": URL}, None, None)
+    assert store.get(URL)["etag"] == '"v1"'
+
+
+# --------------------------------------------------
+# Conditional requests
+# --------------------------------------------------
+def test_known_pages_are_requested_conditionally(store):
+    _seen(store, etag='"v1"', last_modified="Mon, 05 Oct 2026 10:00:00 GMT")
+    request = _request()
+
+    ConditionalRequestMiddleware(store, Stats()).process_request(request, None)
+
+    assert request.headers["If-None-Match"] == b'"v1"'
+    assert request.headers["If-Modified-Since"] == b"Mon, 05 Oct 2026 10:00:00 GMT"
+
+
+def test_unknown_forced_and_listing_requests_stay_unconditional(store):
+    _seen(store, etag='"v1"')
+    _seen(store, url="https://example.edu/faculty", etag='"list"')
+
+    requests = [
+        _request("https://example.edu/faculty/person-2"),
+        Request("https://example.edu/faculty"),
+    ]
+    for request in requests:
+        ConditionalRequestMiddleware(store, Stats()).process_request(request, None)
+    forced = _request()
+    ConditionalRequestMiddleware(store, Stats(), force=True).process_request(forced, None)
+
+    assert all(b"If-None-Match" not in request.headers for request in requests + [forced])
+
+
+def test_not_modified_is_dropped(store):
+    stats = Stats()
+    request = _request()
+
+    with pytest.raises(IgnoreRequest):
+        ConditionalRequestMiddleware(store, stats).process_response(request, _response(request, status=304), None)
+
+    assert stats.values["crawl_state/not_modified"] == 1
+
+
+def test_unchanged_body_is_dropped_but_keeps_new_validators(store):
+    _seen(store, etag='"v1"')
+    stats = Stats()
+    request = _request()
+
+    with pytest.raises(IgnoreRequest):
+        ConditionalRequestMiddleware(store, stats).process_response(request, _response(request, ETag='"v2"'), None)
+
+    assert store.get(URL)["etag"] == '"v2"'
+    assert stats.values["crawl_state/unchanged_body"] == 1
+
+
+def test_changed_body_reaches_the_spider_uncommitted(store):
+    _seen(store, etag='"v1"')
+    request = _request()
+    response = _response(request, body=b"<html>new</html>", ETag='"v2"')
+
+    assert ConditionalRequestMiddleware(store, Stats()).process_response(request, response, None) is response
+    # Committed only once the item made it through the pipelines
+    assert store.get(URL)["etag"] == '"v1"'
+    store.commit(URL)
+    assert store.get(URL)["body_hash"] == fingerprint(b"<html>new</html>")
+
+
+def test_force_and_backfill_reparse_unchanged_bodies(store):
+    _seen(store)
+    stats = Stats()
+
+    forced = _request()
+    response = _response(forced)
+    assert ConditionalRequestMiddleware(store, stats, force=True).process_response(forced, response, None) is response
+
+    middleware = ConditionalRequestMiddleware(store, stats, backfill={URL})
+    backfill = _request(faculty_type="Faculty")
+    response = _response(backfill)
+    assert middleware.process_response(backfill, response, None) is response
+    assert stats.values["crawl_state/faculty_type_backfill"] == 1
+
+    # Backfill needs a category to fill in
+    untyped = _request()
+    with pytest.raises(IgnoreRequest):
+        middleware.process_response(untyped, _response(untyped), None)
+
+
+def test_error_and_listing_responses_pass_through(store):
+    _seen(store)
+    middleware = ConditionalRequestMiddleware(store, Stats())
+
+    request = _request()
+    error = _response(request, status=500)
+    listing = Request("https://example.edu/faculty")
+    page = _response(listing)
+
+    assert middleware.process_response(request, error, None) is error
+    assert middleware.process_response(listing, page, None) is page
+
+
+# --------------------------------------------------
+# Changed items
+# --------------------------------------------------
+def test_items_with_unchanged_fields_are_dropped(store):
+    stats = Stats()
+    pipeline = ChangedItemPipeline(store, stats)
+    item = {"profile_url": URL, "name": "Person 1"}
+
+    assert pipeline.process_item(dict(item), None) == item
+    store.commit(URL)
+    with pytest.raises(DropItem):
+        pipeline.process_item(dict(item), None)
+    assert pipeline.process_item({**item, "name": "Person One"}, None)["name"] == "Person One"
+
+    assert stats.values == {"crawl_state/changed_items": 2, "crawl_state/unchanged_fields": 1}
+
+
+def test_forced_items_always_pass(store):
+    pipeline = ChangedItemPipeline(store, Stats(), force=True)
+    item = {"profile_url": URL, "name": "Person 1"}
+    pipeline.process_item(dict(item), None)
+    store.commit(URL)
+
+    assert pipeline.process_item(dict(item), None) == item
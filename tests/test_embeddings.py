@@ -0,0 +1,84 @@
+import sqlite3
+
+import numpy as np
+
+from embeddings import load_index, profile_text, read_faculty, sync_embeddings
+
+
+def test_first_sync_encodes_every_profile(faculty_db, fake_model):
+    rows = read_faculty(faculty_db)
+    matrix = load_index(fake_model, rows, faculty_db)
+
+    assert fake_model.encoded == len(rows)
+    assert matrix.shape == (len(rows), fake_model.dim)
+    assert matrix.dtype == np.float32
+
+
+def test_unchanged_profiles_are_not_re_encoded(faculty_db, fake_model):
+    rows = read_faculty(faculty_db)
+    first = load_index(fake_model, rows, faculty_db)
+    fake_model.encoded = 0
+
+    second = load_index(fake_model, rows, faculty_db)
+
+    assert fake_model.encoded == 0
+    np.testing.assert_array_equal(first, second)
+
+
+def test_only_changed_profiles_are_re_encoded(faculty_db, fake_model):
+    rows = read_faculty(faculty_db)
+    load_index(fake_model, rows, faculty_db)
+    fake_model.encoded = 0
+
+    rows[2]["research"] = "Quantum error correction"
+    matrix = load_index(fake_model, rows, faculty_db)
+
+    assert fake_model.encoded == 1
+    row = rows[2]
+    expected = type(fake_model)().encode([profile_text(row["name"], row["research"], row["specialization"])])
+    np.testing.assert_allclose(matrix[2], expected[0])
+
+
+def test_vectors_of_removed_profiles_are_deleted(faculty_db, fake_model, connect):
+    rows = read_faculty(faculty_db)
+    load_index(fake_model, rows, faculty_db)
+
+    load_index(fake_model, rows[:3], faculty_db)
+
+    stored = {row[0] for row in connect(faculty_db).execute("SELECT profile_url FROM faculty_embeddings")}
+    assert stored == {row["profile_url"] for row in rows[:3]}
+
+
+def test_each_model_keeps_its_own_vectors(faculty_db, fake_model):
+    rows = read_faculty(faculty_db)
+    load_index(fake_model, rows, faculty_db, "model-a")
+    load_index(fake_model, rows, faculty_db, "model-b")
+    fake_model.encoded = 0
+
+    load_index(fake_model, rows, faculty_db, "model-a")
+    load_index(fake_model, rows, faculty_db, "model-b")
+
+    assert fake_model.encoded == 0
+
+
+def test_table_keyed_by_url_alone_is_migrated(db_path, fake_model):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE faculty_embeddings (
+            profile_url TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO faculty_embeddings VALUES ('u', 'h', 'model-a', 1, ?)",
+                 (np.ones(1, dtype=np.float32).tobytes(),))
+    conn.commit()
+
+    sync_embeddings(conn, fake_model, [], "model-b")
+
+    key = [row[1] for row in conn.execute("PRAGMA table_info(faculty_embeddings)") if row[5]]
+    assert sorted(key) == ["model", "profile_url"]
+    assert conn.execute("SELECT model FROM faculty_embeddings").fetchall() == [("model-a",)]
+    conn.close()
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+import encoders
+from conftest import FakeModel, make_record
+from encoders import LazyModel, autotune_batch_size, compare_encoders, encoder_id, load_encoder
+from search_engine import FacultySearchEngine
+from snapshot import TUNING_FILE, load_batch_size, save_batch_size
+from store import save_to_db
+
+
+class BatchRecordingModel(FakeModel):
+    """
+    A FakeModel that remembers the batch size of every encode call.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **options):
+        self.batch_sizes.append(options.get("batch_size"))
+        return super().encode(texts, convert_to_numpy, normalize_embeddings)
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """
+    Models handed out by the patched load_encoder, in load order.
+    """
+    models = []
+
+    def _load(backend="fp32", name="model", threads=0):
+        if backend == "onnx":
+            raise RuntimeError("The onnx encoders require 'optimum[onnxruntime]'")
+        models.append(BatchRecordingModel())
+        return models[-1]
+
+    monkeypatch.setattr(encoders, "load_encoder", _load)
+    return models
+
+
+def test_non_fp32_vectors_get_their_own_model_id():
+    assert encoder_id("fp32", "m") == "m"
+    assert encoder_id("onnx-int8", "m") == "m+onnx-int8"
+    assert LazyModel("m", "int8", threads=4).tuning_key == f"m+int8 threads=4 cpus={os.cpu_count()}"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown encoder backend"):
+        load_encoder("fp16")
+
+
+# --------------------------------------------------
+# Batch size autotuning
+# --------------------------------------------------
+def test_autotune_times_each_candidate_on_a_sample():
+    model = BatchRecordingModel()
+
+    best, rates = autotune_batch_size(model, [f"text {i}" for i in range(40)], candidates=(4, 8, 64), sample=10)
+
+    assert best in rates
+    # 64 is larger than the 10-text sample: not timed
+    assert sorted(rates) == [4, 8]
+    assert model.batch_sizes == [None, 4, 8]
+
+
+def test_lazy_model_loads_on_first_encode_and_tunes_once(loaded, monkeypatch):
+    monkeypatch.setattr(encoders, "AUTOTUNE_MIN_TEXTS", 20)
+    model = LazyModel("m")
+    assert not model.loaded
+
+    model.encode(["one query"])
+    assert model.loaded and model.batch_size == 0
+
+    model.encode([f"text {i}" for i in range(30)])
+    tuned = model.batch_size
+    model.encode([f"text {i}" for i in range(30)])
+
+    assert tuned in encoders.AUTOTUNE_CANDIDATES
+    assert len(loaded) == 1
+    assert loaded[0].batch_sizes[-1] == tuned
+
+    model.encode(["x"], batch_size=3)
+    assert loaded[0].batch_sizes[-1] == 3
+
+
+def test_background_load_is_shared(loaded):
+    model = LazyModel("m").start()
+    model._thread.join()
+
+    model.encode(["one query"])
+
+    assert len(loaded) == 1 and model.load_seconds is not None
+
+
+def test_tuned_batch_sizes_are_kept_per_key(tmp_path):
+    path = str(tmp_path / "snapshot")
+    assert load_batch_size(path, "a") == 0
+
+    save_batch_size(path, "a", 32)
+    save_batch_size(path, "b", 64)
+
+    assert (load_batch_size(path, "a"), load_batch_size(path, "b")) == (32, 64)
+
+    with open(os.path.join(path, TUNING_FILE), "w") as f:
+        f.write("[1, 2]")
+    assert load_batch_size(path, "a") == 0
+    save_batch_size(path, "a", 16)
+    assert load_batch_size(path, "a") == 16
+
+
+@pytest.fixture
+def build(faculty_db, tmp_path):
+    """
+    Builds an engine on a LazyModel with its snapshot in tmp_path.
+    """
+    engines = []
+
+    def _build():
+        engines.append(FacultySearchEngine(model=LazyModel("m"), db_path=faculty_db, snapshot=str(tmp_path / "snapshot"),
+                                           chunk_index="off", preload_model=False))
+        return engines[-1]
+
+    yield _build
+    for engine in engines:
+        engine.batcher.close()
+        engine.result_cache.close()
+        engine.pool.close()
+
+
+def test_cold_builds_reuse_the_tuned_batch_size(loaded, build, monkeypatch, faculty_db):
+    monkeypatch.setattr(encoders, "AUTOTUNE_MIN_TEXTS", 5)
+
+    first = build()
+    tuned = first.model.batch_size
+    assert tuned in encoders.AUTOTUNE_CANDIDATES
+    assert load_batch_size(first.snapshot_path, first.model.tuning_key) == tuned
+
+    # A changed row forces a cold build, which starts from the saved value
+    save_to_db([make_record(1, research="Changed")], db_path=faculty_db)
+    monkeypatch.setattr(encoders, "autotune_batch_size", lambda *args: pytest.fail("autotuned again"))
+    second = build()
+
+    assert not second.warm_start
+    assert second.model.batch_size == tuned
+    assert loaded[-1].batch_sizes == [tuned]
+
+
+# --------------------------------------------------
+# Comparison against fp32
+# --------------------------------------------------
+def test_comparison_reports_agreement_and_load_errors(loaded):
+    texts = [f"profile about topic {i}" for i in range(12)]
+
+    report = compare_encoders(texts, ["topic 3", "topic 7"], backends=["fp32", "int8", "onnx"], k=3)
+
+    int8 = report["backends"]["int8"]
+    assert int8["agreement"]["corpus_cosine_mean"] == pytest.approx(1.0)
+    assert int8["agreement"]["top3_overlap"] == 1.0 and int8["agreement"]["ok"]
+    assert int8["batch_size"] in encoders.AUTOTUNE_CANDIDATES
+    assert "optimum" in report["backends"]["onnx"]["error"]
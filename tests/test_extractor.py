@@ -0,0 +1,138 @@
+import pytest
+from parsel import Selector
+
+from faculty_scraper.extractor import FieldRule, ProfileExtractor
+from faculty_scraper.spiders.daiict import load_institutions
+
+PROFILE = load_institutions()[0]["profile"]
+
+PAGE = """
+<html><body>
+  <div class="contact-box-p emailIcon"><div class="field__item"> person1@example.edu </div></div>
+  <div class="contact-box-p facultyweb"><a href="https://person1.example.edu">Home</a></div>
+  <div class="about">
+    <p> First paragraph. </p>
+    <div class="about"><p>Nested paragraph.</p></div>
+    <p>   </p>
+  </div>
+  <div class="work-exp margin-bottom-20"><span>Signal processing</span> <span>Graphs</span></div>
+  <div class="work-exp">Teaching one<div class="work-exp">Teaching two</div></div>
+  <div class="work-exp2">Teaching three</div>
+  <div class="work-exp1"><ul><li>Robotics</li></ul></div>
+  <section class="work-exp1">Not a div</section>
+  <div class="education overflowContent">
+    <ul><li>Paper <b>one</b>, 2020</li><li> Paper two, 2021 </li></ul>
+    <ol><li>Paper three, 2022</li></ol>
+  </div>
+  <div class="education">Not an overflow list<ul><li>Ignored</li></ul></div>
+</body></html>
+"""
+
+
+def parsel_extract(html, profile):
+    """
+    The per-field parsel queries the extractor replaced.
+    """
+    selector = Selector(text=html)
+    values = {}
+    for field, spec in profile.items():
+        nodes = selector.css(spec["css"]) if "css" in spec else selector.xpath(spec["xpath"])
+        if spec.get("first"):
+            values[field] = nodes.get()
+            continue
+        if spec.get("items"):
+            found = [" ".join(t.strip() for t in node.xpath(".//text()").getall() if t.strip()) for node in nodes]
+        else:
+            found = nodes.getall()
+        values[field] = spec.get("join", " ").join(v.strip() for v in found if v and v.strip())
+    return values
+
+
+@pytest.fixture
+def extracted():
+    return ProfileExtractor(PROFILE).extract(Selector(text=PAGE).root)
+
+
+def test_matches_the_parsel_queries(extracted):
+    assert extracted == parsel_extract(PAGE, PROFILE)
+
+
+def test_nested_anchors_yield_each_node_once(extracted):
+    assert extracted["biography"] == "First paragraph.\nNested paragraph."
+    assert extracted["teaching"] == "Teaching one\nTeaching two\nTeaching three"
+
+
+def test_anchor_tag_and_every_class_must_match(extracted):
+    assert extracted["research"] == "Robotics"
+    assert extracted["specialization"] == "Signal processing, Graphs"
+    assert extracted["publications"] == "Paper one , 2020\nPaper two, 2021\nPaper three, 2022"
+
+
+def test_first_keeps_the_raw_match(extracted):
+    assert extracted["email"] == " person1@example.edu "
+    assert extracted["faculty_web"] == "https://person1.example.edu"
+    assert extracted["phone"] is None
+
+
+def test_missing_fields_are_empty():
+    values = ProfileExtractor(PROFILE).extract(Selector(text="<html><body><p>Nothing</p></body></html>").root)
+
+    assert values == parsel_extract("<html><body><p>Nothing</p></body></html>", PROFILE)
+    assert values["biography"] == "" and values["email"] is None
+
+
+# --------------------------------------------------
+# Compiled rules
+# --------------------------------------------------
+@pytest.mark.parametrize("spec, key, substring", [
+    ({"css": "div.about p::text"}, "about", False),
+    ({"css": "div.contact-box-p.emailIcon div.field__item::text"}, "emailIcon", False),
+    ({"xpath": "//div[@class='work-exp1']//text()"}, "work-exp1", False),
+    ({"xpath": "//div[contains(@class,'a') and not(contains(@class,'b'))]//text()"}, "a", True),
+    ({"xpath": "//div[@class='x']//ul/li | //div[@class='x']//ol/li"}, "x", False),
+])
+def test_class_identified_specs_are_anchored(spec, key, substring):
+    rule = FieldRule("field", spec)
+
+    assert rule.anchored
+    assert (rule.key, rule.substring) == (key, substring)
+
+
+@pytest.mark.parametrize("spec", [
+    {"css": "div.about::text"},
+    {"css": "div.about > p::text"},
+    {"css": "div.a p::text, div.b p::text"},
+    {"css": "p.lead a[href]::attr(href)"},
+    {"xpath": "//div[@id='bio']//text()"},
+    {"xpath": "//div[@class='x']//li | //div[@class='y']//li"},
+    {"xpath": "//p//text()"},
+])
+def test_other_specs_keep_a_whole_document_path(spec):
+    rule = FieldRule("field", spec)
+
+    assert not rule.anchored
+    assert rule.path is not None
+
+
+def test_unanchored_specs_match_parsel_too():
+    profile = {
+        "lead": {"css": "div.about > p::text", "join": "|"},
+        "links": {"css": "div.facultyweb a::attr(href), div.emailIcon div::text"},
+        "spans": {"xpath": "//span/text()", "join": ","},
+    }
+
+    values = ProfileExtractor(profile).extract(Selector(text=PAGE).root)
+
+    assert values == parsel_extract(PAGE, profile)
+    assert values["spans"] == "Signal processing,Graphs"
+
+
+def test_timings_are_reported_per_field():
+    extractor = ProfileExtractor(PROFILE)
+    assert extractor.profile() == {}
+
+    for _ in range(2):
+        extractor.extract(Selector(text=PAGE).root)
+
+    assert extractor.calls == 2
+    assert set(extractor.profile()) == {"_walk", *PROFILE}
@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import make_record
+from filters import faculty_type_label, filter_clause, listing_type, matching_ids, normalize_filters
+from store import save_to_db
+
+
+def test_labels_are_canonical():
+    assert faculty_type_label("adjunct-faculty") == "Adjunct Faculty"
+    assert faculty_type_label("  ADJUNCT   faculty ") == "Adjunct Faculty"
+    assert faculty_type_label("") is None
+    assert listing_type("https://example.edu/adjunct-faculty-international/?page=2") == "Adjunct Faculty International"
+
+
+def test_normalized_filters_compare_equal():
+    a = normalize_filters({"faculty_type": "faculty, adjunct-faculty", "education": "PhD  IIT", "has_email": None})
+    b = normalize_filters({"faculty_type": ["Adjunct Faculty", "FACULTY"], "education": ["iit", "phd"]})
+
+    assert a == b == {"faculty_type": ["Adjunct Faculty", "Faculty"], "education": ["iit", "phd"]}
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(ValueError):
+        normalize_filters({"department": "EE"})
+
+
+def test_no_filters_means_no_clause():
+    assert filter_clause({}) is None
+
+
+def test_clause_parameters_are_never_interpolated():
+    where, params = filter_clause(normalize_filters({"faculty_type": "x') OR 1=1 --", "education": 'phd" OR'}))
+
+    assert "OR 1=1" not in where
+    assert params == ["X') Or 1=1", 'education : ("or" "phd")']
+
+
+@pytest.fixture
+def filter_db(db_path):
+    save_to_db([
+        make_record(1, faculty_type="Faculty", education="PhD, IIT Bombay"),
+        make_record(2, faculty_type="Adjunct Faculty", education="PhD, MIT", email=None),
+        make_record(3, faculty_type="Faculty", education="MTech, IIT Delhi", email=""),
+        make_record(4, faculty_type="Visiting Faculty", education="Data is not available"),
+    ], db_path=db_path)
+    return db_path
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"faculty_type": "faculty"}, [1, 3]),
+    ({"faculty_type": "faculty,adjunct faculty"}, [1, 2, 3]),
+    ({"education": "phd"}, [1, 2]),
+    ({"education": "iit phd"}, [1]),
+    ({"has_email": True}, [1, 4]),
+    ({"has_email": False}, [2, 3]),
+    ({"faculty_type": "Faculty", "has_email": True}, [1]),
+    ({"education": "available"}, []),
+])
+def test_matching_ids(filter_db, connect, filters, expected):
+    ids = matching_ids(connect(filter_db), normalize_filters(filters))
+
+    assert ids.tolist() == expected
@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+import sqlite3
+
+import pytest
+
+from conftest import make_record
+from ingest import ingest_feed, iter_line_batches
+
+
+def _write_feed(path, records, mode="w"):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, mode + "t", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def _stored_offset(db_path, feed):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT byte_offset FROM ingest_state WHERE feed = ?", (os.path.abspath(feed),)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_batches_end_at_line_boundaries(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, [make_record(n) for n in range(5)])
+
+    batches = list(iter_line_batches(str(feed), batch_size=2))
+
+    assert [len(lines) for _, lines in batches] == [2, 2, 1]
+    assert batches[-1][0] == os.path.getsize(feed)
+    with open(feed, "rb") as f:
+        f.seek(batches[0][0])
+        assert json.loads(f.readline())["profile_url"] == make_record(2)["profile_url"]
+
+
+@pytest.mark.parametrize("name", ["feed.jsonl", "feed.jsonl.gz"])
+def test_resume_reads_only_the_appended_records(tmp_path, db_path, name):
+    feed = tmp_path / name
+    _write_feed(feed, [make_record(n) for n in range(3)])
+    first = ingest_feed(str(feed), db_path)
+
+    _write_feed(feed, [make_record(n) for n in range(3, 5)], mode="a")
+    second = ingest_feed(str(feed), db_path)
+
+    assert first["records"] == 3 and first["inserted"] == 3
+    assert second["records"] == 2 and second["inserted"] == 2
+    assert second["offset"] > first["offset"]
+
+
+def test_incomplete_last_line_is_left_for_the_next_run(tmp_path, db_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, [make_record(1)])
+    partial = json.dumps(make_record(2))
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write(partial[:20])
+
+    first = ingest_feed(str(feed), db_path)
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write(partial[20:] + "\n")
+    second = ingest_feed(str(feed), db_path)
+
+    assert first["records"] == 1
+    assert second["records"] == 1 and second["inserted"] == 1
+
+
+def test_complete_last_line_without_newline_is_read(tmp_path, db_path):
+    feed = tmp_path / "feed.jsonl"
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write(json.dumps(make_record(1)) + "\n" + json.dumps(make_record(2)))
+
+    totals = ingest_feed(str(feed), db_path)
+
+    assert totals["records"] == 2
+    assert totals["offset"] == os.path.getsize(feed)
+
+
+def test_replaced_feed_is_read_from_the_start(tmp_path, db_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, [make_record(n) for n in range(4)])
+    ingest_feed(str(feed), db_path)
+
+    # A new file at the same path (e.g. a fresh crawl), not an append
+    replacement = tmp_path / "new.jsonl"
+    _write_feed(replacement, [make_record(n, research="Recrawled") for n in range(10, 16)])
+    os.replace(replacement, feed)
+    totals = ingest_feed(str(feed), db_path)
+
+    assert totals["records"] == 6
+    assert _stored_offset(db_path, feed)[0] == os.path.getsize(feed)
+
+
+def test_truncated_feed_is_read_from_the_start(tmp_path, db_path):
+    feed = tmp_path / "feed.jsonl"
+    records = [make_record(n) for n in range(4)]
+    _write_feed(feed, records)
+    ingest_feed(str(feed), db_path)
+
+    with open(feed, "r+", encoding="utf-8") as f:
+        f.truncate(len(json.dumps(records[0])) + 1)
+    totals = ingest_feed(str(feed), db_path)
+
+    assert totals["records"] == 1
+
+
+def test_restart_ignores_the_stored_offset(tmp_path, db_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, [make_record(n) for n in range(3)])
+    ingest_feed(str(feed), db_path)
+
+    totals = ingest_feed(str(feed), db_path, restart=True)
+
+    assert totals["records"] == 3
+    assert totals["inserted"] == 0 and totals["updated"] == 0
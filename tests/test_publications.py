@@ -0,0 +1,126 @@
+import sqlite3
+
+from conftest import make_record
+from publications import citation_hash, create_publications_table, parse_citation, split_publications
+from store import create_table, save_to_db
+
+
+# --------------------------------------------------
+# Citation parsing
+# --------------------------------------------------
+def test_quoted_title_venue_year_and_doi():
+    parsed = parse_citation(
+        'A. Kumar and B. Shah, "Learning sparse graphs from noisy data", '
+        'IEEE Transactions on Signal Processing, vol. 68, pp. 1-12, 2020, doi: 10.1109/TSP.2020.123456.'
+    )
+
+    assert parsed == {
+        "title": "Learning sparse graphs from noisy data",
+        "venue": "IEEE Transactions on Signal Processing",
+        "year": 2020,
+        "doi": "10.1109/tsp.2020.123456",
+    }
+
+
+def test_unquoted_citation_takes_the_venue_like_part():
+    parsed = parse_citation("R. Mehta, Fast wavelet codecs, Journal of Imaging Science, 2018")
+
+    assert parsed["title"] is None
+    assert parsed["venue"] == "Journal of Imaging Science"
+    assert parsed["year"] == 2018
+
+
+def test_years_inside_urls_and_dois_are_ignored():
+    parsed = parse_citation("Some paper, https://doi.org /10.1016/j.2019.01.003")
+
+    assert parsed["doi"] == "10.1016/j.2019.01.003"
+    assert parsed["year"] is None
+
+
+def test_unparseable_citation_gives_none_fields():
+    assert parse_citation("Lecture notes") == {"title": None, "venue": None, "year": None, "doi": None}
+
+
+def test_split_skips_placeholder_and_blank_lines():
+    assert split_publications("Data is not available") == []
+    assert split_publications(" First \n\n Second ") == ["First", "Second"]
+
+
+def test_citation_hash_ignores_case_and_spacing():
+    assert citation_hash("A  Paper,\nJournal") == citation_hash("a paper, journal")
+    assert citation_hash("A paper") != citation_hash("Another paper")
+
+
+# --------------------------------------------------
+# Publication rows
+# --------------------------------------------------
+def _publications(conn, url):
+    return conn.execute(
+        "SELECT p.id, p.position, p.citation FROM publications p JOIN faculty f ON f.id = p.faculty_id "
+        "WHERE f.profile_url = ? ORDER BY p.position", (url,)
+    ).fetchall()
+
+
+def test_publication_ids_survive_edits_to_the_list(db_path, connect):
+    record = make_record(1, publications="Paper one, 2001\nPaper two, 2002\nPaper three, 2003")
+    save_to_db([record], db_path=db_path)
+    conn = connect(db_path)
+    before = {citation: pub_id for pub_id, _, citation in _publications(conn, record["profile_url"])}
+
+    record["publications"] = "New paper, 2024\nPaper one, 2001\nPaper three, 2003"
+    save_to_db([record], db_path=db_path)
+    after = _publications(conn, record["profile_url"])
+
+    assert [tuple(row)[1:] for row in after] == [(0, "New paper, 2024"), (1, "Paper one, 2001"), (2, "Paper three, 2003")]
+    ids = {citation: pub_id for pub_id, _, citation in after}
+    assert ids["Paper one, 2001"] == before["Paper one, 2001"]
+    assert ids["Paper three, 2003"] == before["Paper three, 2003"]
+    assert ids["New paper, 2024"] not in before.values()
+
+
+def test_repeated_citation_is_stored_once(db_path, connect):
+    record = make_record(1, publications="Paper one, 2001\npaper  ONE, 2001\nPaper two, 2002")
+    save_to_db([record], db_path=db_path)
+
+    rows = _publications(connect(db_path), record["profile_url"])
+
+    assert [tuple(row)[1:] for row in rows] == [(0, "Paper one, 2001"), (1, "Paper two, 2002")]
+
+
+def test_publications_are_deleted_with_their_faculty(faculty_db, connect):
+    save_to_db([make_record(1, publications="Paper one, 2001")], db_path=faculty_db)
+    save_to_db([make_record(2)], prune=True, db_path=faculty_db)
+
+    assert connect(faculty_db).execute("SELECT COUNT(*) FROM publications").fetchone()[0] == 0
+
+
+def test_position_keyed_table_is_migrated_keeping_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE faculty (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, publications TEXT, profile_url TEXT UNIQUE)")
+    conn.execute("INSERT INTO faculty (id, name, publications, profile_url) VALUES (1, 'A', 'Paper one\nPaper two', 'u1')")
+    conn.execute('''
+        CREATE TABLE publications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            faculty_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            citation TEXT NOT NULL,
+            title TEXT, venue TEXT, year INTEGER, doi TEXT,
+            UNIQUE (faculty_id, position)
+        )
+    ''')
+    conn.execute("INSERT INTO publications (id, faculty_id, position, citation) VALUES (7, 1, 0, 'Paper one'), (9, 1, 1, 'Paper two')")
+    conn.execute("CREATE TRIGGER faculty_publications_delete AFTER DELETE ON faculty BEGIN "
+                 "DELETE FROM publications WHERE faculty_id = old.id; END")
+    conn.commit()
+
+    with conn:
+        create_table(conn)
+        create_publications_table(conn)
+
+    assert conn.execute("SELECT id, citation_hash FROM publications ORDER BY id").fetchall() == [
+        (7, citation_hash("Paper one")), (9, citation_hash("Paper two"))
+    ]
+    with conn:
+        conn.execute("DELETE FROM faculty WHERE id = 1")
+    assert conn.execute("SELECT COUNT(*) FROM publications").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,220 @@
+import threading
+
+import numpy as np
+import pytest
+
+from query_cache import MicroBatcher, QueryEmbeddingCache, SearchResultCache, normalize_query, result_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# --------------------------------------------------
+# Query embedding cache
+# --------------------------------------------------
+def test_queries_differing_in_case_and_spacing_share_an_entry():
+    cache = QueryEmbeddingCache()
+    cache.put("Machine  Learning ", np.ones(2))
+
+    assert normalize_query(" machine learning") == "machine learning"
+    assert cache.get("MACHINE learning") is not None
+    assert cache.metrics()["hits"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = QueryEmbeddingCache(ttl_seconds=10, clock=clock)
+    cache.put("vlsi", np.ones(2))
+
+    clock.now = 9.9
+    assert cache.get("vlsi") is not None
+    assert cache.items() == [("vlsi", cache.get("vlsi"))]
+
+    clock.now = 10.0
+    assert cache.items() == []
+    assert cache.get("vlsi") is None
+    assert len(cache) == 0
+    assert cache.metrics()["expirations"] == 1
+
+
+def test_put_restarts_the_ttl():
+    clock = Clock()
+    cache = QueryEmbeddingCache(ttl_seconds=10, clock=clock)
+    cache.put("vlsi", np.ones(2))
+    clock.now = 8
+    cache.put("vlsi", np.zeros(2))
+
+    clock.now = 15
+    np.testing.assert_array_equal(cache.get("vlsi"), np.zeros(2))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=None)
+    cache.put("a", np.ones(1))
+    cache.put("b", np.ones(1))
+    cache.get("a")
+
+    cache.put("c", np.ones(1))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.metrics()["evictions"] == 1
+
+
+# --------------------------------------------------
+# Micro-batching
+# --------------------------------------------------
+class Encoder:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [np.full(2, len(text), dtype=np.float32) for text in texts]
+
+
+@pytest.fixture
+def batcher_for():
+    batchers = []
+
+    def _make(encoder, **options):
+        batcher = MicroBatcher(encoder, **options)
+        batchers.append(batcher)
+        return batcher
+
+    yield _make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_requests_arriving_together_share_one_batch(batcher_for):
+    encoder = Encoder()
+    batcher = batcher_for(encoder, max_batch_size=32, max_wait_ms=200)
+
+    futures = [batcher.submit(text) for text in ("a", "bb", "ccc")]
+
+    assert [future.result(timeout=5)[0] for future in futures] == [1, 2, 3]
+    assert encoder.calls == [["a", "bb", "ccc"]]
+
+
+def test_batches_are_capped_at_max_batch_size(batcher_for):
+    encoder = Encoder()
+    batcher = batcher_for(encoder, max_batch_size=2, max_wait_ms=200)
+
+    vectors = batcher.encode(["a", "b", "c", "d", "e"])
+
+    assert len(vectors) == 5
+    assert all(len(call) <= 2 for call in encoder.calls)
+    assert sum(len(call) for call in encoder.calls) == 5
+    assert batcher.metrics()["largest_batch"] == 2
+
+
+def test_identical_queries_in_a_batch_are_encoded_once(batcher_for):
+    encoder = Encoder()
+    batcher = batcher_for(encoder, max_wait_ms=200)
+
+    vectors = batcher.encode(["same", "same", "other"])
+
+    assert encoder.calls == [["same", "other"]]
+    np.testing.assert_array_equal(vectors[0], vectors[1])
+    assert batcher.metrics()["items"] == 3
+
+
+def test_encoder_errors_reach_every_caller_of_the_batch(batcher_for):
+    batcher = batcher_for(Encoder(fail=True), max_wait_ms=200)
+
+    futures = [batcher.submit(text) for text in ("a", "b")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_concurrent_callers_get_their_own_vectors(batcher_for):
+    batcher = batcher_for(Encoder(), max_batch_size=8, max_wait_ms=5)
+    results = {}
+
+    def call(text):
+        results[text] = batcher.encode([text])[0][0]
+
+    threads = [threading.Thread(target=call, args=("x" * n,)) for n in range(1, 21)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"x" * n: n for n in range(1, 21)}
+
+
+# --------------------------------------------------
+# Search result cache
+# --------------------------------------------------
+HITS = [(0, 0.9, 0.03, "research"), (3, 0.7, 0.02, None)]
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    caches = []
+
+    def _cache(max_bytes=2**20, disk=False):
+        cache = SearchResultCache(max_bytes, str(tmp_path / "results.db") if disk else None)
+        caches.append(cache)
+        return cache
+
+    yield _cache
+    for cache in caches:
+        cache.close()
+
+
+def test_result_keys_follow_the_index_version_and_normalized_query():
+    key = result_key("v1", "Graph  Learning", 5, {"has_email": True})
+
+    assert key == result_key("v1", "graph learning", 5, {"has_email": True})
+    assert key != result_key("v2", "graph learning", 5, {"has_email": True})
+    assert key != result_key("v1", "graph learning", 10, {"has_email": True})
+    assert key != result_key("v1", "graph learning", 5, {})
+
+
+def test_results_are_evicted_by_memory_budget(result_cache):
+    one = len(result_key("v", "q0", 5, {})) + 200 + 160 * len(HITS)
+    cache = result_cache(max_bytes=2 * one)
+    for i in range(3):
+        cache.put(result_key("v", f"q{i}", 5, {}), HITS)
+
+    assert cache.get(result_key("v", "q0", 5, {})) is None
+    assert cache.get(result_key("v", "q2", 5, {})) == HITS
+    assert cache.metrics()["evictions"] == 1 and cache.bytes == 2 * one
+
+
+def test_retain_drops_results_of_older_versions(result_cache):
+    cache = result_cache()
+    cache.put(result_key("v1", "q", 5, {}), HITS)
+    cache.put(result_key("v2", "q", 5, {}), HITS)
+
+    cache.retain("v2")
+
+    assert len(cache) == 1
+    assert cache.get(result_key("v2", "q", 5, {})) == HITS
+
+
+def test_disk_tier_survives_a_restart(result_cache):
+    key = result_key("v", "q", 5, {})
+    result_cache(disk=True).put(key, HITS)
+
+    # No memory budget: every lookup goes to the shared SQLite file
+    restarted = result_cache(max_bytes=0, disk=True)
+
+    assert restarted.get(key) == HITS
+    assert restarted.get(result_key("v", "other", 5, {})) is None
+    assert len(restarted) == 0
+    assert restarted.metrics()["disk_hits"] == 1 and restarted.metrics()["misses"] == 1
@@ -0,0 +1,166 @@
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+
+from faculty_scraper.middlewares import ArchiveRecorderMiddleware, ReplayMiddleware
+from faculty_scraper.replay import CrawlArchive, FixtureServer, archive_key
+
+URL = "https://example.edu/faculty/person-1"
+PAGE = b"<html><body><h1>Person 1</h1></body></html>"
+
+
+class Stats:
+    """
+    The inc_value part of a scrapy stats collector.
+    """
+
+    def __init__(self):
+        self.values = Counter()
+
+    def inc_value(self, key, count=1):
+        self.values[key] += count
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = CrawlArchive(str(tmp_path / "archive.db"))
+    yield archive
+    archive.close()
+
+
+@pytest.fixture
+def fixture_server():
+    servers = []
+
+    def _server(pages, **options):
+        server = FixtureServer(("127.0.0.1", 0), pages, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield _server
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _get(server, url):
+    """
+    GET through the fixture server as a forward proxy: (status, headers, body).
+    """
+    proxy = f"http://127.0.0.1:{server.server_address[1]}"
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy}))
+    try:
+        with opener.open(url, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+# --------------------------------------------------
+# Archive
+# --------------------------------------------------
+def test_archive_key_drops_scheme_and_fragment():
+    assert archive_key(URL) == archive_key("http://example.edu/faculty/person-1#bio") == "example.edu/faculty/person-1"
+    assert archive_key("https://example.edu/search?q=a") == "example.edu/search?q=a"
+
+
+def test_archive_keeps_the_latest_response_per_url(archive):
+    archive.record(URL, 200, [("ETag", '"v1"')], b"old")
+    archive.record("http://example.edu/faculty/person-1", 200, [("ETag", '"v2"')], PAGE)
+
+    assert archive.load() == {"example.edu/faculty/person-1": (200, [["ETag", '"v2"']], PAGE)}
+
+
+def test_recorder_stores_raw_responses(archive):
+    stats = Stats()
+    request = Request(URL)
+    response = HtmlResponse(URL, status=200, headers={"Content-Encoding": "identity"}, body=PAGE, request=request)
+
+    assert ArchiveRecorderMiddleware(archive, stats).process_response(request, response, None) is response
+
+    status, headers, body = archive.load()[archive_key(URL)]
+    assert (status, body) == (200, PAGE)
+    assert ["Content-Encoding", "identity"] in headers
+    assert stats.values["replay/recorded"] == 1
+
+
+# --------------------------------------------------
+# Replay middleware
+# --------------------------------------------------
+def test_https_requests_are_replayed_as_http_under_their_own_url():
+    middleware = ReplayMiddleware("http://127.0.0.1:8899")
+    request = Request(URL, meta={"profile_url": URL})
+
+    replayed = middleware.process_request(request, None)
+
+    assert replayed.url == "http://example.edu/faculty/person-1"
+    assert replayed.meta["proxy"] == "http://127.0.0.1:8899"
+    assert replayed.meta["profile_url"] == URL
+    # The rewritten request goes through unchanged
+    assert middleware.process_request(replayed, None) is None
+
+    response = HtmlResponse(replayed.url, body=PAGE, request=replayed)
+    assert middleware.process_response(replayed, response, None).url == URL
+
+
+def test_http_requests_only_get_the_proxy():
+    middleware = ReplayMiddleware("http://127.0.0.1:8899")
+    request = Request("http://example.edu/faculty")
+
+    assert middleware.process_request(request, None) is None
+    assert request.meta["proxy"] == "http://127.0.0.1:8899"
+
+    response = HtmlResponse(request.url, body=PAGE, request=request)
+    assert middleware.process_response(request, response, None) is response
+
+
+def test_redirected_responses_keep_their_new_url():
+    middleware = ReplayMiddleware("http://127.0.0.1:8899")
+    replayed = middleware.process_request(Request(URL), None)
+    response = HtmlResponse("http://example.edu/faculty/person-one", body=PAGE, request=replayed)
+
+    assert middleware.process_response(replayed, response, None) is response
+
+
+# --------------------------------------------------
+# Fixture server
+# --------------------------------------------------
+def test_server_replays_archived_pages(archive, fixture_server):
+    archive.record(URL, 200, [("Content-Type", "text/html"), ("Transfer-Encoding", "chunked")], PAGE)
+    server = fixture_server(archive.load())
+
+    status, headers, body = _get(server, "http://example.edu/faculty/person-1")
+    missing, _, _ = _get(server, "http://example.edu/faculty/person-2")
+
+    assert (status, body) == (200, PAGE)
+    assert headers["Content-Type"] == "text/html"
+    assert headers["Content-Length"] == str(len(PAGE))
+    assert missing == 404
+    assert server.stats == {"requests": 2, "hits": 1, "misses": 1, "failures": 0}
+
+
+def test_server_injects_failures(archive, fixture_server):
+    archive.record(URL, 200, [], PAGE)
+    server = fixture_server(archive.load(), failure_rate=1.0)
+
+    status, _, body = _get(server, "http://example.edu/faculty/person-1")
+
+    assert (status, body) == (503, b"Injected failure")
+    assert server.stats["failures"] == 1
+
+
+def test_same_seed_fails_the_same_requests():
+    draws = []
+    for _ in range(2):
+        server = FixtureServer(("127.0.0.1", 0), {}, latency_ms=10, jitter_ms=5, failure_rate=0.5, seed=7)
+        draws.append([server.draw() for _ in range(20)])
+        server.server_close()
+
+    assert draws[0] == draws[1]
+    assert all(0.005 <= delay <= 0.015 for delay, _ in draws[0])
+    assert any(fail for _, fail in draws[0]) and not all(fail for _, fail in draws[0])
@@ -0,0 +1,157 @@
+import pytest
+
+import search_engine
+from conftest import make_record
+from search_engine import FacultySearchEngine, name_key
+from store import save_to_db
+
+
+@pytest.fixture
+def make_engine(faculty_db, fake_model):
+    engines = []
+
+    def _make(**options):
+        engine = FacultySearchEngine(model=fake_model, db_path=faculty_db, snapshot="off", chunk_index="off",
+                                     **options)
+        engines.append(engine)
+        return engine
+
+    yield _make
+    for engine in engines:
+        engine.batcher.close()
+        engine.result_cache.close()
+        engine.pool.close()
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine()
+
+
+def _urls(hits):
+    return [hit["faculty"]["profile_url"] for hit in hits]
+
+
+# --------------------------------------------------
+# Ranking
+# --------------------------------------------------
+def test_name_key_ignores_case_and_punctuation():
+    assert name_key("Dr. Abhishek  GUPTA") == ("dr", "abhishek", "gupta")
+    assert name_key(None) == ()
+
+
+def test_exact_name_ranks_first(engine):
+    hits = engine.search("person 4", 3)
+
+    assert _urls(hits)[0] == make_record(4)["profile_url"]
+    assert hits[0]["score"] == 1.0
+
+
+def test_exact_name_respects_filters(engine):
+    hits = engine.search("person 4", 3, {"has_email": False})
+
+    assert make_record(4)["profile_url"] not in _urls(hits)
+
+
+def test_weak_keyword_hits_do_not_bypass_min_score(faculty_db, make_engine, monkeypatch):
+    # Every profile is a BM25 hit for "shared"; only the top KEYWORD_RANK
+    # of them may skip the min_score cut
+    save_to_db([make_record(n, research=f"Shared word {n}") for n in range(1, 6)], db_path=faculty_db)
+    monkeypatch.setattr(search_engine, "KEYWORD_RANK", 2)
+
+    hits = make_engine(min_score=1.01).search("shared", 5)
+
+    assert len(hits) == 2
+
+
+def test_name_words_bypass_min_score(make_engine):
+    hits = make_engine(min_score=1.01).search("person", 5)
+
+    assert len(hits) == 5
+
+
+# --------------------------------------------------
+# Filter masks
+# --------------------------------------------------
+def test_mask_marks_the_rows_that_pass(engine):
+    save_to_db([make_record(2, faculty_type="Adjunct Faculty"), make_record(4, faculty_type="Adjunct Faculty")],
+               db_path=engine.pool.db_path)
+
+    mask = engine.filter_mask({"faculty_type": "adjunct faculty"})
+
+    assert [row["profile_url"] for row, keep in zip(engine.rows, mask) if keep] == [
+        make_record(2)["profile_url"], make_record(4)["profile_url"]
+    ]
+
+
+def test_mask_skips_rows_added_after_the_index_was_loaded(engine):
+    save_to_db([make_record(9, faculty_type="Adjunct Faculty")], db_path=engine.pool.db_path)
+
+    mask = engine.filter_mask({"faculty_type": "Adjunct Faculty"})
+
+    assert len(mask) == len(engine.rows) and not mask.any()
+
+
+def test_mask_of_deleted_rows_is_empty(engine):
+    save_to_db([make_record(n) for n in (1, 2)], prune=True, db_path=engine.pool.db_path)
+
+    mask = engine.filter_mask({"has_email": True})
+
+    assert [row["profile_url"] for row, keep in zip(engine.rows, mask) if keep] == [
+        make_record(1)["profile_url"], make_record(2)["profile_url"]
+    ]
+
+
+def test_no_filters_means_no_mask(engine):
+    assert engine.filter_mask({}) is None
+    assert engine.filter_mask({"education": "  "}) is None
+
+
+def test_filtered_search_returns_only_passing_rows(engine):
+    save_to_db([make_record(3, faculty_type="Adjunct Faculty")], db_path=engine.pool.db_path)
+
+    hits = engine.search("topic", 5, {"faculty_type": "adjunct faculty"})
+
+    assert _urls(hits) == [make_record(3)["profile_url"]]
+
+
+# --------------------------------------------------
+# Result cache invalidation
+# --------------------------------------------------
+def test_index_version_is_stable_without_writes(engine):
+    version = engine.index_version()
+
+    save_to_db([make_record(1)], db_path=engine.pool.db_path)
+
+    assert engine.index_version() == version
+
+
+def test_index_version_moves_with_every_write(engine):
+    seen = {engine.index_version()}
+
+    save_to_db([make_record(1, research="Edited")], db_path=engine.pool.db_path)
+    seen.add(engine.index_version())
+    save_to_db([make_record(6)], db_path=engine.pool.db_path)
+    seen.add(engine.index_version())
+
+    assert len(seen) == 3
+    assert engine.metrics()["db_writes_since_load"] == 2
+
+
+def test_filtered_results_are_not_served_from_before_a_write(engine):
+    filters = {"faculty_type": "Adjunct Faculty"}
+    assert engine.search("topic", 5, filters) == []
+
+    save_to_db([make_record(5, faculty_type="Adjunct Faculty")], db_path=engine.pool.db_path)
+
+    assert _urls(engine.search("topic", 5, filters)) == [make_record(5)["profile_url"]]
+
+
+def test_repeated_search_is_served_from_the_result_cache(engine, fake_model):
+    engine.search("topic 3", 3)
+    encoded = fake_model.encoded
+
+    engine.search("  Topic 3 ", 3)
+
+    assert fake_model.encoded == encoded
+    assert engine.result_cache.metrics()["hits"] == 1
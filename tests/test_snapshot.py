@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+import pytest
+
+import encoders
+from conftest import FakeModel, make_record
+from embeddings import read_faculty
+from encoders import LazyModel
+from query_cache import QueryEmbeddingCache
+from search_engine import FacultySearchEngine
+from snapshot import (
+    META_FILE, begin_snapshot, corpus_fingerprint, load_query_cache, load_snapshot, read_meta,
+    save_query_cache, snapshot_path
+)
+from store import save_to_db
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    return str(tmp_path / "snapshot")
+
+
+@pytest.fixture
+def make_engine(faculty_db, snapshot_dir):
+    engines = []
+
+    def _make(model=None, **options):
+        options = {"chunk_index": "float16", "preload_model": False, **options}
+        engine = FacultySearchEngine(model=model or FakeModel(), db_path=faculty_db, snapshot=snapshot_dir, **options)
+        engines.append(engine)
+        return engine
+
+    yield _make
+    for engine in engines:
+        engine.batcher.close()
+        engine.result_cache.close()
+        engine.pool.close()
+
+
+@pytest.fixture
+def lazy_model(monkeypatch):
+    # The "real" encoder behind the lazy one
+    monkeypatch.setattr(encoders, "load_encoder", lambda *args: FakeModel())
+    return LazyModel()
+
+
+def test_snapshot_path_settings():
+    assert snapshot_path("off", "data/faculty.db") is None
+    assert snapshot_path("auto", "data/faculty.db") == "data/faculty_snapshot"
+    assert snapshot_path("/srv/snap", "data/faculty.db") == "/srv/snap"
+
+
+# --------------------------------------------------
+# Corpus snapshot
+# --------------------------------------------------
+def test_cold_start_writes_a_snapshot_that_loads_back(make_engine, faculty_db, snapshot_dir):
+    engine = make_engine()
+    assert not engine.warm_start
+
+    loaded = load_snapshot(snapshot_dir, read_faculty(faculty_db), engine.model_id, "float16")
+
+    embeddings, chunks, bm25 = loaded
+    assert isinstance(embeddings, np.memmap)
+    np.testing.assert_array_equal(embeddings, engine.embeddings)
+    np.testing.assert_array_equal(chunks.offsets, engine.chunks.offsets)
+    assert read_meta(snapshot_dir)["rows"] == len(engine)
+
+
+def test_warm_start_skips_the_model(make_engine):
+    cold = make_engine()
+    expected = cold.search("Topic 3", k=3)
+
+    model = FakeModel()
+    warm = make_engine(model)
+
+    assert warm.warm_start
+    assert model.encoded == 0
+    assert [hit["faculty"]["id"] for hit in warm.search("Topic 3", k=3)] == [hit["faculty"]["id"] for hit in expected]
+
+
+def test_snapshot_of_other_rows_model_or_chunks_is_ignored(make_engine, faculty_db, snapshot_dir):
+    model_id = make_engine().model_id
+    rows = read_faculty(faculty_db)
+
+    assert load_snapshot(snapshot_dir, rows, model_id, "float16") is not None
+    assert load_snapshot(snapshot_dir, rows, "other-model", "float16") is None
+    assert load_snapshot(snapshot_dir, rows, model_id, "int8") is None
+    assert load_snapshot(snapshot_dir, rows[:-1], model_id, "float16") is None
+    assert load_snapshot(snapshot_dir, rows[::-1], model_id, "float16") is None
+
+    save_to_db([make_record(2, research="Changed since the snapshot")], db_path=faculty_db)
+    assert load_snapshot(snapshot_dir, read_faculty(faculty_db), model_id, "float16") is None
+
+
+def test_snapshot_without_chunks_is_used_for_either_setting(make_engine, faculty_db, snapshot_dir):
+    model_id = make_engine().model_id
+    rows = read_faculty(faculty_db)
+
+    embeddings, chunks, _ = load_snapshot(snapshot_dir, rows, model_id, "off")
+
+    assert chunks is None and len(embeddings) == len(rows)
+
+
+def test_changed_row_rebuilds_the_snapshot(make_engine, faculty_db, snapshot_dir):
+    full = FakeModel()
+    make_engine(full)
+    before = read_meta(snapshot_dir)["fingerprint"]
+
+    save_to_db([make_record(2, research="Changed since the snapshot")], db_path=faculty_db)
+    model = FakeModel()
+    engine = make_engine(model)
+
+    assert not engine.warm_start
+    # The stored vectors of unchanged profiles are reused
+    assert 0 < model.encoded < full.encoded
+    assert read_meta(snapshot_dir)["fingerprint"] == corpus_fingerprint(engine.rows, engine.model_id, "float16")
+    assert read_meta(snapshot_dir)["fingerprint"] != before
+
+
+def test_directory_without_meta_is_no_snapshot(make_engine, faculty_db, snapshot_dir):
+    model_id = make_engine().model_id
+
+    begin_snapshot(snapshot_dir)
+
+    assert not os.path.exists(os.path.join(snapshot_dir, META_FILE))
+    assert os.path.exists(os.path.join(snapshot_dir, "embeddings.npy"))
+    assert load_snapshot(snapshot_dir, read_faculty(faculty_db), model_id, "float16") is None
+
+
+# --------------------------------------------------
+# Lazy model and query cache
+# --------------------------------------------------
+def test_warm_start_with_saved_queries_never_loads_the_model(make_engine, lazy_model):
+    cold = make_engine(LazyModel())
+    cold.encode(["graph learning"])
+    cold.save_query_cache()
+
+    warm = make_engine(lazy_model)
+    warm.encode(["graph learning"])
+
+    assert warm.warm_start and not lazy_model.loaded
+    assert warm.metrics()["model_loaded"] is False
+
+    warm.encode(["a new query"])
+    assert lazy_model.loaded
+
+
+def test_query_cache_round_trip(snapshot_dir):
+    cache = QueryEmbeddingCache(10)
+    cache.put("graph learning", np.ones(4, dtype=np.float32))
+    save_query_cache(snapshot_dir, cache, "model-a")
+
+    restored = QueryEmbeddingCache(10)
+    assert load_query_cache(snapshot_dir, restored, "model-a") == 1
+    np.testing.assert_array_equal(restored.get("graph learning"), np.ones(4, dtype=np.float32))
+
+    assert load_query_cache(snapshot_dir, QueryEmbeddingCache(10), "model-b") == 0
+    assert load_query_cache(os.path.join(snapshot_dir, "missing"), QueryEmbeddingCache(10)) == 0
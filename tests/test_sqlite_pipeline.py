@@ -0,0 +1,103 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from faculty_scraper.crawl_state import CrawlStateStore
+from faculty_scraper.items import FacultyItem
+from faculty_scraper.pipelines import FacultySqlitePipeline
+
+
+class Stats:
+    """
+    The inc_value part of a scrapy stats collector.
+    """
+
+    def __init__(self):
+        self.values = Counter()
+
+    def inc_value(self, key, count=1):
+        self.values[key] += count
+
+
+def _item(n, **fields):
+    return FacultyItem(name=f"  Person {n} ", profile_url=f"https://example.edu/faculty/person-{n}",
+                       email=f"person{n}@example.edu", **fields)
+
+
+def _names(connect, db_path):
+    return [row["name"] for row in connect(db_path).execute("SELECT name FROM faculty ORDER BY id")]
+
+
+@pytest.fixture
+def crawl_state(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def pipeline(db_path, crawl_state):
+    pipeline = FacultySqlitePipeline(db_path, 3, Stats(), SimpleNamespace(crawl_state=crawl_state))
+    pipeline.open_spider(None)
+    yield pipeline
+    if pipeline.conn is not None:
+        pipeline.close_spider(None)
+
+
+def test_items_are_stored_one_batch_at_a_time(pipeline, db_path, connect):
+    for n in range(1, 3):
+        pipeline.process_item(_item(n), None)
+    assert _names(connect, db_path) == []
+
+    pipeline.process_item(_item(3), None)
+
+    assert _names(connect, db_path) == ["Person 1", "Person 2", "Person 3"]
+    assert pipeline.buffer == []
+    assert pipeline.stats.values == {"sqlite/inserted": 3, "sqlite/updated": 0, "sqlite/batches": 1}
+
+
+def test_closing_flushes_the_partial_batch(pipeline, db_path, connect):
+    for n in range(1, 5):
+        pipeline.process_item(_item(n), None)
+
+    pipeline.close_spider(None)
+    pipeline.conn = None
+
+    assert len(_names(connect, db_path)) == 4
+    assert pipeline.stats.values["sqlite/batches"] == 2
+
+
+def test_rows_are_cleaned_and_upserted(pipeline, db_path, connect):
+    pipeline.process_item(_item(1), None)
+    pipeline.flush()
+    pipeline.process_item(_item(1, research="Robotics"), None)
+    pipeline.flush()
+
+    rows = connect(db_path).execute("SELECT name, research FROM faculty").fetchall()
+    assert [tuple(row) for row in rows] == [("Person 1", "Robotics")]
+    assert pipeline.stats.values["sqlite/updated"] == 1
+
+
+def test_crawl_state_is_committed_with_the_batch(pipeline, crawl_state):
+    assert crawl_state.defer_commits
+
+    url = "https://example.edu/faculty/person-1"
+    crawl_state.stage(url, etag='"v1"')
+    pipeline.process_item(_item(1), None)
+    # The scraped signal fires while the row is only buffered
+    crawl_state.item_scraped({"profile_url": url}, None, None)
+    assert crawl_state.get(url) is None
+
+    pipeline.flush()
+
+    assert crawl_state.get(url)["etag"] == '"v1"'
+
+
+def test_runs_without_crawl_state(db_path, connect):
+    pipeline = FacultySqlitePipeline(db_path, 10, Stats(), SimpleNamespace())
+    pipeline.open_spider(None)
+    pipeline.process_item(_item(1), None)
+    pipeline.close_spider(None)
+
+    assert _names(connect, db_path) == ["Person 1"]
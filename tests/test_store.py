@@ -0,0 +1,147 @@
+import sqlite3
+
+from conftest import MISSING, make_record
+from store import create_table, save_to_db, schema_outdated, upsert_faculty, write_version
+from transform import transform_data
+
+
+def _versions(conn):
+    return dict(conn.execute("SELECT profile_url, version FROM faculty"))
+
+
+# --------------------------------------------------
+# Upsert changeset and prune
+# --------------------------------------------------
+def test_first_save_inserts_everything(db_path):
+    records = [make_record(n) for n in range(3)]
+
+    changeset = save_to_db(records, db_path=db_path)
+
+    assert changeset["inserted"] == [r["profile_url"] for r in records]
+    assert changeset["updated"] == [] and changeset["deleted"] == []
+
+
+def test_unchanged_records_are_not_written(faculty_db, connect):
+    before = _versions(connect(faculty_db))
+
+    changeset = save_to_db([make_record(n) for n in range(1, 6)], db_path=faculty_db)
+
+    assert changeset == {"inserted": [], "updated": [], "deleted": []}
+    assert _versions(connect(faculty_db)) == before
+
+
+def test_changed_record_is_updated_and_versioned(faculty_db, connect):
+    changed = make_record(2, research="Graph neural networks")
+
+    changeset = save_to_db([changed], db_path=faculty_db)
+
+    assert changeset["updated"] == [changed["profile_url"]]
+    conn = connect(faculty_db)
+    research, version = conn.execute(
+        "SELECT research, version FROM faculty WHERE profile_url = ?", (changed["profile_url"],)
+    ).fetchone()
+    assert (research, version) == ("Graph neural networks", 2)
+
+
+def test_prune_deletes_profiles_missing_from_the_snapshot(faculty_db, connect):
+    keep = [make_record(n) for n in (1, 2)]
+
+    changeset = save_to_db(keep, prune=True, db_path=faculty_db)
+
+    assert sorted(changeset["deleted"]) == sorted(make_record(n)["profile_url"] for n in (3, 4, 5))
+    assert set(_versions(connect(faculty_db))) == {r["profile_url"] for r in keep}
+
+
+def test_repeated_profile_in_one_save_counts_as_one_insert(db_path):
+    first = make_record(1)
+    again = make_record(1, research="Edited later in the same feed")
+
+    changeset = save_to_db(iter([first, again]), db_path=db_path)
+
+    assert changeset["inserted"] == [first["profile_url"]]
+    assert changeset["updated"] == []
+
+
+def test_records_without_profile_url_are_skipped(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        create_table(conn)
+        changeset = upsert_faculty(conn, [make_record(1, profile_url=None)])
+    assert changeset == {"inserted": [], "updated": []}
+    assert conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0] == 0
+    conn.close()
+
+
+def test_empty_snapshot_prunes_nothing(faculty_db, connect, tmp_path):
+    changeset = save_to_db(transform_data(str(tmp_path / "missing.json")), prune=True, db_path=faculty_db)
+
+    assert changeset == {"inserted": [], "updated": [], "deleted": []}
+    assert len(_versions(connect(faculty_db))) == 5
+
+
+# --------------------------------------------------
+# Full-text index
+# --------------------------------------------------
+def _fts_ids(conn, query):
+    return sorted(row[0] for row in conn.execute("SELECT rowid FROM faculty_fts WHERE faculty_fts MATCH ?", (query,)))
+
+
+def test_missing_placeholder_is_not_indexed(faculty_db, connect):
+    conn = connect(faculty_db)
+
+    assert _fts_ids(conn, "available") == []
+    assert _fts_ids(conn, '"data is not available"') == []
+
+
+def test_fts_follows_inserts_updates_and_deletes(faculty_db, connect):
+    save_to_db([make_record(3, research="Compressive sensing for radar")], db_path=faculty_db)
+    conn = connect(faculty_db)
+    row_id = conn.execute("SELECT id FROM faculty WHERE profile_url = ?", (make_record(3)["profile_url"],)).fetchone()[0]
+    assert _fts_ids(conn, "radar") == [row_id]
+
+    save_to_db([make_record(3, research=MISSING)], db_path=faculty_db)
+    assert _fts_ids(conn, "radar") == []
+
+    save_to_db([make_record(3, research="Radar imaging")], db_path=faculty_db)
+    save_to_db([make_record(n) for n in (1, 2)], prune=True, db_path=faculty_db)
+    assert _fts_ids(conn, "radar") == []
+
+
+def test_placeholder_rows_of_an_old_database_are_indexed_as_null(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE faculty (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, research TEXT, profile_url TEXT UNIQUE)")
+    conn.execute("INSERT INTO faculty (name, research, profile_url) VALUES ('A', ?, 'u1'), ('B', 'Data mining', 'u2')",
+                 (MISSING,))
+    with conn:
+        create_table(conn)
+
+    assert _fts_ids(conn, "data") == [2]
+    conn.close()
+
+
+# --------------------------------------------------
+# Write counter
+# --------------------------------------------------
+def test_every_write_moves_the_counter(faculty_db, connect):
+    conn = connect(faculty_db)
+    start = write_version(conn)
+
+    save_to_db([make_record(1, research="New topic")], db_path=faculty_db)
+    after_update = write_version(conn)
+    save_to_db([make_record(1, research="New topic")], db_path=faculty_db)
+    after_noop = write_version(conn)
+    save_to_db([make_record(n) for n in (1, 2)], prune=True, db_path=faculty_db)
+
+    assert start < after_update == after_noop < write_version(conn)
+
+
+def test_database_without_counter_is_outdated(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        create_table(conn)
+    assert not schema_outdated(conn)
+
+    conn.execute("DROP TABLE faculty_meta")
+    assert write_version(conn) is None
+    assert schema_outdated(conn)
+    conn.close()
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from vector_backends import BruteForceBackend, IVFBackend, VectorBackend, make_backend, measure_recall
+
+
+def _normalized(rows, dim=16, seed=0, clusters=None):
+    rng = np.random.default_rng(seed)
+    if clusters:
+        centers = rng.normal(size=(clusters, dim))
+        matrix = centers[rng.integers(clusters, size=rows)] + 0.1 * rng.normal(size=(rows, dim))
+    else:
+        matrix = rng.normal(size=(rows, dim))
+    matrix = matrix.astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_exact_search_is_sorted_top_k():
+    matrix = _normalized(200)
+    query = matrix[7]
+
+    ids, scores = make_backend("exact").build(matrix).search(query, 5)
+
+    expected = np.argsort(-(matrix @ query))[:5]
+    assert ids.tolist() == expected.tolist()
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_score_is_the_dot_product():
+    matrix = _normalized(50)
+    backend = make_backend("exact").build(matrix)
+
+    np.testing.assert_allclose(backend.score(matrix[0], np.array([3, 9])), matrix[[3, 9]] @ matrix[0])
+
+
+def test_ivf_probing_every_list_is_exact():
+    matrix = _normalized(500, clusters=8)
+    backend = IVFBackend(n_lists=8, n_probe=8).build(matrix)
+    query = _normalized(1, seed=5)[0]
+
+    ids, _ = backend.search(query, 10)
+
+    assert sorted(ids.tolist()) == sorted(np.argsort(-(matrix @ query))[:10].tolist())
+    assert backend.build_stats["recall@10"] == 1.0
+
+
+def test_ivf_lists_partition_the_rows():
+    matrix = _normalized(300, clusters=4)
+    backend = IVFBackend(n_lists=6).build(matrix)
+
+    assert sorted(backend.ids.tolist()) == list(range(300))
+    assert backend.offsets[0] == 0 and backend.offsets[-1] == 300
+
+
+def test_ivf_fewer_probes_lower_measured_recall():
+    matrix = _normalized(2000, dim=32, seed=1)
+    wide = IVFBackend(n_lists=40, n_probe=40).build(matrix).build_stats["recall@10"]
+    narrow = IVFBackend(n_lists=40, n_probe=1).build(matrix).build_stats["recall@10"]
+
+    assert wide == 1.0
+    assert narrow < 0.9
+
+
+class _NearestRowOnly(VectorBackend):
+    """
+    Finds a query's nearest row and pads with the farthest ones: right only
+    when the query is an indexed row itself.
+    """
+
+    name = "nearest-only"
+
+    def build(self, matrix):
+        self.matrix = matrix
+        return self
+
+    def search(self, query, k):
+        order = np.argsort(-(self.matrix @ query))
+        ids = np.concatenate([order[:1], order[::-1][:k - 1]])
+        return ids, self.matrix[ids] @ query
+
+
+def test_recall_queries_are_not_the_indexed_rows():
+    matrix = _normalized(300)
+
+    stats = measure_recall(_NearestRowOnly().build(matrix), matrix, k=5, n_queries=50)
+
+    # Queries taken verbatim from the rows would credit the self-match
+    assert stats["recall@5"] < 0.1
+
+
+def test_recall_of_tiny_matrices():
+    assert measure_recall(BruteForceBackend().build(_normalized(1)), _normalized(1), k=10) == {"recall@10": 1.0}
+    assert IVFBackend().build(np.zeros((0, 4), dtype=np.float32)).search(np.zeros(4, dtype=np.float32), 3)[0].size == 0
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VectorBackend()
+
+    class NoSearch(VectorBackend):
+        def build(self, matrix):
+            return self
+
+    with pytest.raises(TypeError):
+        NoSearch()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        make_backend("hnsw")
@@ -0,0 +1,205 @@
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class VectorBackend(ABC):
+    """
+    Interface for nearest-neighbour search over a normalized float32 matrix.
+
+    build() indexes the matrix; search() returns the top-k (ids, scores) for
+    one query vector; score() returns exact scores for a given set of ids.
+    build_stats holds whatever the build measured (time, recall, ...).
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.build_stats = {}
+
+    def __len__(self):
+        return len(self.matrix)
+
+    @abstractmethod
+    def build(self, matrix):
+        """
+        Indexes `matrix` and returns self.
+        """
+
+    @abstractmethod
+    def search(self, query, k):
+        """
+        (ids, scores) of the k best rows for `query`, best first.
+        """
+
+    def score(self, query, ids):
+        return self.matrix[ids] @ query
+
+
+class BruteForceBackend(VectorBackend):
+    """
+    Exact cosine search: one matrix-vector product over every row.
+    """
+
+    name = "exact"
+
+    def build(self, matrix):
+        started = time.perf_counter()
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.build_stats = {
+            "backend": self.name,
+            "rows": len(self.matrix),
+            "build_seconds": time.perf_counter() - started,
+        }
+        return self
+
+    def search(self, query, k):
+        return _top_k(self.matrix @ query, k)
+
+
+class IVFBackend(VectorBackend):
+    """
+    Inverted-file index: rows are clustered with spherical k-means and a query
+    only scans the `n_probe` lists whose centroids are closest to it.
+
+    Rows are stored grouped by list, so each probed list is one contiguous
+    slice of the matrix. More probes means higher recall and higher latency.
+    """
+
+    name = "ivf"
+
+    def __init__(self, n_lists=None, n_probe=8, iterations=10, train_size=50000,
+                 recall_k=10, recall_queries=200, recall_noise=0.5, seed=0):
+        super().__init__()
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.train_size = train_size
+        self.recall_k = recall_k
+        self.recall_queries = recall_queries
+        self.recall_noise = recall_noise
+        self.seed = seed
+
+    def build(self, matrix):
+        started = time.perf_counter()
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        rng = np.random.default_rng(self.seed)
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(matrix))))
+        n_lists = min(n_lists, len(matrix)) or 1
+        self.centroids = self._train(matrix, n_lists, rng)
+
+        # Group rows by list: ids[offsets[c]:offsets[c + 1]] belong to list c
+        assignment = np.argmax(matrix @ self.centroids.T, axis=1) if len(matrix) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assignment, kind="stable")
+        self.ids = order.astype(np.int64)
+        self.offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self.grouped = matrix[order]
+        self.matrix = matrix
+
+        self.build_stats = {
+            "backend": self.name,
+            "rows": len(matrix),
+            "n_lists": n_lists,
+            "n_probe": self.n_probe,
+            "build_seconds": time.perf_counter() - started,
+        }
+        self.build_stats.update(measure_recall(
+            self, matrix, self.recall_k, self.recall_queries, rng, self.recall_noise
+        ))
+        return self
+
+    def _train(self, matrix, n_lists, rng):
+        if not len(matrix):
+            return np.zeros((n_lists, matrix.shape[1] if matrix.ndim == 2 else 0), dtype=np.float32)
+
+        sample = matrix
+        if len(matrix) > self.train_size:
+            sample = matrix[rng.choice(len(matrix), self.train_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+        return centroids
+
+    def search(self, query, k):
+        if not len(self.matrix):
+            return _top_k(np.zeros(0, dtype=np.float32), k)
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+
+        slices = [slice(self.offsets[c], self.offsets[c + 1]) for c in lists]
+        ids = np.concatenate([self.ids[s] for s in slices])
+        scores = np.concatenate([self.grouped[s] @ query for s in slices])
+
+        best, best_scores = _top_k(scores, k)
+        return ids[best], best_scores
+
+
+BACKENDS = {
+    BruteForceBackend.name: BruteForceBackend,
+    IVFBackend.name: IVFBackend,
+}
+
+
+def make_backend(name="exact", **options):
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown vector backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+
+def measure_recall(backend, matrix, k=10, n_queries=200, rng=None, noise=0.5):
+    """
+    recall@k of `backend` against exact search, plus the mean latency of
+    both. Queries are sampled rows moved off the index by Gaussian noise
+    (`noise` is its expected norm) and renormalized; the row a query came
+    from is left out of both result lists, so the trivial self-match does
+    not inflate recall.
+    """
+    rng = rng or np.random.default_rng(0)
+    if len(matrix) < 2:
+        return {f"recall@{k}": 1.0}
+    k = min(k, len(matrix) - 1)
+
+    sources = rng.choice(len(matrix), min(n_queries, len(matrix)), replace=False)
+    dim = matrix.shape[1]
+    queries = matrix[sources] + rng.normal(0, noise / np.sqrt(dim), (len(sources), dim)).astype(np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    found = 0
+    approx_time = exact_time = 0.0
+    for source, query in zip(sources, queries):
+        started = time.perf_counter()
+        approx_ids, _ = backend.search(query, k + 1)
+        approx_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        exact_ids, _ = _top_k(matrix @ query, k + 1)
+        exact_time += time.perf_counter() - started
+
+        found += len(np.intersect1d(approx_ids[approx_ids != source][:k], exact_ids[exact_ids != source][:k]))
+
+    return {
+        f"recall@{k}": found / (k * len(queries)),
+        "query_ms": 1000 * approx_time / len(queries),
+        "exact_query_ms": 1000 * exact_time / len(queries),
+    }
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return best, scores[best]